@@ -0,0 +1,277 @@
+"""
+Sentiment rollups for the dashboard, maintained incrementally inside the review store.
+
+SQLite triggers on the reviews table keep one counter row per
+(dimension, product, bucket, sentiment) up to date as reviews are inserted,
+labelled, relabelled or deleted, so dashboard queries read a handful of
+bucket rows instead of scanning reviews. Every row is counted twice: under
+its product and under ALL_PRODUCTS.
+
+    python models/analytics.py --import reviews_labeled.csv --product-id bundled
+    python models/analytics.py --product-id bundled              # print the rollups
+"""
+import argparse
+import time
+
+import pandas as pd
+
+from review_store import DEFAULT_STORE, ReviewStore
+
+ALL_PRODUCTS = "*"
+SENTIMENT_NAMES = {-1: "Negative", 0: "Neutral", 1: "Positive"}
+WEEKDAYS = ["Sun", "Mon", "Tue", "Wed", "Thu", "Fri", "Sat"]
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# Bucket expression per dimension, evaluated against the NEW/OLD review row
+DIMENSIONS = {
+    "product": "'all'",
+    "month": "COALESCE({row}.review_month, 'unknown')",
+    # Reviews only carry a month, so the weekday is the day the review was collected
+    "weekday": "strftime('%w', {row}.scraped_at, 'unixepoch')",
+    "rating": "COALESCE(CAST({row}.rating AS TEXT), 'unknown')",
+}
+
+ROLLUP_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rollups (
+    dimension TEXT NOT NULL,
+    product_id TEXT NOT NULL,
+    bucket TEXT NOT NULL,
+    sentiment INTEGER NOT NULL,
+    reviews INTEGER NOT NULL,
+    helpfulness REAL NOT NULL,
+    PRIMARY KEY (dimension, product_id, bucket, sentiment)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_reviews_product ON reviews (product_id);
+"""
+
+
+def _bump(row: str, sign: int) -> str:
+    """Trigger body statements adding (sign=1) or removing (sign=-1) `row` from every rollup"""
+    statements = []
+    for dimension, bucket in DIMENSIONS.items():
+        for product in (f"{row}.product_id", f"'{ALL_PRODUCTS}'"):
+            statements.append(
+                "INSERT INTO rollups (dimension, product_id, bucket, sentiment, reviews, helpfulness) "
+                f"VALUES ('{dimension}', {product}, {bucket.format(row=row)}, {row}.sentiment, "
+                f"{sign}, {sign} * COALESCE({row}.helpfulness, 1.0)) "
+                "ON CONFLICT (dimension, product_id, bucket, sentiment) DO UPDATE SET "
+                "reviews = reviews + excluded.reviews, helpfulness = helpfulness + excluded.helpfulness;"
+            )
+    return "\n    ".join(statements)
+
+
+def trigger_sql() -> str:
+    return f"""
+CREATE TRIGGER IF NOT EXISTS rollup_insert AFTER INSERT ON reviews WHEN NEW.sentiment IS NOT NULL
+BEGIN
+    {_bump("NEW", 1)}
+END;
+CREATE TRIGGER IF NOT EXISTS rollup_unlabel AFTER UPDATE OF sentiment, helpfulness ON reviews WHEN OLD.sentiment IS NOT NULL
+BEGIN
+    {_bump("OLD", -1)}
+END;
+CREATE TRIGGER IF NOT EXISTS rollup_label AFTER UPDATE OF sentiment, helpfulness ON reviews WHEN NEW.sentiment IS NOT NULL
+BEGIN
+    {_bump("NEW", 1)}
+END;
+CREATE TRIGGER IF NOT EXISTS rollup_delete AFTER DELETE ON reviews WHEN OLD.sentiment IS NOT NULL
+BEGIN
+    {_bump("OLD", -1)}
+END;
+"""
+
+
+def rebuild_rollups(conn):
+    """Recomputes every rollup from the reviews table (one full scan)"""
+    conn.execute("DELETE FROM rollups")
+    for dimension, bucket in DIMENSIONS.items():
+        bucket = bucket.format(row="reviews")
+        for product in ("product_id", f"'{ALL_PRODUCTS}'"):
+            conn.execute(
+                "INSERT INTO rollups (dimension, product_id, bucket, sentiment, reviews, helpfulness) "
+                f"SELECT '{dimension}', {product}, {bucket}, sentiment, COUNT(*), SUM(COALESCE(helpfulness, 1.0)) "
+                "FROM reviews WHERE sentiment IS NOT NULL GROUP BY 2, 3, 4"
+            )
+    conn.commit()
+
+
+def install(store: ReviewStore):
+    """Creates the rollup table and triggers; backfills the rollups the first time"""
+    conn = store.conn
+    existed = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'rollup_insert'").fetchone()
+    conn.executescript(ROLLUP_SCHEMA + trigger_sql())
+    if not existed:
+        rebuild_rollups(conn)
+
+
+def _buckets(conn, dimension: str, product_id: str):
+    """{bucket: {sentiment: (reviews, helpfulness)}} for one dimension"""
+    rows = conn.execute(
+        "SELECT bucket, sentiment, reviews, helpfulness FROM rollups "
+        "WHERE dimension = ? AND product_id = ? AND reviews > 0",
+        (dimension, product_id or ALL_PRODUCTS),
+    )
+    buckets = {}
+    for bucket, sentiment, reviews, helpfulness in rows:
+        buckets.setdefault(bucket, {})[sentiment] = (reviews, helpfulness)
+    return buckets
+
+
+def _summarize(by_sentiment: dict) -> dict:
+    total = sum(n for n, _ in by_sentiment.values())
+    weight = sum(h for _, h in by_sentiment.values())
+    counts = {name: by_sentiment.get(s, (0, 0.0))[0] for s, name in SENTIMENT_NAMES.items()}
+    return {
+        "total": total,
+        "counts": counts,
+        "percentages": {name: round(100 * n / total, 1) if total else 0.0 for name, n in counts.items()},
+        # Mean sentiment in [-1, 1]; the weighted one counts each review by its helpfulness
+        "score": round(sum(s * n for s, (n, _) in by_sentiment.items()) / total, 4) if total else 0.0,
+        "helpfulness_weighted_score": round(sum(s * h for s, (_, h) in by_sentiment.items()) / weight, 4) if weight else 0.0,
+    }
+
+
+def sentiment_summary(conn, product_id: str = None) -> dict:
+    return _summarize(_buckets(conn, "product", product_id).get("all", {}))
+
+
+def monthly_trend(conn, product_id: str = None, months: int = 12):
+    """Latest `months` months, oldest first, in the dashboard's sentimentTrend shape"""
+    buckets = _buckets(conn, "month", product_id)
+    trend = []
+    for month in sorted(b for b in buckets if b != "unknown")[-months:]:
+        summary = _summarize(buckets[month])
+        trend.append({
+            "month": month,
+            "positive": summary["percentages"]["Positive"],
+            "neutral": summary["percentages"]["Neutral"],
+            "negative": summary["percentages"]["Negative"],
+            "reviews": summary["total"],
+            "helpfulness_weighted_score": summary["helpfulness_weighted_score"],
+        })
+    return trend
+
+
+def weekday_volume(conn, product_id: str = None):
+    """Reviews per day of week, Monday first, in the dashboard's reviewVolume shape"""
+    buckets = _buckets(conn, "weekday", product_id)
+    order = WEEKDAYS[1:] + WEEKDAYS[:1]
+    return [
+        {"day": day, "reviews": sum(n for n, _ in buckets.get(str(WEEKDAYS.index(day)), {}).values())}
+        for day in order
+    ]
+
+
+def rating_distribution(conn, product_id: str = None):
+    buckets = _buckets(conn, "rating", product_id)
+    return [
+        {"rating": bucket, "reviews": sum(n for n, _ in by_sentiment.values()), **_summarize(by_sentiment)["counts"]}
+        for bucket, by_sentiment in sorted(buckets.items())
+    ]
+
+
+def product_overview(conn, limit: int = 100):
+    """Per-product totals and scores, most reviewed first"""
+    rows = conn.execute(
+        "SELECT product_id, sentiment, reviews, helpfulness FROM rollups "
+        "WHERE dimension = 'product' AND product_id != ? AND reviews > 0",
+        (ALL_PRODUCTS,),
+    )
+    products = {}
+    for product_id, sentiment, reviews, helpfulness in rows:
+        products.setdefault(product_id, {})[sentiment] = (reviews, helpfulness)
+    overview = [{"product_id": p, **_summarize(s)} for p, s in products.items()]
+    overview.sort(key=lambda p: p["total"], reverse=True)
+    return overview[:limit]
+
+
+def list_reviews(conn, product_id: str = None, sentiment: int = None, cursor: str = None, limit: int = PAGE_SIZE):
+    """
+    Newest-first keyset pagination over stored reviews.
+
+    `cursor` is the `next_cursor` of the previous page (a rowid), so every page
+    is an index range scan regardless of how deep the client has paged.
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    clauses, params = [], []
+    if product_id:
+        clauses.append("product_id = ?")
+        params.append(product_id)
+    if sentiment is not None:
+        clauses.append("sentiment = ?")
+        params.append(sentiment)
+    if cursor:
+        clauses.append("rowid < ?")
+        params.append(int(cursor))
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    rows = conn.execute(
+        "SELECT rowid, product_id, review_hash, rating, review_title, review_text, date, sentiment, helpfulness "
+        f"FROM reviews {where} ORDER BY rowid DESC LIMIT ?",
+        (*params, limit + 1),
+    ).fetchall()
+    page = [
+        {
+            "id": review_hash,
+            "product_id": pid,
+            "rating": rating,
+            "title": title,
+            "text": text,
+            "date": date,
+            "sentiment": SENTIMENT_NAMES.get(s),
+            "helpfulness": helpfulness,
+        }
+        for _, pid, review_hash, rating, title, text, date, s, helpfulness in rows[:limit]
+    ]
+    next_cursor = str(rows[limit - 1][0]) if len(rows) > limit else None
+    return {"reviews": page, "next_cursor": next_cursor}
+
+
+def import_labelled_csv(store: ReviewStore, path: str, product_id: str, chunk_size: int = 5000) -> int:
+    """Loads a labelled CSV (review, helpfulness, sentiment) into the store under one product id"""
+    inserted = 0
+    for chunk in pd.read_csv(path, chunksize=chunk_size):
+        chunk = chunk.rename(columns={"review": "review_text"})
+        inserted += store.upsert_reviews(product_id, chunk.to_dict("records"))
+    return inserted
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Maintain and inspect the dashboard rollups.")
+    parser.add_argument("--store", default=DEFAULT_STORE)
+    parser.add_argument("--import", dest="import_csv", default=None, metavar="CSV",
+                        help="load a labelled CSV (review, helpfulness, sentiment) into the store first")
+    parser.add_argument("--product-id", default=None, help="product the imported rows belong to / to report on")
+    parser.add_argument("--rebuild", action="store_true", help="recompute every rollup from scratch")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    store = ReviewStore(args.store)
+    try:
+        install(store)
+        if args.import_csv:
+            start = time.perf_counter()
+            inserted = import_labelled_csv(store, args.import_csv, args.product_id or "imported")
+            print(f"✅ Imported {inserted} new reviews from {args.import_csv} in {time.perf_counter() - start:.1f}s")
+        if args.rebuild:
+            rebuild_rollups(store.conn)
+
+        start = time.perf_counter()
+        summary = sentiment_summary(store.conn, args.product_id)
+        trend = monthly_trend(store.conn, args.product_id)
+        volume = weekday_volume(store.conn, args.product_id)
+        ratings = rating_distribution(store.conn, args.product_id)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"\n📊 {args.product_id or 'All products'}: {summary['total']} labelled reviews")
+        print(f"Distribution: {summary['percentages']}")
+        print(f"Score: {summary['score']}  helpfulness-weighted: {summary['helpfulness_weighted_score']}")
+        print(f"Months: {len(trend)}  weekdays: {[v['reviews'] for v in volume]}  rating buckets: {len(ratings)}")
+        print(f"⏱️ Rollup queries took {elapsed:.1f}ms")
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+"""
+HTTP service behind the web app: sentiment analysis and submitted-review storage.
+
+    python models/api.py                     # http://127.0.0.1:8000
+    SENTIMENT_MODEL=./models/snapshot python models/api.py --backend int8
+
+The classifier is loaded once at startup; /readyz answers 503 until it is.
+Concurrent /analyze calls are micro-batched into shared forward passes;
+when --max-queue requests are already waiting, new ones get a 429.
+"""
+import argparse
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, HTTPException, Query
+from fastapi.middleware.cors import CORSMiddleware
+from pydantic import BaseModel
+
+import analytics
+from micro_batcher import MAX_BATCH, MAX_QUEUE, MAX_WAIT_MS, MicroBatcher, QueueFull
+from review_store import DEFAULT_STORE, ReviewStore
+from sentiment_analyser import MAX_LENGTH, MODEL_NAME, load_classifier, map_label, predict_proba_batched
+
+# Frontend label names for the analyser's sentiment values
+SENTIMENT_NAMES = {-1: "Negative", 0: "Neutral", 1: "Positive"}
+MAX_TEXT_CHARS = 20_000
+
+
+class AnalyzeRequest(BaseModel):
+    text: str
+
+
+class SubmitReviewRequest(BaseModel):
+    text: str
+    sentiment: str
+    score: float = None
+    confidence: float = None
+
+
+def describe(probs, id2label) -> dict:
+    """Turns one row of class probabilities into the /analyze response"""
+    by_sentiment = {map_label(id2label[i]): float(p) for i, p in enumerate(probs)}
+    best = max(by_sentiment, key=by_sentiment.get)
+    # 0% = certainly negative, 50% = balanced, 100% = certainly positive
+    score = (by_sentiment.get(1, 0.0) - by_sentiment.get(-1, 0.0) + 1) / 2 * 100
+    return {
+        "sentiment": SENTIMENT_NAMES[best],
+        "score": round(score, 1),
+        "confidence": round(by_sentiment[best] * 100, 1),
+    }
+
+
+def create_app(
+    model_name: str = MODEL_NAME,
+    backend: str = "torch",
+    store_path: str = DEFAULT_STORE,
+    max_length: int = MAX_LENGTH,
+    max_batch: int = MAX_BATCH,
+    max_wait_ms: float = MAX_WAIT_MS,
+    max_queue: int = MAX_QUEUE,
+) -> FastAPI:
+    state = {"ready": False}
+    # One inference thread: keeps the event loop free without sharing the tokenizer across threads
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="inference")
+
+    def analyze_texts(texts):
+        probs = predict_proba_batched(texts, state["tokenizer"], state["model"], max_length=max_length, progress=False)
+        return [describe(row.tolist(), state["model"].id2label) for row in probs]
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        start = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        state["tokenizer"], state["model"] = await loop.run_in_executor(
+            executor, load_classifier, model_name, "main", backend
+        )
+        # Warm-up pass so the first request does not pay for lazy initialisation
+        await loop.run_in_executor(executor, analyze_texts, ["warm up"])
+        state["store"] = ReviewStore(store_path)
+        analytics.install(state["store"])
+        batcher.start()
+        state["ready"] = True
+        print(f"✅ Loaded {model_name} ({backend}) in {time.perf_counter() - start:.1f}s; "
+              f"batching up to {max_batch} requests / {max_wait_ms}ms")
+        yield
+        state["ready"] = False
+        await batcher.stop()
+        state["store"].close()
+        executor.shutdown()
+
+    app = FastAPI(title="Review sentiment API", lifespan=lifespan)
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=os.environ.get("CORS_ORIGINS", "*").split(","),
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    batcher = MicroBatcher(analyze_texts, max_batch, max_wait_ms, max_queue, executor)
+    app.state.analyze_texts = analyze_texts
+    app.state.batcher = batcher
+    app.state.executor = executor
+    app.state.service = state
+
+    @app.get("/healthz")
+    async def healthz():
+        return {"status": "ok"}
+
+    @app.get("/readyz")
+    async def readyz():
+        if not state["ready"]:
+            raise HTTPException(status_code=503, detail="model loading")
+        return {"status": "ready", "model": model_name, "backend": backend, "batching": batcher.stats()}
+
+    @app.post("/analyze")
+    async def analyze(request: AnalyzeRequest):
+        text = request.text.strip()
+        if not text:
+            raise HTTPException(status_code=422, detail="text is empty")
+        if not state["ready"]:
+            raise HTTPException(status_code=503, detail="model loading")
+        try:
+            return await batcher.submit(text[:MAX_TEXT_CHARS])
+        except QueueFull:
+            raise HTTPException(status_code=429, detail="too many requests queued", headers={"Retry-After": "1"})
+
+    # SQLite calls are sub-millisecond; running them on the event loop keeps the connection single-threaded
+    @app.post("/api/submit-review")
+    async def submit_review(request: SubmitReviewRequest):
+        review_id = state["store"].add_submission(request.text, request.sentiment, request.score, request.confidence)
+        return {"id": str(review_id), "status": "saved"}
+
+    @app.get("/get-reviews")
+    async def get_reviews(limit: int = Query(20, ge=1, le=200)):
+        return state["store"].recent_submissions(limit)
+
+    # Dashboard analytics: every endpoint reads rollup buckets, never the reviews themselves
+    @app.get("/analytics/summary")
+    async def analytics_summary(product_id: str = None):
+        return analytics.sentiment_summary(state["store"].conn, product_id)
+
+    @app.get("/analytics/trend")
+    async def analytics_trend(product_id: str = None, months: int = Query(12, ge=1, le=120)):
+        return analytics.monthly_trend(state["store"].conn, product_id, months)
+
+    @app.get("/analytics/volume")
+    async def analytics_volume(product_id: str = None):
+        return analytics.weekday_volume(state["store"].conn, product_id)
+
+    @app.get("/analytics/ratings")
+    async def analytics_ratings(product_id: str = None):
+        return analytics.rating_distribution(state["store"].conn, product_id)
+
+    @app.get("/analytics/products")
+    async def analytics_products(limit: int = Query(100, ge=1, le=1000)):
+        return analytics.product_overview(state["store"].conn, limit)
+
+    @app.get("/reviews")
+    async def list_reviews(
+        product_id: str = None,
+        sentiment: int = Query(None, ge=-1, le=1),
+        cursor: str = Query(None, pattern=r"^\d+$"),
+        limit: int = Query(analytics.PAGE_SIZE, ge=1, le=analytics.MAX_PAGE_SIZE),
+    ):
+        return analytics.list_reviews(state["store"].conn, product_id, sentiment, cursor, limit)
+
+    return app
+
+
+# `uvicorn api:app` (from models/) reads its settings from the environment
+app = create_app(
+    os.environ.get("SENTIMENT_MODEL", MODEL_NAME),
+    os.environ.get("SENTIMENT_BACKEND", "torch"),
+    os.environ.get("REVIEW_STORE", DEFAULT_STORE),
+    max_batch=int(os.environ.get("MAX_BATCH", MAX_BATCH)),
+    max_wait_ms=float(os.environ.get("MAX_WAIT_MS", MAX_WAIT_MS)),
+    max_queue=int(os.environ.get("MAX_QUEUE", MAX_QUEUE)),
+)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Serve the sentiment model over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--model", default=os.environ.get("SENTIMENT_MODEL", MODEL_NAME))
+    parser.add_argument("--backend", default=os.environ.get("SENTIMENT_BACKEND", "torch"),
+                        choices=["torch", "int8", "onnx"])
+    parser.add_argument("--store", default=os.environ.get("REVIEW_STORE", DEFAULT_STORE))
+    parser.add_argument("--max-batch", type=int, default=MAX_BATCH, help="requests per forward pass (1 disables batching)")
+    parser.add_argument("--max-wait-ms", type=float, default=MAX_WAIT_MS, help="how long a batch waits to fill up")
+    parser.add_argument("--max-queue", type=int, default=MAX_QUEUE, help="waiting requests before answering 429")
+    return parser.parse_args()
+
+
+def main():
+    import uvicorn
+
+    args = parse_args()
+    app = create_app(args.model, args.backend, args.store,
+                     max_batch=args.max_batch, max_wait_ms=args.max_wait_ms, max_queue=args.max_queue)
+    uvicorn.run(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
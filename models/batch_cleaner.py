@@ -0,0 +1,160 @@
+import argparse
+import multiprocessing as mp
+import os
+import sys
+import time
+
+import pandas as pd
+
+from review_extractor import TRAILING_NAME_PATTERNS, TRAILING_PUNCTUATION, clean_review_text, strip_trailing_name
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:  # pandas-only fallback: same output, per-string speed
+    pa = None
+    pc = None
+
+# Rows per chunk when cleaning files
+CHUNK_SIZE = 50_000
+# Existing corpora checked by --verify
+DEFAULT_CSVS = [
+    "./reviews_labeled.csv",
+    "./models/dataset/reviews_labeled.csv",
+    "./models/dataset/train.csv",
+    "./training/dataset/train.csv",
+    "./training/dataset/test.csv",
+]
+
+# RE2 (Arrow) and Python's re agree on these patterns for printable ASCII. Anything
+# else (unicode whitespace/digits, tabs, newlines before `$`) goes through Python.
+_ARROW_SAFE = r"^[\x20-\x7e]*$"
+
+
+def _clean_arrow(values):
+    """Runs the ordered cleaning rules over an Arrow string array with RE2 kernels"""
+    for pattern in TRAILING_NAME_PATTERNS:
+        values = pc.replace_substring_regex(values, pattern.pattern, "")
+    values = pc.replace_substring_regex(values, TRAILING_PUNCTUATION.pattern, "")
+    values = pc.replace_substring_regex(values, r"\s+", " ")
+    return pc.utf8_trim_whitespace(values)
+
+
+def clean_review_series(series: pd.Series) -> pd.Series:
+    """
+    Batch version of clean_review_text for a Series (or Arrow column) of review texts.
+
+    With pyarrow installed, every regex rule runs as one RE2 kernel over the
+    whole column; rows RE2 could treat differently from Python's re are routed
+    through the per-string function instead. The final name check runs per
+    row against a frozenset. Missing values stay missing. Output is identical
+    to clean_review_text applied row by row.
+    """
+    if pa is not None and isinstance(series, (pa.Array, pa.ChunkedArray)):
+        series = series.to_pandas()
+    missing = series.isna()
+    values = series[~missing].astype(str)
+    cleaned = pd.Series(index=series.index, dtype=object)
+
+    if pa is None or values.empty:
+        cleaned[~missing] = values.map(clean_review_text)
+        return cleaned
+
+    safe = values.str.match(_ARROW_SAFE) & (values != "")
+    fast = values[safe]
+    if not fast.empty:
+        arrow_cleaned = _clean_arrow(pa.array(fast.tolist(), type=pa.string())).to_pylist()
+        cleaned[fast.index] = [strip_trailing_name(text) for text in arrow_cleaned]
+    slow = values[~safe]
+    if not slow.empty:
+        cleaned[slow.index] = slow.map(clean_review_text)
+    return cleaned
+
+
+def _clean_chunk(chunk_and_column):
+    chunk, column = chunk_and_column
+    chunk[column] = clean_review_series(chunk[column])
+    return chunk
+
+
+def clean_csv(input_path: str, output_path: str, column: str = "review", workers: int = 1, chunk_size: int = CHUNK_SIZE):
+    """Re-cleans `column` of a CSV chunk by chunk, in parallel across processes when workers > 1"""
+    reader = pd.read_csv(input_path, chunksize=chunk_size)
+    jobs = ((chunk, column) for chunk in reader)
+    rows = 0
+    with open(output_path, "w", encoding="utf-8", newline="") as out:
+        if workers > 1:
+            with mp.get_context("spawn").Pool(workers) as pool:
+                for chunk in pool.imap(_clean_chunk, jobs):
+                    chunk.to_csv(out, header=(rows == 0), index=False)
+                    rows += len(chunk)
+        else:
+            for job in jobs:
+                chunk = _clean_chunk(job)
+                chunk.to_csv(out, header=(rows == 0), index=False)
+                rows += len(chunk)
+    return rows
+
+
+def verify(paths, column: str = "review"):
+    """
+    Checks clean_review_series against the scraper's per-string cleaner on existing CSVs.
+
+    Returns the number of rows whose output differs.
+    """
+    from flipkart_scraper import FinalFlipkartScraper
+
+    # The cleaner never touches the driver; skip __init__ so Chrome is not started
+    scraper = FinalFlipkartScraper.__new__(FinalFlipkartScraper)
+    total_mismatches = 0
+    for path in paths:
+        if not os.path.exists(path):
+            print(f"⚠️ {path} not found - skipped")
+            continue
+        texts = pd.read_csv(path)[column].dropna().astype(str)
+
+        start = time.perf_counter()
+        expected = [scraper.clean_review_text_comprehensive(t) for t in texts]
+        per_string = time.perf_counter() - start
+
+        start = time.perf_counter()
+        actual = clean_review_series(texts).tolist()
+        batched = time.perf_counter() - start
+
+        mismatches = [(t, e, a) for t, e, a in zip(texts, expected, actual) if e != a]
+        total_mismatches += len(mismatches)
+        status = "✅" if not mismatches else "❌"
+        print(f"{status} {path}: {len(texts) - len(mismatches)}/{len(texts)} identical; "
+              f"per-string {per_string:.2f}s, batch {batched:.2f}s ({per_string / max(batched, 1e-9):.1f}x)")
+        for text, e, a in mismatches[:5]:
+            print(f"   {text!r}\n     expected {e!r}\n     got      {a!r}")
+    return total_mismatches
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Re-clean stored review texts in bulk.")
+    parser.add_argument("input", nargs="?", help="CSV to clean")
+    parser.add_argument("output", nargs="?", help="where to write the cleaned CSV")
+    parser.add_argument("--column", default="review")
+    parser.add_argument("--workers", type=int, default=1, help="processes cleaning chunks in parallel")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--verify", nargs="*", metavar="CSV",
+                        help="compare against the per-string cleaner on these CSVs (default: the bundled datasets)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.verify is not None:
+        sys.exit(1 if verify(args.verify or DEFAULT_CSVS, args.column) else 0)
+    if not args.input or not args.output:
+        print("❌ Please give an input and an output CSV (or --verify)")
+        sys.exit(2)
+    start = time.perf_counter()
+    rows = clean_csv(args.input, args.output, args.column, args.workers, args.chunk_size)
+    elapsed = time.perf_counter() - start
+    print(f"✅ Cleaned {rows} rows into {args.output} in {elapsed:.1f}s ({rows / max(elapsed, 1e-9):.0f} rows/sec)")
+
+
+if __name__ == "__main__":
+    main()
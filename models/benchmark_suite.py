@@ -0,0 +1,284 @@
+"""
+Reproducible performance benchmarks for parsing, cleaning, labelling and summarization.
+
+Inputs are fixed: synthetic review pages generated with a fixed seed (or a
+directory of captured pages), the first 1k/10k/20k rows of
+reviews_labeled.csv, and the tiny offline models from tiny_models.py. Results
+are written as JSON so two commits can be compared:
+
+    python models/benchmark_suite.py --output bench/before.json
+    python models/benchmark_suite.py --output bench/after.json --compare bench/before.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import subprocess
+import threading
+import time
+
+import pandas as pd
+import torch
+from transformers.utils import logging as transformers_logging
+
+from instrumentation import percentile
+
+SOURCE_CSV = "./reviews_labeled.csv"
+BENCH_DIR = "./models/bench"
+SLICE_SIZES = (1000, 10000, 20000)
+ROW_LIMIT = 1000  # per-row classification only runs on the smallest slice
+SUMMARY_ROWS = 300
+# A result is flagged when its throughput drops by more than this against --compare
+REGRESSION_THRESHOLD = 0.10
+
+
+class PeakMemory:
+    """Samples resident memory on a background thread while the block runs"""
+
+    def __init__(self, interval: float = 0.002):
+        self.interval = interval
+        self.peak = 0
+        self.baseline = 0
+        self._stop = threading.Event()
+
+    @staticmethod
+    def rss() -> int:
+        try:
+            with open("/proc/self/statm") as f:
+                return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError):
+            # Not Linux: lifetime peak, in KiB on Linux/BSD and bytes on macOS
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            return peak if platform.system() == "Darwin" else peak * 1024
+
+    def _sample(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, self.rss())
+            time.sleep(self.interval)
+
+    def __enter__(self):
+        self.baseline = self.peak = self.rss()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, self.rss())
+
+
+def run_case(name: str, items: int, calls, repeat: int = 1, **details) -> dict:
+    """
+    Times `calls` (zero-argument callables, one per unit of work) `repeat` times.
+
+    Latency percentiles are over individual calls; throughput is items per
+    second of the fastest repeat.
+    """
+    latencies = []
+    totals = []
+    # Progress bars and per-review prints are silenced so they are not timed
+    with PeakMemory() as memory, contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for call in calls:
+                call_start = time.perf_counter()
+                call()
+                latencies.append(time.perf_counter() - call_start)
+            totals.append(time.perf_counter() - start)
+    latencies.sort()
+    best = min(totals)
+    result = {
+        "name": name,
+        "items": items,
+        "calls": len(calls),
+        "repeat": repeat,
+        "seconds": round(best, 4),
+        "items_per_sec": round(items / max(best, 1e-9), 1),
+        "latency_ms": {q: round(percentile(latencies, int(q[1:])) * 1000, 3) for q in ("p50", "p90", "p99")},
+        "peak_rss_mb": round(memory.peak / 2**20, 1),
+        "peak_rss_delta_mb": round((memory.peak - memory.baseline) / 2**20, 1),
+        **details,
+    }
+    print(f"  {name:<42} {result['items_per_sec']:>12.1f} items/s  p50 {result['latency_ms']['p50']:>9.3f} ms  "
+          f"p99 {result['latency_ms']['p99']:>9.3f} ms  peak {result['peak_rss_mb']:>7.1f} MB")
+    return result
+
+
+def load_slices(source_csv: str, sizes):
+    df = pd.read_csv(source_csv, nrows=max(sizes))
+    return {size: df.iloc[:size].reset_index(drop=True) for size in sizes if size <= len(df)}
+
+
+def bench_extraction(fixture_dir: str, repeat: int):
+    from bs4 import BeautifulSoup
+
+    from flipkart_scraper import FinalFlipkartScraper, container_text, date_element_texts
+    from review_extractor import extract_review_fields
+
+    scraper = FinalFlipkartScraper(fetch_mode="http")
+    pages = sorted(f for f in os.listdir(fixture_dir) if f.startswith("page_") and f.endswith(".html"))
+    html_pages = []
+    for page in pages:
+        with open(os.path.join(fixture_dir, page), "rb") as f:
+            html_pages.append(f.read())
+    soups = [BeautifulSoup(html, "lxml") for html in html_pages]
+    with contextlib.redirect_stdout(io.StringIO()):
+        containers = [c for soup in soups for c in scraper.get_static_review_containers(soup)]
+    texts = [(container_text(c), c) for c in containers]
+
+    results = [
+        run_case("parse_pages", len(html_pages), [lambda h=h: BeautifulSoup(h, "lxml") for h in html_pages], repeat),
+        run_case("extract_review_fields", len(texts),
+                 [lambda t=t, c=c: extract_review_fields(t, lambda: date_element_texts(c)) for t, c in texts], repeat),
+        run_case("scraper.extract_reviews", len(containers),
+                 [lambda s=s: scraper.extract_reviews(scraper.get_static_review_containers(s), seen=set()) for s in soups],
+                 repeat),
+    ]
+    scraper.close()
+    return results
+
+
+def bench_cleaning(slices, repeat: int):
+    from batch_cleaner import clean_review_series
+    from review_extractor import clean_review_text
+
+    results = []
+    for size, df in slices.items():
+        texts = df["review"].astype(str)
+        results.append(run_case(f"clean_review_text[{size}]", size,
+                                [lambda t=t: clean_review_text(t) for t in texts.tolist()], repeat))
+        results.append(run_case(f"clean_review_series[{size}]", size, [lambda: clean_review_series(texts)], repeat))
+    return results
+
+
+def bench_classification(slices, model_dir: str, repeat: int, row_limit: int):
+    from sentiment_analyser import classify_batched, classify_per_row, load_classifier
+
+    tokenizer, model = load_classifier(model_dir)
+    results = []
+    for size, df in slices.items():
+        texts = df["review"].astype(str).tolist()
+        if size <= row_limit:
+            results.append(run_case(f"classify_per_row[{size}]", size,
+                                    [lambda t=t: classify_per_row([t], tokenizer, model) for t in texts], repeat))
+        results.append(run_case(f"classify_batched[{size}]", size,
+                                [lambda: classify_batched(texts, tokenizer, model, progress=False)], repeat))
+    return results
+
+
+def bench_summarization(df, model_dir: str, repeat: int):
+    from summarizer import chunk_text, load_summarizer, summarize_frame
+
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        tokenizer, model, chunk_tokens = load_summarizer(model_dir)
+    joined = " ".join(df["review"].astype(str))
+    return [
+        run_case(f"chunk_text[{len(df)}]", len(df), [lambda: chunk_text(joined, tokenizer, chunk_tokens)], repeat),
+        run_case(f"summarize_frame[{len(df)}]", len(df),
+                 [lambda: summarize_frame(df, tokenizer, model, chunk_tokens, extractive_budget=0)], repeat),
+        run_case(f"summarize_frame+extractive[{len(df)}]", len(df),
+                 [lambda: summarize_frame(df, tokenizer, model, chunk_tokens)], repeat),
+    ]
+
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "commit": commit or None,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "torch": torch.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "torch_threads": torch.get_num_threads(),
+    }
+
+
+def compare(results, baseline_path: str, threshold: float = REGRESSION_THRESHOLD) -> int:
+    """Prints throughput changes against an earlier run; returns the number of regressions"""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {r["name"]: r for r in json.load(f)["results"]}
+    regressions = 0
+    print(f"\n📊 Against {baseline_path}:")
+    for result in results:
+        old = baseline.get(result["name"])
+        if old is None:
+            continue
+        change = result["items_per_sec"] / max(old["items_per_sec"], 1e-9) - 1
+        flag = "❌" if change < -threshold else "✅"
+        regressions += change < -threshold
+        print(f"{flag} {result['name']:<42} {old['items_per_sec']:>12.1f} -> {result['items_per_sec']:>12.1f} items/s "
+              f"({change:+.1%})")
+    return regressions
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run the offline benchmark suite.")
+    parser.add_argument("--output", default=None, help="JSON results path (default: models/bench/<commit>.json)")
+    parser.add_argument("--compare", default=None, metavar="JSON", help="earlier results to compare against")
+    parser.add_argument("--source", default=SOURCE_CSV)
+    parser.add_argument("--fixtures", default=None, help="directory of captured page_N.html (default: generated)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SLICE_SIZES))
+    parser.add_argument("--row-limit", type=int, default=ROW_LIMIT, help="largest slice for per-row classification")
+    parser.add_argument("--summary-rows", type=int, default=SUMMARY_ROWS)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--only", nargs="+", choices=["extraction", "cleaning", "classification", "summarization"])
+    parser.add_argument("--threads", type=int, default=None, help="pin torch threads for comparable runs")
+    return parser.parse_args()
+
+
+def main():
+    from fixture_server import generate_fixture_pages
+    from tiny_models import build_tiny_models
+
+    args = parse_args()
+    transformers_logging.set_verbosity_error()
+    transformers_logging.disable_progress_bar()
+    if args.threads:
+        torch.set_num_threads(args.threads)
+    torch.manual_seed(0)
+    sections = args.only or ["extraction", "cleaning", "classification", "summarization"]
+
+    fixture_dir = args.fixtures or os.path.join(BENCH_DIR, "fixtures")
+    if not args.fixtures and not os.path.exists(os.path.join(fixture_dir, "page_1.html")):
+        generate_fixture_pages(fixture_dir, pages=20, source_csv=args.source, seed=0)
+    with contextlib.redirect_stdout(io.StringIO()):
+        roberta_dir, bart_dir = build_tiny_models(os.path.join(BENCH_DIR, "tiny"), args.source)
+    slices = load_slices(args.source, args.sizes)
+
+    results = []
+    if "extraction" in sections:
+        print("\n🔍 Extraction")
+        results += bench_extraction(fixture_dir, args.repeat)
+    if "cleaning" in sections:
+        print("\n🧹 Cleaning")
+        results += bench_cleaning(slices, args.repeat)
+    if "classification" in sections:
+        print("\n🏷️ Classification")
+        results += bench_classification(slices, roberta_dir, args.repeat, args.row_limit)
+    if "summarization" in sections:
+        print("\n📝 Summarization")
+        results += bench_summarization(slices[min(slices)].iloc[: args.summary_rows], bart_dir, args.repeat)
+
+    report = {"environment": environment(), "config": vars(args), "results": results}
+    output = args.output or os.path.join(BENCH_DIR, f"{report['environment']['commit'] or 'results'}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✅ Saved {len(results)} results to {output}")
+
+    if args.compare:
+        regressions = compare(results, args.compare)
+        if regressions:
+            raise SystemExit(f"{regressions} benchmark(s) regressed by more than {REGRESSION_THRESHOLD:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+"""
+Two-tier sentiment classification: a hashed n-gram linear model first, RoBERTa only when it is unsure.
+
+Most reviews ("Awesome product", "Worst phone") are easy. The first tier
+hashes each review's word unigrams and bigrams into a fixed-size sparse
+vector and scores it with one sparse matrix product against a multinomial
+logistic regression trained on reviews_labeled.csv. A row whose margin
+(top probability minus runner-up) is below the threshold is escalated to
+the transformer; everything else keeps the linear label.
+
+    python models/cascade.py train reviews_labeled.csv
+    python models/cascade.py eval training/dataset/test.csv --margins 0.3 0.5 0.7
+    python models/sentiment_analyser.py --input reviews.csv --cascade ./models/cascade/hashed_linear.npz
+
+`eval` runs the all-RoBERTa baseline and the cascade at each margin on the
+same rows and reports the escalation rate, end-to-end rows/sec and
+agreement with the baseline.
+"""
+import argparse
+import json
+import os
+import re
+import time
+import zlib
+
+import numpy as np
+from scipy import sparse
+from scipy.optimize import minimize
+
+from instrumentation import count, timer
+
+DEFAULT_MODEL_PATH = "./models/cascade/hashed_linear.npz"
+TRAIN_SET = "./reviews_labeled.csv"
+TEST_SET = "./training/dataset/test.csv"
+
+# Hashed feature space (2^18 x 3 float32 weights = 3 MB on disk)
+NUM_FEATURES = 2**18
+NGRAM_MAX = 2
+L2 = 1e-5
+MAX_ITER = 300
+# Rows with top-1 minus top-2 probability below this go to RoBERTa
+MARGIN = 0.5
+
+_TOKEN = re.compile(r"[a-z0-9']+|[!?]")
+
+
+def tokenize(text) -> list:
+    return _TOKEN.findall(str(text).lower())
+
+
+def hashed_features(texts, num_features: int = NUM_FEATURES, ngram_max: int = NGRAM_MAX) -> sparse.csr_matrix:
+    """
+    L2-normalized, signed binary bag of hashed word n-grams, one CSR row per text.
+
+    Features are CRC32 hashes of the n-gram strings (stable across processes,
+    unlike hash()); the top bit of the hash picks the sign so colliding
+    features tend to cancel instead of adding up.
+    """
+    indices, values, indptr = [], [], [0]
+    for text in texts:
+        tokens = tokenize(text)
+        grams = set(tokens)
+        for n in range(2, ngram_max + 1):
+            grams.update(" ".join(tokens[i : i + n]) for i in range(len(tokens) - n + 1))
+        row = {}
+        for gram in grams:
+            h = zlib.crc32(gram.encode("utf-8"))
+            column = h % num_features
+            row[column] = row.get(column, 0.0) + (1.0 if h >> 31 else -1.0)
+        indices.extend(row)
+        values.extend(row.values())
+        indptr.append(len(indices))
+    matrix = sparse.csr_matrix(
+        (np.asarray(values, dtype=np.float32), np.asarray(indices, dtype=np.int32), np.asarray(indptr, dtype=np.int64)),
+        shape=(len(indptr) - 1, num_features),
+    )
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    return sparse.diags((1 / norms).astype(np.float32)) @ matrix
+
+
+def _softmax(scores: np.ndarray) -> np.ndarray:
+    scores = scores - scores.max(axis=1, keepdims=True)
+    np.exp(scores, out=scores)
+    return scores / scores.sum(axis=1, keepdims=True)
+
+
+class HashedLinearClassifier:
+    """Multinomial logistic regression over hashed n-grams; `classes` are the sentiment values (-1, 0, 1)"""
+
+    def __init__(self, weights: np.ndarray, bias: np.ndarray, classes, ngram_max: int = NGRAM_MAX, meta: dict = None):
+        self.weights = weights.astype(np.float32)
+        self.bias = bias.astype(np.float32)
+        self.classes = np.asarray(classes)
+        self.num_features = weights.shape[0]
+        self.ngram_max = ngram_max
+        self.meta = meta or {}
+
+    @classmethod
+    def train(cls, texts, labels, num_features: int = NUM_FEATURES, ngram_max: int = NGRAM_MAX,
+              l2: float = L2, max_iter: int = MAX_ITER):
+        """Fits weights and bias with L-BFGS on mean cross-entropy plus l2/2 * ||W||^2"""
+        start = time.perf_counter()
+        features = hashed_features(texts, num_features, ngram_max).astype(np.float64)
+        classes, y = np.unique(np.asarray(labels), return_inverse=True)
+        onehot = np.eye(len(classes))[y]
+        n, k = len(y), len(classes)
+
+        def loss_and_grad(params):
+            weights = params[: num_features * k].reshape(num_features, k)
+            bias = params[num_features * k :]
+            probs = _softmax(features @ weights + bias)
+            loss = -np.log(probs[np.arange(n), y] + 1e-12).mean() + 0.5 * l2 * np.dot(weights.ravel(), weights.ravel())
+            error = (probs - onehot) / n
+            grad_w = features.T @ error + l2 * weights
+            return loss, np.concatenate([grad_w.ravel(), error.sum(axis=0)])
+
+        result = minimize(loss_and_grad, np.zeros(num_features * k + k), jac=True, method="L-BFGS-B",
+                          options={"maxiter": max_iter})
+        weights = result.x[: num_features * k].reshape(num_features, k)
+        meta = {"rows": n, "l2": l2, "iterations": int(result.nit), "loss": float(result.fun),
+                "train_seconds": round(time.perf_counter() - start, 2),
+                "trained_at": time.strftime("%Y-%m-%dT%H:%M:%S")}
+        return cls(weights, result.x[num_features * k :], classes, ngram_max, meta)
+
+    def predict_proba(self, texts) -> np.ndarray:
+        features = hashed_features(texts, self.num_features, self.ngram_max)
+        return _softmax(np.asarray(features @ self.weights) + self.bias)
+
+    def predict(self, texts):
+        """(sentiment values, margins) where margin = top-1 minus top-2 probability"""
+        probs = self.predict_proba(texts)
+        top2 = np.sort(probs, axis=1)[:, -2:]
+        return self.classes[probs.argmax(axis=1)], top2[:, 1] - top2[:, 0]
+
+    def save(self, path: str = DEFAULT_MODEL_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        np.savez(path, weights=self.weights, bias=self.bias, classes=self.classes,
+                 ngram_max=self.ngram_max, meta=json.dumps(self.meta))
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_MODEL_PATH):
+        with np.load(path) as data:
+            return cls(data["weights"], data["bias"], data["classes"], int(data["ngram_max"]),
+                       json.loads(str(data["meta"])))
+
+
+class Cascade:
+    """
+    Wraps a `classify(texts) -> labels` callable (RoBERTa) behind the linear model.
+
+    Only rows whose linear margin is below `margin` reach `classify`, in one
+    call per batch, so it still gets to length-bucket them. margin=0 never
+    escalates; margin=1 escalates everything.
+    """
+
+    def __init__(self, linear: HashedLinearClassifier, classify, margin: float = MARGIN):
+        self.linear = linear
+        self.escalate_to = classify
+        self.margin = margin
+        self.rows = 0
+        self.escalated = 0
+        self.linear_seconds = 0.0
+        self.escalated_seconds = 0.0
+
+    def classify(self, texts):
+        texts = list(texts)
+        start = time.perf_counter()
+        with timer("cascade_linear"):
+            labels, margins = self.linear.predict(texts)
+        labels = labels.astype(np.int64)
+        escalate = np.flatnonzero(margins < self.margin)
+        self.linear_seconds += time.perf_counter() - start
+
+        if len(escalate):
+            start = time.perf_counter()
+            labels[escalate] = self.escalate_to([texts[i] for i in escalate])
+            self.escalated_seconds += time.perf_counter() - start
+        self.rows += len(texts)
+        self.escalated += len(escalate)
+        count("cascade_rows", len(texts))
+        count("cascade_escalated", len(escalate))
+        return labels.tolist()
+
+    def report(self):
+        rate = self.escalated / self.rows if self.rows else 0.0
+        elapsed = self.linear_seconds + self.escalated_seconds
+        print(f"🪜 Cascade: {self.escalated} of {self.rows} rows escalated ({rate:.1%}) at margin {self.margin}; "
+              f"linear {self.linear_seconds:.2f}s, RoBERTa {self.escalated_seconds:.2f}s, "
+              f"{self.rows / max(elapsed, 1e-9):.0f} rows/sec overall")
+        return {"rows": self.rows, "escalated": self.escalated, "escalation_rate": rate,
+                "linear_seconds": self.linear_seconds, "escalated_seconds": self.escalated_seconds}
+
+
+def train_model(train_path: str = TRAIN_SET, output: str = DEFAULT_MODEL_PATH, test_path: str = TEST_SET,
+                num_features: int = NUM_FEATURES, ngram_max: int = NGRAM_MAX, l2: float = L2,
+                max_iter: int = MAX_ITER) -> HashedLinearClassifier:
+    from dataset_io import read_dataset
+
+    df = read_dataset(train_path, columns=["review", "sentiment"])
+    print(f"🧮 Training the hashed n-gram model on {len(df)} rows of {train_path} (2^{int(np.log2(num_features))} "
+          f"features, n-grams up to {ngram_max})")
+    model = HashedLinearClassifier.train(df["review"].astype(str).tolist(), df["sentiment"].to_numpy(),
+                                         num_features, ngram_max, l2, max_iter)
+    model.meta["train_accuracy"] = float(np.mean(model.predict(df["review"].astype(str).tolist())[0] == df["sentiment"]))
+    if test_path and os.path.exists(test_path):
+        test = read_dataset(test_path, columns=["review", "sentiment"])
+        model.meta["test_accuracy"] = float(np.mean(model.predict(test["review"].astype(str).tolist())[0]
+                                                    == test["sentiment"]))
+    model.meta["source"] = os.path.abspath(train_path)
+    model.save(output)
+    print(f"✅ Saved {output} after {model.meta['iterations']} iterations in {model.meta['train_seconds']:.1f}s "
+          f"(train accuracy {model.meta['train_accuracy']:.3f}"
+          + (f", test accuracy {model.meta['test_accuracy']:.3f}" if "test_accuracy" in model.meta else "") + ")")
+    return model
+
+
+def evaluate(input_path: str = TEST_SET, model_path: str = DEFAULT_MODEL_PATH, margins=(MARGIN,),
+             model_name: str = None, revision: str = "main", backend: str = "torch", limit: int = None,
+             report_path: str = None, **batch_kwargs):
+    """
+    Cascade vs the all-RoBERTa baseline on the same rows, one cascade run per margin.
+
+    Agreement is the share of rows whose cascade label equals the baseline
+    label; when the input has a 'sentiment' column, accuracy against it is
+    reported for both as well.
+    """
+    from dataset_io import read_dataset
+    from sentiment_analyser import MODEL_NAME, classify_batched, load_classifier
+
+    df = read_dataset(input_path, nrows=limit)
+    texts = df["review"].astype(str).tolist()
+    truth = df["sentiment"].to_numpy() if "sentiment" in df else None
+    linear = HashedLinearClassifier.load(model_path)
+    tokenizer, model = load_classifier(model_name or MODEL_NAME, revision, backend)
+
+    def roberta(batch):
+        return classify_batched(batch, tokenizer, model, progress=False, **batch_kwargs)
+
+    roberta(texts[:8])  # warm-up
+    start = time.perf_counter()
+    baseline = np.asarray(roberta(texts))
+    baseline_seconds = time.perf_counter() - start
+
+    runs = [("roberta", None, 1.0, baseline_seconds, baseline)]
+    start = time.perf_counter()
+    linear_labels = linear.predict(texts)[0]
+    runs.append(("linear", None, 0.0, time.perf_counter() - start, linear_labels))
+    for margin in margins:
+        cascade = Cascade(linear, roberta, margin)
+        start = time.perf_counter()
+        labels = np.asarray(cascade.classify(texts))
+        runs.append(("cascade", margin, cascade.escalated / len(texts), time.perf_counter() - start, labels))
+
+    results = []
+    for tier, margin, escalation_rate, seconds, labels in runs:
+        result = {
+            "tier": tier,
+            "margin": margin,
+            "escalation_rate": escalation_rate,
+            "seconds": seconds,
+            "rows_per_sec": len(texts) / max(seconds, 1e-9),
+            "speedup": baseline_seconds / max(seconds, 1e-9),
+            "agreement": float(np.mean(labels == baseline)),
+        }
+        if truth is not None:
+            result["accuracy"] = float(np.mean(labels == truth))
+        results.append(result)
+
+    print(f"\n📊 {len(texts)} rows of {input_path}, baseline {model_name or MODEL_NAME} ({backend})")
+    print(f"{'tier':>8} {'margin':>7} {'escalated':>10} {'seconds':>8} {'rows/sec':>10} {'speedup':>8} "
+          f"{'agreement':>10}" + (f" {'accuracy':>9}" if truth is not None else ""))
+    for r in results:
+        margin = "-" if r["margin"] is None else f"{r['margin']:.2f}"
+        print(f"{r['tier']:>8} {margin:>7} {r['escalation_rate']:>10.1%} {r['seconds']:>8.2f} "
+              f"{r['rows_per_sec']:>10.0f} {r['speedup']:>7.1f}x {r['agreement']:>10.1%}"
+              + (f" {r['accuracy']:>9.1%}" if truth is not None else ""))
+
+    if report_path:
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump({"input": input_path, "rows": len(texts), "model": model_name or MODEL_NAME,
+                       "backend": backend, "linear_model": model_path, "results": results}, f, indent=2)
+        print(f"✅ Saved {report_path}")
+    return results
+
+
+def parse_args():
+    from inference_backends import BACKENDS
+
+    parser = argparse.ArgumentParser(description="Hashed n-gram linear model in front of RoBERTa.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    train = sub.add_parser("train", help="fit the linear tier on labelled reviews")
+    train.add_argument("input", nargs="?", default=TRAIN_SET)
+    train.add_argument("--output", default=DEFAULT_MODEL_PATH)
+    train.add_argument("--test", default=TEST_SET, help="held-out labelled set for the accuracy line")
+    train.add_argument("--num-features", type=int, default=NUM_FEATURES)
+    train.add_argument("--ngram-max", type=int, default=NGRAM_MAX)
+    train.add_argument("--l2", type=float, default=L2)
+    train.add_argument("--max-iter", type=int, default=MAX_ITER)
+    ev = sub.add_parser("eval", help="escalation rate, throughput and agreement vs all-RoBERTa")
+    ev.add_argument("input", nargs="?", default=TEST_SET)
+    ev.add_argument("--linear", default=DEFAULT_MODEL_PATH, help="trained linear tier")
+    ev.add_argument("--margins", type=float, nargs="+", default=[MARGIN])
+    ev.add_argument("--model", default=None, help="RoBERTa model name or local path")
+    ev.add_argument("--revision", default="main")
+    ev.add_argument("--backend", choices=BACKENDS, default="torch")
+    ev.add_argument("--batch-size", type=int, default=None)
+    ev.add_argument("--max-length", type=int, default=None)
+    ev.add_argument("--limit", type=int, default=None, help="only read the first N rows")
+    ev.add_argument("--report", default=None, metavar="JSON", help="also write the results here")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.command == "train":
+        train_model(args.input, args.output, args.test, args.num_features, args.ngram_max, args.l2, args.max_iter)
+    elif args.command == "eval":
+        batch_kwargs = {k: v for k, v in (("batch_size", args.batch_size), ("max_length", args.max_length))
+                        if v is not None}
+        evaluate(args.input, args.linear, args.margins, args.model, args.revision, args.backend, args.limit,
+                 args.report, **batch_kwargs)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,331 @@
+import argparse
+import contextlib
+import io
+import random
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from urllib.parse import urlparse
+
+import pandas as pd
+import requests
+from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+
+from flipkart_scraper import HTTP_POOL_SIZE, HTTP_TIMEOUT, FinalFlipkartScraper
+from instrumentation import maybe_profile
+from near_dedup import NearDuplicateIndex
+from review_store import ReviewStore, product_id_from_url
+
+# Scheduler defaults
+CONCURRENCY = 8
+RATE_PER_HOST = 1.0  # sustained requests per second to any one host
+BURST = 2
+MAX_PAGES = 5
+MAX_RETRIES = 3
+BACKOFF_BASE = 2.0  # seconds; doubled on every retry
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, holding at most `burst`."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Blocks until a token is available, then takes it."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait_for = (1 - self.tokens) / self.rate
+            time.sleep(wait_for)
+
+
+class CrawlMetrics:
+    """Counters and queue-depth samples for one crawl."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.pages_fetched = 0
+        self.pages_failed = 0
+        self.retries = 0
+        self.reviews = 0
+        self.products_done = 0
+        self.early_stops = 0
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+        self.in_flight = 0
+        self._lock = threading.Lock()
+
+    def increment(self, name: str, by: int = 1):
+        """Thread-safe counter update for use from worker threads"""
+        with self._lock:
+            setattr(self, name, getattr(self, name) + by)
+
+    def sample_queue(self, queued: int, in_flight: int):
+        self.queue_depth = queued
+        self.in_flight = in_flight
+        self.max_queue_depth = max(self.max_queue_depth, queued)
+
+    def snapshot(self) -> dict:
+        elapsed = time.perf_counter() - self.started
+        return {
+            "elapsed_sec": round(elapsed, 2),
+            "pages_fetched": self.pages_fetched,
+            "pages_failed": self.pages_failed,
+            "retries": self.retries,
+            "reviews": self.reviews,
+            "products_done": self.products_done,
+            "early_stops": self.early_stops,
+            "pages_per_sec": round(self.pages_fetched / max(elapsed, 1e-9), 2),
+            "reviews_per_sec": round(self.reviews / max(elapsed, 1e-9), 2),
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "in_flight": self.in_flight,
+        }
+
+
+class CrawlScheduler:
+    """
+    Crawls review pages for many products concurrently over the HTTP fetch path.
+
+    Page 1 of every product is queued up front; page n+1 of a product is only
+    queued once page n has added new reviews, so a product stops early (counted
+    in early_stops) as soon as a page is empty or entirely duplicates. Every
+    request first takes a token from its host's bucket, which replaces the
+    fixed random sleep between pages. Failed fetches are retried with
+    exponential backoff and jitter; a page that still fails ends its product
+    and is counted in pages_failed instead, as is a product whose reviews URL
+    cannot be resolved. Either way the product counts in products_done.
+
+    The crawl never starts Chrome: reviews URLs are resolved from the product
+    URL or the product page's static HTML, and pages whose static HTML has no
+    review containers simply end that product.
+
+    With a ReviewStore, each product's dedup set starts from its stored
+    hashes, so a re-crawl stops at the first page with nothing new and only
+    new reviews are inserted.
+
+    With near_dup_threshold, each product also gets a NearDuplicateIndex
+    (seeded from the store) and near-identical reviews are dropped too.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = CONCURRENCY,
+        rate_per_host: float = RATE_PER_HOST,
+        burst: int = BURST,
+        max_pages: int = MAX_PAGES,
+        max_retries: int = MAX_RETRIES,
+        backoff_base: float = BACKOFF_BASE,
+        verbose: bool = False,
+        store: ReviewStore = None,
+        near_dup_threshold: float = None,
+    ):
+        self.concurrency = concurrency
+        self.rate_per_host = rate_per_host
+        self.burst = burst
+        self.max_pages = max_pages
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.verbose = verbose
+        self.store = store
+        self.near_dup_threshold = near_dup_threshold
+        self.metrics = CrawlMetrics()
+        self._buckets = {}
+        self._buckets_lock = threading.Lock()
+        self._local = threading.local()
+        self._scrapers = []
+
+    def _bucket(self, url: str) -> TokenBucket:
+        host = urlparse(url).netloc
+        with self._buckets_lock:
+            if host not in self._buckets:
+                self._buckets[host] = TokenBucket(self.rate_per_host, self.burst)
+            return self._buckets[host]
+
+    def _scraper(self) -> FinalFlipkartScraper:
+        """One HTTP-mode scraper (and keep-alive session) per worker thread"""
+        if not hasattr(self._local, "scraper"):
+            self._local.scraper = FinalFlipkartScraper(fetch_mode="http")
+            # No urllib3 retries: every attempt must take a bucket token and count in metrics.retries
+            adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE, max_retries=0)
+            self._local.scraper.session.mount("http://", adapter)
+            self._local.scraper.session.mount("https://", adapter)
+            self._scrapers.append(self._local.scraper)
+        return self._local.scraper
+
+    def _fetch(self, url: str):
+        """
+        Rate-limited fetch with retries and exponential backoff.
+
+        Returns parsed HTML, or None for a 404 (past the last page); raises
+        the last error once retries are exhausted.
+        """
+        session = self._scraper().session
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self.metrics.increment("retries")
+                time.sleep(self.backoff_base * 2 ** (attempt - 1) * random.uniform(0.5, 1.5))
+            self._bucket(url).acquire()
+            try:
+                response = session.get(url, timeout=HTTP_TIMEOUT)
+                if response.status_code == 404:
+                    return None
+                response.raise_for_status()
+                return BeautifulSoup(response.content, "lxml")
+            except requests.RequestException:
+                if attempt == self.max_retries:
+                    raise
+
+    def _crawl_page(self, state: dict, page: int):
+        """Fetches and extracts one page of a product; returns the new reviews ([] once past the end)"""
+        scraper = self._scraper()
+        if state["reviews_url"] is None:
+            # Static resolution only (rate-limited like any page); never falls back to Chrome
+            reviews_url = scraper.reviews_url_from_product_url(state["product_url"])
+            if reviews_url is None:
+                soup = self._fetch(state["product_url"])
+                reviews_url = scraper.reviews_url_from_html(soup, state["product_url"]) if soup is not None else None
+            if not reviews_url:
+                raise ValueError("no reviews link in the product page's static HTML")
+            state["reviews_url"] = reviews_url
+        reviews_url = state["reviews_url"]
+        sep = "&" if "?" in reviews_url else "?"
+        page_url = f"{reviews_url}{sep}page={page}"
+        soup = self._fetch(page_url)
+        if soup is None:
+            return []
+        containers = scraper.get_static_review_containers(soup, page_url)
+        return scraper.extract_reviews(containers, seen=state["seen"], near_duplicates=state["near"])
+
+    def crawl(self, product_urls):
+        """Crawls every product; returns {product_url: [review dicts]}"""
+        states = {
+            url: {"product_url": url, "reviews_url": None, "seen": set(), "reviews": [], "near": None}
+            for url in dict.fromkeys(product_urls)
+        }
+        for url, state in states.items():
+            if self.near_dup_threshold:
+                state["near"] = NearDuplicateIndex(self.near_dup_threshold)
+            if self.store is not None:
+                state["seen"] = self.store.known_hashes(product_id_from_url(url))
+                if state["near"] is not None:
+                    stored = self.store.review_texts(product_id_from_url(url))
+                    state["near"].insert_many([h for h, _ in stored], [t for _, t in stored])
+        queue = deque((url, 1) for url in states)
+        in_flight = {}
+        last_report = time.perf_counter()
+
+        # The scraper prints per review; silence stdout for the whole crawl (swapping it per
+        # thread is not safe) and report progress on stderr instead
+        quiet = contextlib.redirect_stdout(io.StringIO()) if not self.verbose else contextlib.nullcontext()
+        with quiet, ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            while queue or in_flight:
+                while queue and len(in_flight) < self.concurrency:
+                    url, page = queue.popleft()
+                    in_flight[executor.submit(self._crawl_page, states[url], page)] = (url, page)
+                self.metrics.sample_queue(len(queue), len(in_flight))
+
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    url, page = in_flight.pop(future)
+                    try:
+                        reviews = future.result()
+                    except Exception as e:
+                        print(f"❌ {url} page {page}: {e}", file=sys.stderr)
+                        self.metrics.pages_failed += 1
+                        self.metrics.products_done += 1
+                        continue
+
+                    self.metrics.pages_fetched += 1
+                    self.metrics.reviews += len(reviews)
+                    states[url]["reviews"].extend(reviews)
+                    if self.store is not None and reviews:
+                        self.store.upsert_reviews(product_id_from_url(url), reviews)
+                    if reviews and page < self.max_pages:
+                        queue.append((url, page + 1))
+                    else:
+                        if not reviews:
+                            self.metrics.early_stops += 1
+                        self.metrics.products_done += 1
+
+                if time.perf_counter() - last_report >= 10:
+                    last_report = time.perf_counter()
+                    print(f"📈 {self.metrics.snapshot()}", file=sys.stderr)
+
+        self.metrics.sample_queue(0, 0)
+        for scraper in self._scrapers:
+            scraper.close()
+        return {url: state["reviews"] for url, state in states.items()}
+
+
+def read_product_urls(path: str):
+    with open(path, "r", encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Crawl Flipkart reviews for many products concurrently.")
+    parser.add_argument("urls_file", help="text file with one product URL per line")
+    parser.add_argument("--output", default="crawled_flipkart_reviews.csv")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY)
+    parser.add_argument("--rate", type=float, default=RATE_PER_HOST, help="requests per second per host")
+    parser.add_argument("--burst", type=int, default=BURST)
+    parser.add_argument("--max-pages", type=int, default=MAX_PAGES)
+    parser.add_argument("--max-retries", type=int, default=MAX_RETRIES)
+    parser.add_argument("--store", default=None, metavar="PATH",
+                        help="review store to dedup against and insert new reviews into")
+    parser.add_argument("--near-dup", type=float, default=None, metavar="THRESHOLD",
+                        help="also drop reviews at least this similar to one already kept (e.g. 0.85)")
+    parser.add_argument("--verbose", action="store_true", help="show the scraper's per-review output")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    product_urls = read_product_urls(args.urls_file)
+    print(f"🚀 Crawling {len(product_urls)} products with concurrency={args.concurrency}, "
+          f"{args.rate}/s per host")
+
+    scheduler = CrawlScheduler(
+        concurrency=args.concurrency,
+        rate_per_host=args.rate,
+        burst=args.burst,
+        max_pages=args.max_pages,
+        max_retries=args.max_retries,
+        verbose=args.verbose,
+        store=ReviewStore(args.store) if args.store else None,
+        near_dup_threshold=args.near_dup,
+    )
+    results = scheduler.crawl(product_urls)
+    if scheduler.store is not None:
+        scheduler.store.close()
+
+    rows = [{"product_url": url, **review} for url, reviews in results.items() for review in reviews]
+    if rows:
+        columns = ["product_url", "rating", "review_title", "review_text", "date", "location"]
+        pd.DataFrame(rows)[columns].to_csv(args.output, index=False, encoding="utf-8")
+        print(f"✅ Saved {len(rows)} reviews to {args.output}")
+    else:
+        print("❌ No reviews were extracted")
+
+    print("\n📊 Crawl metrics:")
+    for key, value in scheduler.metrics.snapshot().items():
+        print(f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    with maybe_profile("crawl_scheduler"):
+        main()
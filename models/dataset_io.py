@@ -0,0 +1,250 @@
+"""
+Dataset reads and writes in CSV, Parquet or Arrow IPC, picked by file extension.
+
+    python models/dataset_io.py convert                 # bundled CSVs -> .parquet next to them
+    python models/dataset_io.py convert a.csv --format arrow
+    python models/dataset_io.py bench reviews_labeled.csv
+
+Columnar files keep `sentiment` and `rating` dictionary-encoded, and reads
+only decode the requested columns. Parquet row-group statistics and Arrow
+compute filters let a filter such as [("sentiment", "==", 1)] skip non-matching
+data. Arrow IPC files are written uncompressed so they can be memory-mapped
+without a copy.
+"""
+import argparse
+import os
+import time
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # CSV-only fallback
+    pa = None
+    ds = None
+    pq = None
+
+PARQUET_EXTENSIONS = (".parquet", ".pq")
+ARROW_EXTENSIONS = (".arrow", ".feather", ".ipc")
+# Low-cardinality columns stored as dictionaries
+DICTIONARY_COLUMNS = ("sentiment", "rating")
+# Small enough row groups that a sentiment filter can skip some of them
+ROW_GROUP_SIZE = 4096
+BUNDLED_CSVS = [
+    "./reviews_labeled.csv",
+    "./models/dataset/reviews_labeled.csv",
+    "./models/dataset/train.csv",
+    "./training/dataset/train.csv",
+    "./training/dataset/test.csv",
+]
+
+
+def dataset_format(path: str) -> str:
+    ext = os.path.splitext(path)[1].lower()
+    if ext in PARQUET_EXTENSIONS:
+        return "parquet"
+    if ext in ARROW_EXTENSIONS:
+        return "arrow"
+    return "csv"
+
+
+def _require_pyarrow(path: str):
+    if pa is None:
+        raise ImportError(f"pyarrow is required to read or write {path}; pip install pyarrow")
+
+
+def _filter_expression(filters):
+    """[(column, op, value), ...] (all must hold) -> a pyarrow.dataset expression"""
+    ops = {
+        "==": lambda f, v: f == v,
+        "=": lambda f, v: f == v,
+        "!=": lambda f, v: f != v,
+        "<": lambda f, v: f < v,
+        "<=": lambda f, v: f <= v,
+        ">": lambda f, v: f > v,
+        ">=": lambda f, v: f >= v,
+        "in": lambda f, v: f.isin(list(v)),
+    }
+    expression = None
+    for column, op, value in filters:
+        term = ops[op](ds.field(column), value)
+        expression = term if expression is None else expression & term
+    return expression
+
+
+def _filter_frame(df, filters):
+    """Same filters applied to a DataFrame (the CSV path)"""
+    mask = pd.Series(True, index=df.index)
+    for column, op, value in filters:
+        col = df[column]
+        if op in ("==", "="):
+            mask &= col == value
+        elif op == "!=":
+            mask &= col != value
+        elif op == "<":
+            mask &= col < value
+        elif op == "<=":
+            mask &= col <= value
+        elif op == ">":
+            mask &= col > value
+        elif op == ">=":
+            mask &= col >= value
+        elif op == "in":
+            mask &= col.isin(list(value))
+        else:
+            raise ValueError(f"unsupported filter operator {op!r}")
+    return df[mask].reset_index(drop=True)
+
+
+def read_table(path: str, columns=None, filters=None, memory_map: bool = True):
+    """
+    Reads a Parquet or Arrow IPC file as a pyarrow Table.
+
+    Only `columns` are decoded; `filters` are pushed down into the scan.
+    """
+    _require_pyarrow(path)
+    fmt = dataset_format(path)
+    expression = _filter_expression(filters) if filters else None
+    if fmt == "arrow":
+        source = pa.memory_map(path, "r") if memory_map else pa.OSFile(path, "rb")
+        table = pa.ipc.open_file(source).read_all()
+        if expression is not None:
+            table = table.filter(expression)
+        return table.select(columns) if columns else table
+    return pq.read_table(path, columns=columns, filters=expression, memory_map=memory_map)
+
+
+def read_dataset(path: str, columns=None, filters=None, nrows: int = None, memory_map: bool = True) -> pd.DataFrame:
+    """
+    Loads a CSV, Parquet or Arrow IPC dataset into a DataFrame.
+
+    columns: only these columns are read (or all when None)
+    filters: [(column, op, value), ...] with op in ==, !=, <, <=, >, >=, in; all must hold
+    nrows: the first nrows rows that pass the filters (filters apply first in every format)
+    """
+    if dataset_format(path) == "csv":
+        usecols = None
+        if columns:
+            # Filter columns must be parsed too, even when not returned
+            usecols = list(dict.fromkeys([*columns, *(c for c, _, _ in filters or [])]))
+        if not filters:
+            df = pd.read_csv(path, usecols=usecols, nrows=nrows)
+        elif nrows is None:
+            df = _filter_frame(pd.read_csv(path, usecols=usecols), filters)
+        else:
+            # Stop reading once enough rows have passed the filters
+            parts, kept = [], 0
+            for chunk in pd.read_csv(path, usecols=usecols, chunksize=max(nrows, ROW_GROUP_SIZE)):
+                parts.append(_filter_frame(chunk, filters))
+                kept += len(parts[-1])
+                if kept >= nrows:
+                    break
+            df = pd.concat(parts, ignore_index=True).head(nrows) if parts else pd.read_csv(path, usecols=usecols, nrows=0)
+        return df[list(columns)] if columns else df
+
+    table = read_table(path, columns, filters, memory_map)
+    if nrows is not None:
+        table = table.slice(0, nrows)
+    # Dictionaries are a storage detail: hand back plain values, as the CSV path does
+    for index, field in enumerate(table.schema):
+        if pa.types.is_dictionary(field.type):
+            table = table.set_column(index, field.name, table.column(index).cast(field.type.value_type))
+    return table.to_pandas()
+
+
+def to_table(df: pd.DataFrame):
+    """DataFrame -> Arrow table with the low-cardinality columns dictionary-encoded"""
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    for name in DICTIONARY_COLUMNS:
+        if name in table.column_names and not pa.types.is_dictionary(table.schema.field(name).type):
+            index = table.column_names.index(name)
+            table = table.set_column(index, name, table.column(name).dictionary_encode())
+    return table
+
+
+def write_dataset(df: pd.DataFrame, path: str):
+    """Writes `df` as CSV, Parquet (zstd) or uncompressed Arrow IPC, by extension"""
+    fmt = dataset_format(path)
+    if fmt == "csv":
+        df.to_csv(path, index=False)
+        return
+    _require_pyarrow(path)
+    table = to_table(df)
+    tmp_path = f"{path}.tmp"
+    if fmt == "parquet":
+        pq.write_table(table, tmp_path, compression="zstd", row_group_size=ROW_GROUP_SIZE)
+    else:
+        with pa.OSFile(tmp_path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table, max_chunksize=ROW_GROUP_SIZE)
+    os.replace(tmp_path, path)
+
+
+def convert(paths, fmt: str = "parquet"):
+    """Writes a columnar copy next to each CSV; returns the new paths"""
+    ext = ".parquet" if fmt == "parquet" else ".arrow"
+    written = []
+    for path in paths:
+        if not os.path.exists(path):
+            print(f"⚠️ {path} not found - skipped")
+            continue
+        out = os.path.splitext(path)[0] + ext
+        write_dataset(pd.read_csv(path), out)
+        print(f"✅ {path} ({os.path.getsize(path) / 1e6:.2f} MB) -> {out} ({os.path.getsize(out) / 1e6:.2f} MB)")
+        written.append(out)
+    return written
+
+
+def _best_of(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def benchmark(csv_path: str, repeat: int = 5):
+    """Size and load time of one dataset as CSV, Parquet and Arrow IPC"""
+    base = os.path.splitext(csv_path)[0]
+    df = pd.read_csv(csv_path)
+    paths = {"csv": csv_path, "parquet": f"{base}.bench.parquet", "arrow": f"{base}.bench.arrow"}
+    write_dataset(df, paths["parquet"])
+    write_dataset(df, paths["arrow"])
+    try:
+        print(f"\n📊 {csv_path}: {len(df)} rows, best of {repeat}")
+        print(f"{'format':>8} {'MB':>7} {'full ms':>9} {'review ms':>10} {'sent=1 ms':>10}")
+        for name, path in paths.items():
+            full = _best_of(lambda: read_dataset(path), repeat)
+            projected = _best_of(lambda: read_dataset(path, columns=["review"]), repeat)
+            filtered = _best_of(lambda: read_dataset(path, columns=["review"], filters=[("sentiment", "==", 1)]), repeat)
+            print(f"{name:>8} {os.path.getsize(path) / 1e6:>7.2f} {full * 1000:>9.1f} "
+                  f"{projected * 1000:>10.1f} {filtered * 1000:>10.1f}")
+    finally:
+        os.remove(paths["parquet"])
+        os.remove(paths["arrow"])
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Convert and benchmark columnar review datasets.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    conv = sub.add_parser("convert", help="write Parquet/Arrow copies of CSVs")
+    conv.add_argument("paths", nargs="*", help="CSVs to convert (default: the bundled datasets)")
+    conv.add_argument("--format", choices=["parquet", "arrow"], default="parquet")
+    bench = sub.add_parser("bench", help="file size and load time: CSV vs Parquet vs Arrow IPC")
+    bench.add_argument("path", nargs="?", default="./reviews_labeled.csv")
+    bench.add_argument("--repeat", type=int, default=5)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.command == "convert":
+        convert(args.paths or BUNDLED_CSVS, args.format)
+    elif args.command == "bench":
+        benchmark(args.path, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+import re
+
+import numpy as np
+import scipy.sparse as sp
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9']+")
+# Weight of redundancy against relevance in MMR (0 = pure relevance)
+DIVERSITY = 0.3
+
+
+def tfidf_matrix(texts):
+    """
+    Builds an L2-normalised TF-IDF matrix (one CSR row per text).
+
+    Uses sublinear term frequency and smoothed IDF; the vocabulary is built on
+    the fly, everything after tokenization is sparse/NumPy arithmetic.
+    """
+    vocab = {}
+    indices = []
+    indptr = [0]
+    for text in texts:
+        indices.extend(vocab.setdefault(tok, len(vocab)) for tok in TOKEN_PATTERN.findall(text.lower()))
+        indptr.append(len(indices))
+
+    n_docs = len(texts)
+    counts = sp.csr_matrix(
+        (np.ones(len(indices), dtype=np.float32), np.asarray(indices, dtype=np.int64), np.asarray(indptr)),
+        shape=(n_docs, max(len(vocab), 1)),
+    )
+    counts.sum_duplicates()
+
+    doc_freq = np.bincount(counts.indices, minlength=counts.shape[1])
+    idf = np.log((1 + n_docs) / (1 + doc_freq)).astype(np.float32) + 1
+    counts.data = 1 + np.log(counts.data)
+    matrix = (counts @ sp.diags(idf)).tocsr()
+
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    return (sp.diags(1 / norms) @ matrix).tocsr()
+
+
+def select_representative(texts, token_lengths, token_budget: int, diversity: float = DIVERSITY):
+    """
+    Picks a diverse, representative subset of `texts` whose token lengths fit in `token_budget`.
+
+    Relevance is cosine similarity to the TF-IDF centroid of all texts; each
+    greedy MMR step takes the text maximising
+    (1 - diversity) * relevance - diversity * max similarity to anything
+    already picked, which keeps near-duplicate one-liners from filling the
+    budget. Returns the selected indices in their original order; if no text
+    fits at all, the single most relevant one is returned anyway.
+    """
+    lengths = np.asarray(token_lengths, dtype=np.int64)
+    if lengths.sum() <= token_budget:
+        return list(range(len(texts)))
+
+    matrix = tfidf_matrix(texts)
+    centroid = np.asarray(matrix.mean(axis=0)).ravel()
+    centroid /= np.linalg.norm(centroid) or 1
+    relevance = matrix @ centroid
+
+    max_similarity = np.zeros(len(texts), dtype=np.float32)
+    available = np.ones(len(texts), dtype=bool)
+    selected = []
+    remaining = token_budget
+    while True:
+        candidates = available & (lengths <= remaining)
+        if not candidates.any():
+            break
+        scores = (1 - diversity) * relevance - diversity * max_similarity
+        scores[~candidates] = -np.inf
+        best = int(np.argmax(scores))
+
+        selected.append(best)
+        available[best] = False
+        remaining -= lengths[best]
+        similarity = (matrix @ matrix[best].T).toarray().ravel()
+        np.maximum(max_similarity, similarity, out=max_similarity)
+
+    if not selected and len(texts):
+        selected.append(int(np.argmax(relevance)))
+    return sorted(selected)
@@ -0,0 +1,203 @@
+"""
+Local replay of Flipkart review pages for benchmarking the scraper offline.
+
+    python models/fixture_server.py generate            # synthetic pages from reviews_labeled.csv
+    python models/fixture_server.py capture URL         # save real review pages for replay
+    python models/fixture_server.py bench --selenium    # pages/sec, HTTP path vs Selenium path
+"""
+import argparse
+import contextlib
+import html
+import io
+import os
+import random
+import re
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+
+FIXTURE_DIR = "./models/fixtures/flipkart"
+SOURCE_CSV = "./reviews_labeled.csv"
+REVIEWS_PER_PAGE = 10
+
+NAMES = ["Ajin V", "Talim (sk)", "Mousam Guha Roy", "ANUP SINGH GAUTAM", "Flipkart Customer", "Priya Sharma"]
+CITIES = ["Kochi", "New Delhi", "Bengaluru", "Pune", "Kolkata", "Mumbai District"]
+TITLES = ["Awesome", "Just wow!", "Worth every penny", "Nice", "Does the job", "Terrific purchase", "Must buy"]
+MONTHS = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+REVIEW_TEMPLATE = """
+<div class="col _2wzgFH K0kLPL">
+  <div class="row"><div class="_3LWZlK _1BLPMq">{rating}</div><p class="_2-N8zT">{title}</p></div>
+  <div class="row"><div class="t-ZTKy"><div><div>{text}</div></div></div></div>
+  <div class="row _3n8db9">
+    <p class="_2sc7ZR _2V5EHH">{name}</p>
+    <p class="_2mcZGG"><span>Certified Buyer, {city}</span></p>
+    <p class="_2sc7ZR">{month}, {year}</p>
+  </div>
+  <div class="_1e9_Zu"><span class="_3c3Px5">{helpful} helpful</span></div>
+</div>"""
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Product Reviews - page {page}</title></head>
+<body><div class="_1YokD2 _3Mn1Gg"><div class="col JOpGWq">{reviews}
+</div></div></body></html>
+"""
+
+
+def build_review_page(reviews, page: int, rng: random.Random) -> str:
+    """Renders review texts into markup shaped like Flipkart's static review list."""
+    blocks = []
+    for text in reviews:
+        blocks.append(REVIEW_TEMPLATE.format(
+            rating=rng.randint(1, 5),
+            title=rng.choice(TITLES),
+            text=html.escape(text),
+            name=rng.choice(NAMES),
+            city=rng.choice(CITIES),
+            month=rng.choice(MONTHS),
+            year=rng.randint(2019, 2025),
+            helpful=rng.randint(0, 300),
+        ))
+    return PAGE_TEMPLATE.format(page=page, reviews="".join(blocks))
+
+
+def generate_fixture_pages(out_dir: str = FIXTURE_DIR, pages: int = 20, source_csv: str = SOURCE_CSV, seed: int = 0):
+    """Writes page_1.html .. page_N.html built from real review texts"""
+    os.makedirs(out_dir, exist_ok=True)
+    texts = pd.read_csv(source_csv, nrows=pages * REVIEWS_PER_PAGE)["review"].astype(str).tolist()
+    rng = random.Random(seed)
+    for page in range(1, pages + 1):
+        chunk = texts[(page - 1) * REVIEWS_PER_PAGE : page * REVIEWS_PER_PAGE]
+        with open(os.path.join(out_dir, f"page_{page}.html"), "w", encoding="utf-8") as f:
+            f.write(build_review_page(chunk, page, rng))
+    print(f"✅ Wrote {pages} fixture pages to {out_dir}")
+
+
+def capture_pages(product_url: str, out_dir: str = FIXTURE_DIR, pages: int = 5):
+    """Saves the raw HTML of real review pages so they can be replayed later"""
+    from flipkart_scraper import FinalFlipkartScraper
+
+    os.makedirs(out_dir, exist_ok=True)
+    scraper = FinalFlipkartScraper(fetch_mode="http")
+    try:
+        reviews_url = scraper.get_reviews_url(product_url)
+        for page in range(1, pages + 1):
+            sep = "&" if "?" in reviews_url else "?"
+            response = scraper.session.get(f"{reviews_url}{sep}page={page}", timeout=15)
+            with open(os.path.join(out_dir, f"page_{page}.html"), "wb") as f:
+                f.write(response.content)
+            time.sleep(random.uniform(3, 6))
+    finally:
+        scraper.close()
+    print(f"✅ Captured {pages} pages of {reviews_url} to {out_dir}")
+
+
+class FixtureHandler(SimpleHTTPRequestHandler):
+    """Serves page_N.html for any path carrying ?page=N"""
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        page = query.get("page", ["1"])[0]
+        path = os.path.join(self.server.fixture_dir, f"page_{page}.html")
+        if not re.fullmatch(r"\d+", page) or not os.path.exists(path):
+            self.send_error(404)
+            return
+        with open(path, "rb") as f:
+            body = f.read()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_fixtures(fixture_dir: str = FIXTURE_DIR, port: int = 0):
+    """Starts the replay server on a background thread; returns (server, base reviews URL)"""
+    server = ThreadingHTTPServer(("127.0.0.1", port), FixtureHandler)
+    server.fixture_dir = fixture_dir
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}/product/product-reviews/FIXTURE"
+
+
+def time_fetch_path(base_url: str, pages: int, fetch_mode: str, fast_browser: bool = True):
+    """Scrapes fixture pages 1..pages with one fetch mode; returns (seconds, reviews)"""
+    from flipkart_scraper import FinalFlipkartScraper
+
+    scraper = FinalFlipkartScraper(fetch_mode=fetch_mode, fast_browser=fast_browser)
+    try:
+        # Start the browser before timing so both paths are measured warm
+        if fetch_mode == "selenium":
+            scraper.driver.get(f"{base_url}?page=1")
+        reviews = 0
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            for page in range(1, pages + 1):
+                reviews += len(scraper.scrape_reviews_from_page(f"{base_url}?page={page}"))
+        return time.perf_counter() - start, reviews
+    finally:
+        scraper.close()
+
+
+def benchmark(fixture_dir: str = FIXTURE_DIR, pages: int = 20, selenium: bool = False):
+    if not os.path.exists(os.path.join(fixture_dir, "page_1.html")):
+        generate_fixture_pages(fixture_dir, pages)
+    pages = min(pages, len([f for f in os.listdir(fixture_dir) if f.startswith("page_")]))
+    server, base_url = serve_fixtures(fixture_dir)
+    try:
+        # (label, fetch mode, fast browser)
+        modes = [("http", "http", True)]
+        if selenium:
+            modes += [("selenium", "selenium", False), ("selenium-fast", "selenium", True)]
+        print(f"\n📊 Fetch benchmark over {pages} fixture pages")
+        print(f"{'path':>13} {'seconds':>9} {'pages/sec':>10} {'reviews':>8}")
+        for label, mode, fast in modes:
+            elapsed, reviews = time_fetch_path(base_url, pages, mode, fast)
+            print(f"{label:>13} {elapsed:>9.2f} {pages / max(elapsed, 1e-9):>10.2f} {reviews:>8}")
+    finally:
+        server.shutdown()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Replay saved Flipkart review pages locally.")
+    parser.add_argument("--dir", default=FIXTURE_DIR, help="directory holding page_N.html files")
+    sub = parser.add_subparsers(dest="command", required=True)
+    gen = sub.add_parser("generate", help="build synthetic pages from reviews_labeled.csv")
+    gen.add_argument("--pages", type=int, default=20)
+    cap = sub.add_parser("capture", help="save real review pages")
+    cap.add_argument("url")
+    cap.add_argument("--pages", type=int, default=5)
+    srv = sub.add_parser("serve", help="serve the pages until interrupted")
+    srv.add_argument("--port", type=int, default=8765)
+    bench = sub.add_parser("bench", help="pages/sec of the HTTP path (and optionally Selenium)")
+    bench.add_argument("--pages", type=int, default=20)
+    bench.add_argument("--selenium", action="store_true",
+                       help="also time the headless Chrome path, with and without fast browser mode")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.command == "generate":
+        generate_fixture_pages(args.dir, args.pages)
+    elif args.command == "capture":
+        capture_pages(args.url, args.dir, args.pages)
+    elif args.command == "serve":
+        server, base_url = serve_fixtures(args.dir, args.port)
+        print(f"Serving {args.dir} at {base_url}?page=N (Ctrl+C to stop)")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            server.shutdown()
+    elif args.command == "bench":
+        benchmark(args.dir, args.pages, args.selenium)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,6 @@
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from bs4 import BeautifulSoup
 import pandas as pd
 import numpy as np
@@ -6,7 +8,6 @@ import time
 import random
 import re
 from urllib.parse import urljoin, urlparse
-import hashlib
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
@@ -14,10 +15,117 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 
+from instrumentation import count, maybe_profile, timer, verbose
+from near_dedup import NearDuplicateIndex
+from review_extractor import extract_review_fields
+from review_hash import create_review_hash
+from review_store import ReviewStore, product_id_from_url
+
+# CSS selectors for review containers, most specific first
+REVIEW_CONTAINER_SELECTORS = [
+    "[data-testid='review']",
+    "div.col._2wzgFH",
+    "div._1AtVbE",
+    "div.col",
+    "div[class*='K0kLPL']"
+]
+
+# Elements that may hold the review date when the container text has none
+DATE_ELEMENT_SELECTORS = [
+    "span[class*='date']",
+    "div[class*='date']",
+    "span[class*='time']",
+    "div[class*='time']",
+    "span._2sc7ZR",
+    "div._2sc7ZR",
+    "span[class*='_2sc7ZR']",
+    "div[class*='_2sc7ZR']"
+]
+
+# Keep-alive connections kept per host by the HTTP session
+HTTP_POOL_SIZE = 10
+HTTP_TIMEOUT = 15
+
+# Requests Chrome never makes in fast browser mode; review text needs none of them
+BLOCKED_URL_PATTERNS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf",
+    "*.mp4", "*.webm", "*.m3u8", "*.mp3",
+]
+# Browser waits poll the review count and return once it holds steady this long
+SETTLE_INTERVAL = 0.25
+SETTLE_POLLS = 2
+SETTLE_TIMEOUT = 10
+
+
+def layout_key(page_url):
+    """Pages of the same host and URL shape share one review markup layout"""
+    parsed = urlparse(page_url or "")
+    kind = next((marker for marker in ("product-reviews", "p", "dp") if f"/{marker}/" in parsed.path), "")
+    return f"{parsed.netloc}/{kind}"
+
+
+class CountStable:
+    """
+    WebDriverWait condition: the number of elements matching `selector` is
+    non-zero and unchanged for `polls` consecutive checks. Returns the count.
+    """
+
+    def __init__(self, selector, polls=SETTLE_POLLS):
+        self.selector = selector
+        self.polls = polls
+        self.last = -1
+        self.steady = 0
+
+    def __call__(self, driver):
+        current = len(driver.find_elements(By.CSS_SELECTOR, self.selector))
+        self.steady = self.steady + 1 if current == self.last and current > 0 else 0
+        self.last = current
+        return current if self.steady >= self.polls else False
+
+
+def container_text(container):
+    """Visible text of a review container, one line per text block.
+
+    Works for live Selenium WebElements and for parsed BeautifulSoup nodes.
+    """
+    if hasattr(container, "stripped_strings"):
+        return "\n".join(container.stripped_strings)
+    return container.text
+
+
+def select_elements(container, selector):
+    """CSS-select descendants of a WebElement or a BeautifulSoup node"""
+    if hasattr(container, "select"):
+        return container.select(selector)
+    return container.find_elements(By.CSS_SELECTOR, selector)
+
+
+def date_element_texts(container):
+    """Texts of the container's date-like elements, in selector order"""
+    texts = []
+    for selector in DATE_ELEMENT_SELECTORS:
+        try:
+            texts.extend(container_text(elem).strip() for elem in select_elements(container, selector))
+        except Exception:
+            continue
+    return texts
+
 
 class FinalFlipkartScraper:
-    def __init__(self):
-        self.setup_driver()
+    def __init__(self, fetch_mode="http", fast_browser=True, near_dup_threshold=None):
+        """fetch_mode: "http" parses static HTML and only starts Chrome when that finds no
+        review containers; "selenium" renders every page in the browser.
+        fast_browser: eager page loads with images, fonts and media blocked.
+        near_dup_threshold: also skip reviews this similar (MinHash estimate) to one already kept."""
+        self.fetch_mode = fetch_mode
+        self.fast_browser = fast_browser
+        self.near_duplicates = NearDuplicateIndex(near_dup_threshold) if near_dup_threshold else None
+        self.driver = None
+        # (fetch path, layout_key) -> the container selector that last worked there
+        self.container_selectors = {}
+        if fetch_mode == "selenium":
+            self.setup_driver()
         self.scraped_reviews = set()
         self.session = requests.Session()
         self.setup_session()
@@ -35,13 +143,37 @@ class FinalFlipkartScraper:
         chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
         chrome_options.add_experimental_option('useAutomationExtension', False)
         chrome_options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
+        if self.fast_browser:
+            # Return from get() at DOMContentLoaded; the review wait below covers late content
+            chrome_options.page_load_strategy = "eager"
+            chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+            chrome_options.add_experimental_option("prefs", {
+                "profile.managed_default_content_settings.images": 2,
+                "profile.managed_default_content_settings.media_stream": 2,
+            })
         
         self.driver = webdriver.Chrome(options=chrome_options)
         self.driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+        if self.fast_browser:
+            try:
+                self.driver.execute_cdp_cmd("Network.enable", {})
+                self.driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+            except Exception as e:
+                print(f"⚠️ Could not block fonts/media: {e}")
         self.wait = WebDriverWait(self.driver, 20)
+        self.settle = WebDriverWait(self.driver, SETTLE_TIMEOUT, poll_frequency=SETTLE_INTERVAL)
+    
+    def ensure_driver(self):
+        """Start Chrome on first use"""
+        if self.driver is None:
+            self.setup_driver()
     
     def setup_session(self):
-        """Setup requests session with headers"""
+        """Setup requests session with headers and a pooled, retrying adapter"""
+        retry = Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504])
+        adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE, max_retries=retry)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
@@ -51,26 +183,48 @@ class FinalFlipkartScraper:
             'Upgrade-Insecure-Requests': '1',
         })
     
+    @staticmethod
+    def reviews_url_from_product_url(product_url):
+        """Reviews URL derived from the product URL alone, or None if its shape is not recognized"""
+        if '/product-reviews/' in product_url:
+            return product_url
+        for marker in ('/p/', '/dp/'):
+            if marker in product_url:
+                product_id = product_url.split(marker)[1].split('?')[0]
+                base_url = product_url.split(marker)[0]
+                return f"{base_url}/product-reviews/{product_id}"
+        return None
+
+    @staticmethod
+    def reviews_url_from_html(soup, product_url):
+        """Absolute URL of the product page's reviews link in static HTML, or None"""
+        link = soup.select_one("a[href*='product-reviews']")
+        if link is not None and link.get('href'):
+            return urljoin(product_url, link['href'])
+        return None
+
     def get_reviews_url(self, product_url):
         """Convert any Flipkart product URL to reviews URL"""
         try:
-            if '/product-reviews/' in product_url:
-                return product_url
-            elif '/p/' in product_url:
-                product_id = product_url.split('/p/')[1].split('?')[0]
-                base_url = product_url.split('/p/')[0]
-                reviews_url = f"{base_url}/product-reviews/{product_id}"
-                return reviews_url
-            elif '/dp/' in product_url:
-                product_id = product_url.split('/dp/')[1].split('?')[0]
-                base_url = product_url.split('/dp/')[0]
-                reviews_url = f"{base_url}/product-reviews/{product_id}"
+            reviews_url = self.reviews_url_from_product_url(product_url)
+            if reviews_url:
                 return reviews_url
             else:
+                if self.fetch_mode == "http":
+                    soup = self.fetch_page_html(product_url)
+                    reviews_url = self.reviews_url_from_html(soup, product_url) if soup is not None else None
+                    if reviews_url:
+                        return reviews_url
+                
+                self.ensure_driver()
                 self.driver.get(product_url)
-                time.sleep(3)
                 
-                review_links = self.driver.find_elements(By.XPATH, "//a[contains(@href, 'product-reviews') or contains(text(), 'Reviews') or contains(text(), 'reviews')]")
+                review_link_xpath = "//a[contains(@href, 'product-reviews') or contains(text(), 'Reviews') or contains(text(), 'reviews')]"
+                try:
+                    self.settle.until(EC.presence_of_element_located((By.XPATH, review_link_xpath)))
+                except TimeoutException:
+                    pass
+                review_links = self.driver.find_elements(By.XPATH, review_link_xpath)
                 
                 if review_links:
                     href = review_links[0].get_attribute('href')
@@ -82,42 +236,83 @@ class FinalFlipkartScraper:
             print(f"Error getting reviews URL: {e}")
             return None
     
-    def wait_for_reviews(self):
-        """Wait for reviews to load properly"""
+    def wait_for_reviews(self, page_url=None):
+        """Wait until reviews are present, then scroll and wait for their count to settle"""
+        selector = (self.container_selectors.get(("selenium", layout_key(page_url)))
+                    or ", ".join(REVIEW_CONTAINER_SELECTORS[:4]))
         try:
-            self.wait.until(
-                EC.presence_of_element_located(
-                    (By.CSS_SELECTOR, "[data-testid='review'], div.col._2wzgFH, div._1AtVbE, div.col")
-                )
-            )
+            self.wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, selector)))
             # Scroll to load all content
             self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(3)
         except TimeoutException:
             print("Reviews not found on page")
+            count("page_wait_timeouts")
+            return
+        try:
+            self.settle.until(CountStable(selector))
+        except TimeoutException:
+            # Still changing after SETTLE_TIMEOUT; use whatever has rendered
+            count("page_settle_timeouts")
     
-    def get_review_containers(self):
-        """Get all review containers using multiple selectors"""
-        selectors = [
-            "[data-testid='review']",
-            "div.col._2wzgFH",
-            "div._1AtVbE",
-            "div.col",
-            "div[class*='K0kLPL']"
-        ]
-        
-        for selector in selectors:
-            containers = self.driver.find_elements(By.CSS_SELECTOR, selector)
+    def find_review_containers(self, select, page_url=None, mode="selenium"):
+        """
+        Probe REVIEW_CONTAINER_SELECTORS with `select(selector) -> list`.
+
+        The selector that worked is remembered per fetch mode and
+        layout_key(page_url) and tried first on later pages; if it stops
+        matching more than one element the cache entry is dropped and every
+        selector is probed again.
+        """
+        layout = (mode, layout_key(page_url)) if page_url else None
+        cached = self.container_selectors.get(layout)
+        if cached is not None:
+            containers = select(cached)
+            if len(containers) > 1:
+                count("container_selector_cache", result="hit")
+                return containers
+            del self.container_selectors[layout]
+            count("container_selector_cache", result="stale")
+        for selector in REVIEW_CONTAINER_SELECTORS:
+            if selector == cached:
+                continue
+            containers = select(selector)
             if containers and len(containers) > 1:
-                print(f"Found {len(containers)} review containers using: {selector}")
+                where = " in static HTML" if mode == "http" else ""
+                print(f"Found {len(containers)} review containers{where} using: {selector}")
+                if layout is not None:
+                    self.container_selectors[layout] = selector
                 return containers
         
         return []
     
+    def get_review_containers(self, page_url=None):
+        """Get all review containers using multiple selectors"""
+        return self.find_review_containers(
+            lambda selector: self.driver.find_elements(By.CSS_SELECTOR, selector), page_url or self.driver.current_url
+        )
+    
+    def fetch_page_html(self, page_url):
+        """Fetch a page over the pooled keep-alive session and parse it with lxml"""
+        try:
+            with timer("page_fetch", mode="http"):
+                response = self.session.get(page_url, timeout=HTTP_TIMEOUT)
+                response.raise_for_status()
+            count("pages_fetched", mode="http")
+            with timer("html_parse"):
+                return BeautifulSoup(response.content, "lxml")
+        except requests.RequestException as e:
+            print(f"HTTP fetch failed for {page_url}: {e}")
+            count("page_fetch_errors", mode="http")
+            return None
+    
+    def get_static_review_containers(self, soup, page_url=None):
+        """Find review containers in parsed HTML using the same selectors as the browser path"""
+        return self.find_review_containers(soup.select, page_url, mode="http")
+    
     def extract_rating_properly(self, container):
         """Extract rating (keeping your working method)"""
         try:
-            full_text = container.text
+            full_text = container_text(container)
             lines = full_text.split('\n')
             
             # Look for single digit at the beginning
@@ -149,7 +344,7 @@ class FinalFlipkartScraper:
     def extract_location_properly(self, container):
         """Extract location (keeping your working method)"""
         try:
-            full_text = container.text
+            full_text = container_text(container)
             
             # Look for "Certified Buyer" pattern
             pattern = r'Certified Buyer\s+([A-Za-z\s]+?)(?:\n|$)'
@@ -180,7 +375,7 @@ class FinalFlipkartScraper:
     def extract_date_enhanced(self, container):
         """Enhanced date extraction with multiple strategies"""
         try:
-            full_text = container.text
+            full_text = container_text(container)
             
             # Strategy 1: Look for month + year patterns
             months = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
@@ -191,7 +386,7 @@ class FinalFlipkartScraper:
                 match = re.search(pattern, full_text)
                 if match:
                     date = f"{match.group(1)} {match.group(2)}"
-                    print(f"Found date: {date}")
+                    verbose(f"Found date: {date}")
                     return date
             
             # Strategy 2: Look for "Month, YYYY" pattern
@@ -200,26 +395,15 @@ class FinalFlipkartScraper:
                 match = re.search(pattern, full_text)
                 if match:
                     date = f"{match.group(1)} {match.group(2)}"
-                    print(f"Found date: {date}")
+                    verbose(f"Found date: {date}")
                     return date
             
             # Strategy 3: Look in specific date elements
-            date_selectors = [
-                "span[class*='date']",
-                "div[class*='date']",
-                "span[class*='time']",
-                "div[class*='time']",
-                "span._2sc7ZR",
-                "div._2sc7ZR",
-                "span[class*='_2sc7ZR']",
-                "div[class*='_2sc7ZR']"
-            ]
-            
-            for selector in date_selectors:
+            for selector in DATE_ELEMENT_SELECTORS:
                 try:
-                    date_elements = container.find_elements(By.CSS_SELECTOR, selector)
+                    date_elements = select_elements(container, selector)
                     for elem in date_elements:
-                        elem_text = elem.text.strip()
+                        elem_text = container_text(elem).strip()
                         if elem_text:
                             # Check if this text contains a date
                             for month in months:
@@ -227,7 +411,7 @@ class FinalFlipkartScraper:
                                     year_match = re.search(r'20\d{2}', elem_text)
                                     if year_match:
                                         date = f"{month} {year_match.group()}"
-                                        print(f"Found date in element: {date}")
+                                        verbose(f"Found date in element: {date}")
                                         return date
                 except Exception as e:
                     continue
@@ -242,10 +426,10 @@ class FinalFlipkartScraper:
                         year_match = re.search(r'20\d{2}', line)
                         if year_match:
                             date = f"{month} {year_match.group()}"
-                            print(f"Found date in line: {date}")
+                            verbose(f"Found date in line: {date}")
                             return date
             
-            print("No date found")
+            verbose("No date found")
             return ""
             
         except Exception as e:
@@ -255,7 +439,7 @@ class FinalFlipkartScraper:
     def extract_review_title_properly(self, container):
         """Extract review title (keeping your working method)"""
         try:
-            full_text = container.text
+            full_text = container_text(container)
             
             # Look for common title patterns
             title_patterns = [
@@ -360,7 +544,7 @@ class FinalFlipkartScraper:
     def extract_review_text_clean(self, container):
         """Extract and clean review text from names and dates"""
         try:
-            full_text = container.text
+            full_text = container_text(container)
             lines = full_text.split('\n')
             
             # Skip rating, title, name, location, and date lines
@@ -410,80 +594,136 @@ class FinalFlipkartScraper:
         except Exception as e:
             return np.nan
     
+    def get_page_containers(self, page_url):
+        """Review containers for a page: static HTML first, the browser only as a fallback"""
+        if self.fetch_mode == "http":
+            soup = self.fetch_page_html(page_url)
+            if soup is not None:
+                with timer("container_discovery", mode="http"):
+                    containers = self.get_static_review_containers(soup, page_url)
+                if containers:
+                    return containers
+            print("No review containers in static HTML, falling back to Selenium")
+            count("selenium_fallbacks")
+        
+        self.ensure_driver()
+        with timer("page_fetch", mode="selenium"):
+            self.driver.get(page_url)
+        count("pages_fetched", mode="selenium")
+        
+        # Wait for reviews to load
+        with timer("page_wait"):
+            self.wait_for_reviews(page_url)
+        
+        with timer("container_discovery", mode="selenium"):
+            return self.get_review_containers(page_url)
+    
     def scrape_reviews_from_page(self, page_url):
         """Scrape reviews from a single page with enhanced date extraction"""
         try:
             print(f"📄 Scraping: {page_url}")
-            self.driver.get(page_url)
-            
-            # Wait for reviews to load
-            self.wait_for_reviews()
             
             # Get review containers
-            containers = self.get_review_containers()
+            containers = self.get_page_containers(page_url)
             
             if not containers:
                 print("No review containers found")
                 return []
             
-            reviews = []
-            for i, container in enumerate(containers):
-                try:
-                    print(f"\n--- Processing container {i+1}/{len(containers)} ---")
-                    
-                    # Extract each field with enhanced date extraction
-                    rating = self.extract_rating_properly(container)
-                    location = self.extract_location_properly(container)
-                    date = self.extract_date_enhanced(container)  # Enhanced date extraction
-                    review_title = self.extract_review_title_properly(container)
-                    
-                    # Clean review text with comprehensive name removal
-                    review_text = self.extract_review_text_clean(container)
-                    
-                    # Create review data
-                    review_data = {
-                        'rating': rating if rating else np.nan,
-                        'review_title': review_title if review_title else np.nan,
-                        'review_text': review_text,  # Can be NaN
-                        'date': date if date else np.nan,
-                        'location': location if location else np.nan
-                    }
-                    
-                    # Check for duplicate
-                    review_hash = self.create_review_hash(
-                        str(review_data['review_text']),
-                        str(review_data['review_title']),
-                        str(review_data['rating'])
-                    )
-                    
-                    if review_hash not in self.scraped_reviews:
-                        self.scraped_reviews.add(review_hash)
-                        reviews.append(review_data)
-                        
-                        # Show status
-                        print(f"✅ Added review: Rating={rating}, Date={date}, Text='{str(review_text)[:50] if not pd.isna(review_text) else 'NaN'}...'")
-                    else:
-                        print(f"⚠️ Duplicate review - skipped")
-                
-                except Exception as e:
-                    print(f"Error processing container {i}: {e}")
-                    continue
-            
-            return reviews
+            return self.extract_reviews(containers)
             
         except Exception as e:
             print(f"Error scraping page: {e}")
             return []
     
+    def extract_reviews(self, containers, seen=None, near_duplicates=None):
+        """Extract and de-duplicate review records from review containers
+
+        seen: set of review hashes to de-duplicate against (defaults to this scraper's)
+        near_duplicates: NearDuplicateIndex to check texts against (defaults to this scraper's, if any)
+        """
+        if seen is None:
+            seen = self.scraped_reviews
+        if near_duplicates is None:
+            near_duplicates = self.near_duplicates
+        reviews = []
+        for i, container in enumerate(containers):
+            try:
+                verbose(f"\n--- Processing container {i+1}/{len(containers)} ---")
+                
+                # Fetch the container text once (a WebDriver round-trip for live
+                # elements) and extract every field from it in a single pass
+                with timer("container_text"):
+                    text = container_text(container)
+                with timer("review_extract"):
+                    review_data = extract_review_fields(
+                        text,
+                        date_element_texts=lambda: date_element_texts(container)
+                    )
+                rating = review_data['rating']
+                date = review_data['date']
+                review_text = review_data['review_text']  # Can be NaN
+                
+                # Check for duplicate
+                review_hash = self.create_review_hash(
+                    str(review_data['review_text']),
+                    str(review_data['review_title']),
+                    str(review_data['rating'])
+                )
+                
+                if review_hash in seen:
+                    count("reviews_duplicate")
+                    verbose(f"⚠️ Duplicate review - skipped")
+                    continue
+                
+                # Same review modulo punctuation, emoji or a leftover name
+                match = None
+                if near_duplicates is not None and not pd.isna(review_text):
+                    match = near_duplicates.add(review_hash, review_text)
+                if match is not None:
+                    seen.add(review_hash)
+                    count("reviews_near_duplicate")
+                    verbose(f"⚠️ Near duplicate ({match[1]:.2f}) of an earlier review - skipped")
+                else:
+                    seen.add(review_hash)
+                    reviews.append(review_data)
+                    
+                    count("reviews_added")
+                    
+                    # Show status
+                    verbose(f"✅ Added review: Rating={rating}, Date={date}, Text='{str(review_text)[:50] if not pd.isna(review_text) else 'NaN'}...'")
+            
+            except Exception as e:
+                print(f"Error processing container {i}: {e}")
+                count("container_errors")
+                continue
+        
+        return reviews
+    
     def create_review_hash(self, review_text, review_title, rating):
         """Create unique hash for duplicate detection"""
-        content = f"{review_title}{review_text}{rating}".lower().strip()
-        return hashlib.md5(content.encode()).hexdigest()
+        return create_review_hash(review_text, review_title, rating)
     
-    def scrape_flipkart_reviews(self, product_url, max_pages=5):
-        """Main scraping method"""
+    def scrape_flipkart_reviews(self, product_url, max_pages=5, store=None):
+        """
+        Main scraping method.
+
+        With a ReviewStore, the dedup set starts from the hashes already stored
+        for this product, so only reviews not seen on earlier runs come back
+        (and are inserted); scraping stops at the first page with nothing new,
+        page 1 included. Without a store an empty page 1 is skipped and the
+        crawl stops at the next empty page.
+        """
         try:
             print(f"🎯 Processing URL: {product_url}")
+            product_id = product_id_from_url(product_url)
+            if store is not None:
+                known = store.known_hashes(product_id)
+                self.scraped_reviews.update(known)
+                print(f"🗄️ {len(known)} reviews already stored for {product_id}")
+                if self.near_duplicates is not None:
+                    stored = store.review_texts(product_id)
+                    self.near_duplicates.insert_many([h for h, _ in stored], [t for _, t in stored])
             
             # Get reviews URL
             reviews_url = self.get_reviews_url(product_url)
@@ -504,8 +744,8 @@ class FinalFlipkartScraper:
                 page_reviews = self.scrape_reviews_from_page(page_url)
                 
                 if not page_reviews:
-                    print(f"No reviews found on page {page_num}")
-                    if page_num == 1:
+                    print(f"No new reviews on page {page_num}")
+                    if page_num == 1 and store is None:
                         continue
                     else:
                         break
@@ -516,6 +756,10 @@ class FinalFlipkartScraper:
                 # Random delay between pages
                 time.sleep(random.uniform(3, 6))
             
+            if store is not None and all_reviews:
+                inserted = store.upsert_reviews(product_id, all_reviews)
+                print(f"🗄️ Stored {inserted} new reviews for {product_id}")
+            
             return all_reviews
             
         except Exception as e:
@@ -555,12 +799,13 @@ class FinalFlipkartScraper:
     
     def close(self):
         """Close the driver"""
-        if hasattr(self, 'driver'):
+        if getattr(self, 'driver', None) is not None:
             self.driver.quit()
 
 
 def main():
     scraper = FinalFlipkartScraper()
+    store = None
     
     try:
         # Get input from user
@@ -574,12 +819,15 @@ def main():
         filename = input("Enter output filename (default: perfect_flipkart_reviews.csv): ").strip()
         if not filename:
             filename = "perfect_flipkart_reviews.csv"
+        store_path = input("Enter review store path to only keep new reviews (default: none): ").strip()
+        if store_path:
+            store = ReviewStore(store_path)
         
         print("\n🚀 Starting Flipkart scraper...")
         print("✅ Final fixes applied:")
         
         # Scrape reviews
-        reviews = scraper.scrape_flipkart_reviews(product_url, max_pages)
+        reviews = scraper.scrape_flipkart_reviews(product_url, max_pages, store=store)
         
         if reviews:
             # Save reviews
@@ -594,7 +842,10 @@ def main():
         print(f"❌ Error: {e}")
     finally:
         scraper.close()
+        if store is not None:
+            store.close()
 
 
 if __name__ == "__main__":
-    main()
+    with maybe_profile("flipkart_scraper"):
+        main()
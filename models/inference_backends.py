@@ -0,0 +1,105 @@
+import os
+import re
+
+import torch
+
+from model_store import load_pretrained
+
+# Detect device
+DEVICE = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+CPU = torch.device("cpu")
+
+BACKENDS = ("torch", "int8", "onnx")
+# Exported ONNX graphs are cached here, one file per model and revision
+ONNX_DIR = "./models/onnx"
+ONNX_OPSET = 14
+
+
+class TorchBackend:
+    """The fp32 PyTorch model, run on DEVICE."""
+
+    name = "torch"
+
+    def __init__(self, model, device=DEVICE):
+        self.device = device
+        self.model = model.to(device)
+        self.model.eval()
+        self.id2label = model.config.id2label
+
+    def logits(self, inputs) -> torch.Tensor:
+        inputs = {k: v.to(self.device) for k, v in inputs.items()}
+        with torch.no_grad():
+            return self.model(**inputs).logits
+
+
+class Int8Backend(TorchBackend):
+    """Dynamic int8 quantization of every Linear layer; CPU only."""
+
+    name = "int8"
+
+    def __init__(self, model):
+        model = model.to(CPU).eval()
+        quantized = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        super().__init__(quantized, device=CPU)
+
+
+class OnnxBackend:
+    """The model exported once to ONNX and run with ONNX Runtime on CPU."""
+
+    name = "onnx"
+
+    def __init__(self, model, onnx_path: str):
+        import onnxruntime as ort
+
+        if not os.path.exists(onnx_path):
+            export_onnx(model, onnx_path)
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(onnx_path, options, providers=["CPUExecutionProvider"])
+        self.id2label = model.config.id2label
+
+    def logits(self, inputs) -> torch.Tensor:
+        feeds = {k: v.cpu().numpy() for k, v in inputs.items()}
+        return torch.from_numpy(self.session.run(["logits"], feeds)[0])
+
+
+def export_onnx(model, onnx_path: str):
+    """Exports a sequence classifier with dynamic batch and sequence axes."""
+    os.makedirs(os.path.dirname(onnx_path) or ".", exist_ok=True)
+    model = model.to(CPU).eval()
+    dummy = {
+        "input_ids": torch.ones((2, 8), dtype=torch.long),
+        "attention_mask": torch.ones((2, 8), dtype=torch.long),
+    }
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in dummy}
+    dynamic_axes["logits"] = {0: "batch"}
+    tmp_path = f"{onnx_path}.tmp"
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            (dummy["input_ids"], dummy["attention_mask"]),
+            tmp_path,
+            input_names=list(dummy),
+            output_names=["logits"],
+            dynamic_axes=dynamic_axes,
+            opset_version=ONNX_OPSET,
+        )
+    os.replace(tmp_path, onnx_path)
+    print(f"Exported ONNX graph to {onnx_path}")
+
+
+def default_onnx_path(model_name: str, revision: str) -> str:
+    slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", f"{model_name}-{revision}").strip("_")
+    return os.path.join(ONNX_DIR, f"{slug}.onnx")
+
+
+def load_backend(model_name: str, revision: str = "main", backend: str = "torch", onnx_path: str = None):
+    """Loads the tokenizer (from the local snapshot) and wraps the classifier in the requested inference backend."""
+    tokenizer, model = load_pretrained(model_name, "classifier", revision)
+    if backend == "torch":
+        return tokenizer, TorchBackend(model)
+    if backend == "int8":
+        return tokenizer, Int8Backend(model)
+    if backend == "onnx":
+        return tokenizer, OnnxBackend(model, onnx_path or default_onnx_path(model_name, revision))
+    raise ValueError(f"Unknown backend {backend!r}; expected one of {BACKENDS}")
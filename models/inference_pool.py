@@ -0,0 +1,161 @@
+import multiprocessing as mp
+import os
+import time
+
+import torch
+from tqdm.auto import tqdm
+
+from model_store import ensure_snapshot
+from sentiment_analyser import (
+    BATCH_SIZE,
+    MAX_LENGTH,
+    MODEL_NAME,
+    TOKEN_BUDGET,
+    classify_batched,
+    effective_max_length,
+    load_classifier,
+)
+
+# Rows handed to a worker per task; each worker length-buckets its own task
+JOB_SIZE = 512
+
+# Per-process model state, filled in by _init_worker
+_worker_state = {}
+
+
+def default_threads_per_worker(workers: int) -> int:
+    return max(1, (os.cpu_count() or 1) // max(1, workers))
+
+
+def _init_worker(model_name: str, revision: str, backend: str, onnx_path: str, threads: int,
+                 batch_size: int, token_budget: int, max_length: int, loaded):
+    """Runs once per worker process: pin the thread share, load and warm the model, then signal `loaded`."""
+    torch.set_num_threads(threads)
+    tokenizer, model = load_classifier(model_name, revision, backend, onnx_path)
+    _worker_state.update(
+        tokenizer=tokenizer,
+        model=model,
+        batch_size=batch_size,
+        token_budget=token_budget,
+        max_length=max_length,
+    )
+    _classify_job(["warm up"])
+    loaded.release()
+
+
+def _classify_job(texts):
+    return classify_batched(
+        texts,
+        _worker_state["tokenizer"],
+        _worker_state["model"],
+        batch_size=_worker_state["batch_size"],
+        token_budget=_worker_state["token_budget"],
+        max_length=_worker_state["max_length"],
+        progress=False,
+    )
+
+
+def _effective_max_length():
+    return effective_max_length(_worker_state["tokenizer"], _worker_state["max_length"])
+
+
+class InferencePool:
+    """
+    A pool of CPU worker processes, each holding its own copy of the classifier.
+
+    Texts are cut into jobs of `job_size` rows and placed on the pool's shared
+    task queue; idle workers pull the next job, and results are merged back in
+    submission order.
+    """
+
+    def __init__(
+        self,
+        model_name: str = MODEL_NAME,
+        workers: int = 2,
+        revision: str = "main",
+        backend: str = "torch",
+        onnx_path: str = None,
+        threads_per_worker: int = None,
+        batch_size: int = BATCH_SIZE,
+        token_budget: int = TOKEN_BUDGET,
+        max_length: int = MAX_LENGTH,
+        job_size: int = JOB_SIZE,
+    ):
+        self.workers = workers
+        self.threads_per_worker = threads_per_worker or default_threads_per_worker(workers)
+        self.job_size = job_size
+        # Snapshot the model here, once; workers then only read it
+        ensure_snapshot(model_name, "classifier", revision)
+        # spawn rather than fork: forking a process that already initialised torch's thread pools can deadlock
+        ctx = mp.get_context("spawn")
+        # Released once by each worker after its initializer has loaded the model
+        self._loaded = ctx.Semaphore(0)
+        self.pool = ctx.Pool(
+            processes=workers,
+            initializer=_init_worker,
+            initargs=(model_name, revision, backend, onnx_path, self.threads_per_worker, batch_size, token_budget,
+                      max_length, self._loaded),
+        )
+
+    def classify(self, texts, progress: bool = True):
+        texts = list(texts)
+        jobs = [texts[i : i + self.job_size] for i in range(0, len(texts), self.job_size)]
+        labels = []
+        results = self.pool.imap(_classify_job, jobs)
+        for job_labels in tqdm(results, total=len(jobs), desc=f"Classifying ({self.workers} workers)",
+                               disable=not progress):
+            labels.extend(job_labels)
+        return labels
+
+    def warm_up(self):
+        """Blocks until every worker has loaded its model and run one warm-up batch."""
+        for _ in range(self.workers):
+            self._loaded.acquire()
+
+    def effective_max_length(self) -> int:
+        """The truncation length the workers actually use (max_length capped by the model)"""
+        return self.pool.apply(_effective_max_length)
+
+    def close(self):
+        self.pool.close()
+        self.pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def benchmark_scaling(texts, max_workers: int, model_name: str = MODEL_NAME, threads_per_worker: int = None, **pool_kwargs):
+    """
+    Labels `texts` with 1..max_workers workers and prints rows/sec and speedup.
+
+    Model loading is excluded from the timings; every run's labels are checked
+    against the single-worker run.
+    """
+    results = []
+    baseline = None
+    for workers in range(1, max_workers + 1):
+        with InferencePool(model_name, workers, threads_per_worker=threads_per_worker, **pool_kwargs) as pool:
+            pool.warm_up()
+            start = time.perf_counter()
+            labels = pool.classify(texts, progress=False)
+            elapsed = time.perf_counter() - start
+        if baseline is None:
+            baseline = labels
+        rate = len(texts) / max(elapsed, 1e-9)
+        results.append({
+            "workers": workers,
+            "threads_per_worker": threads_per_worker or default_threads_per_worker(workers),
+            "seconds": elapsed,
+            "rows_per_sec": rate,
+            "matches_single_worker": labels == baseline,
+        })
+
+    print(f"\n📊 Scaling benchmark on {len(texts)} reviews")
+    print(f"{'workers':>7} {'threads':>7} {'seconds':>9} {'rows/sec':>10} {'speedup':>8} {'same labels':>11}")
+    for r in results:
+        print(f"{r['workers']:>7} {r['threads_per_worker']:>7} {r['seconds']:>9.2f} {r['rows_per_sec']:>10.1f} "
+              f"{r['rows_per_sec'] / results[0]['rows_per_sec']:>7.2f}x {str(r['matches_single_worker']):>11}")
+    return results
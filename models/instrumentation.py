@@ -0,0 +1,210 @@
+"""
+Lightweight timers and counters for the scraping and inference hot paths.
+
+Disabled by default: timer() then returns a shared no-op context manager,
+so the instrumented code costs about one attribute lookup per call. The
+layer switches on through environment variables:
+
+    REVIEW_METRICS=metrics.prom     Prometheus text written at exit (any other suffix: JSON lines; '-': stderr)
+    REVIEW_PROFILE=cprofile         profile main() with cProfile (or 'pyinstrument'),
+    REVIEW_PROFILE_OUT=out.prof     ... written here (default ./profile-<script>.prof / .html)
+    REVIEW_VERBOSE=1                per-review log lines from the scraper
+"""
+import atexit
+import contextlib
+import json
+import math
+import os
+import sys
+import threading
+import time
+
+METRICS_PATH = os.environ.get("REVIEW_METRICS")
+PROFILER = os.environ.get("REVIEW_PROFILE", "").lower()
+VERBOSE = os.environ.get("REVIEW_VERBOSE", "") not in ("", "0", "false")
+PREFIX = "review_pipeline"
+# Histogram bucket upper bounds, in seconds
+BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+
+ENABLED = bool(METRICS_PATH or PROFILER)
+_NULL_TIMER = contextlib.nullcontext()
+
+
+def verbose(message: str):
+    """Per-review detail, printed only with REVIEW_VERBOSE=1"""
+    if VERBOSE:
+        print(message)
+
+
+class _Timer:
+    __slots__ = ("registry", "key", "start")
+
+    def __init__(self, registry, key):
+        self.registry = registry
+        self.key = key
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.registry.observe(self.key, time.perf_counter() - self.start)
+        return False
+
+
+class Registry:
+    """Thread-safe counters and latency histograms keyed by (name, labels)"""
+
+    def __init__(self):
+        self.counters = {}
+        self.timers = {}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def _key(name: str, labels: dict):
+        return (name, tuple(sorted(labels.items())))
+
+    def count(self, name: str, value: float = 1, **labels):
+        key = self._key(name, labels)
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, key, seconds: float):
+        with self.lock:
+            stats = self.timers.get(key)
+            if stats is None:
+                stats = self.timers[key] = {"count": 0, "sum": 0.0, "max": 0.0, "buckets": [0] * len(BUCKETS)}
+            stats["count"] += 1
+            stats["sum"] += seconds
+            stats["max"] = max(stats["max"], seconds)
+            for i, bound in enumerate(BUCKETS):
+                if seconds <= bound:
+                    stats["buckets"][i] += 1
+                    break
+
+    def timer(self, name: str, **labels):
+        return _Timer(self, self._key(name, labels))
+
+    def reset(self):
+        with self.lock:
+            self.counters.clear()
+            self.timers.clear()
+
+    @staticmethod
+    def _labels(labels, extra=()) -> str:
+        pairs = [*labels, *extra]
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+    def prometheus(self) -> str:
+        """Prometheus text exposition format"""
+        lines = []
+        with self.lock:
+            counters = sorted(self.counters.items())
+            timers = sorted((k, dict(v, buckets=list(v["buckets"]))) for k, v in self.timers.items())
+        for name in sorted({name for (name, _), _ in counters}):
+            lines.append(f"# TYPE {PREFIX}_{name}_total counter")
+            for (n, labels), value in counters:
+                if n == name:
+                    lines.append(f"{PREFIX}_{name}_total{self._labels(labels)} {value}")
+        for name in sorted({name for (name, _), _ in timers}):
+            lines.append(f"# TYPE {PREFIX}_{name}_seconds histogram")
+            for (n, labels), stats in timers:
+                if n != name:
+                    continue
+                cumulative = 0
+                for bound, hits in zip(BUCKETS, stats["buckets"]):
+                    cumulative += hits
+                    lines.append(f"{PREFIX}_{name}_seconds_bucket{self._labels(labels, [('le', bound)])} {cumulative}")
+                lines.append(f"{PREFIX}_{name}_seconds_bucket{self._labels(labels, [('le', '+Inf')])} {stats['count']}")
+                lines.append(f"{PREFIX}_{name}_seconds_sum{self._labels(labels)} {stats['sum']:.6f}")
+                lines.append(f"{PREFIX}_{name}_seconds_count{self._labels(labels)} {stats['count']}")
+        return "\n".join(lines) + "\n"
+
+    def json_lines(self) -> str:
+        """One JSON object per counter/timer"""
+        now = time.time()
+        records = []
+        with self.lock:
+            for (name, labels), value in sorted(self.counters.items()):
+                records.append({"ts": now, "type": "counter", "name": name, "labels": dict(labels), "value": value})
+            for (name, labels), stats in sorted(self.timers.items()):
+                records.append({
+                    "ts": now, "type": "timer", "name": name, "labels": dict(labels),
+                    "count": stats["count"], "sum_sec": round(stats["sum"], 6),
+                    "mean_ms": round(stats["sum"] / stats["count"] * 1000, 4), "max_ms": round(stats["max"] * 1000, 4),
+                })
+        return "".join(json.dumps(r) + "\n" for r in records)
+
+    def write(self, path: str):
+        if path == "-":
+            sys.stderr.write(self.prometheus())
+        elif path.endswith(".prom") or path.endswith(".txt"):
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(self.prometheus())
+        else:
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(self.json_lines())
+
+
+METRICS = Registry()
+
+
+def timer(name: str, **labels):
+    """`with timer("model_forward"):` - a no-op unless instrumentation is enabled"""
+    if not ENABLED:
+        return _NULL_TIMER
+    return METRICS.timer(name, **labels)
+
+
+def count(name: str, value: float = 1, **labels):
+    if ENABLED:
+        METRICS.count(name, value, **labels)
+
+
+def percentile(sorted_values, q: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return float("nan")
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(q / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+@contextlib.contextmanager
+def maybe_profile(script: str):
+    """Profiles the block when REVIEW_PROFILE is 'cprofile' or 'pyinstrument'"""
+    if PROFILER not in ("cprofile", "pyinstrument"):
+        yield
+        return
+    if PROFILER == "pyinstrument":
+        from pyinstrument import Profiler
+
+        out = os.environ.get("REVIEW_PROFILE_OUT", f"profile-{script}.html")
+        profiler = Profiler()
+        profiler.start()
+        try:
+            yield
+        finally:
+            profiler.stop()
+            with open(out, "w", encoding="utf-8") as f:
+                f.write(profiler.output_html())
+            print(f"🔬 pyinstrument profile written to {out}", file=sys.stderr)
+    else:
+        import cProfile
+        import pstats
+
+        out = os.environ.get("REVIEW_PROFILE_OUT", f"profile-{script}.prof")
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            profiler.dump_stats(out)
+            pstats.Stats(out, stream=sys.stderr).sort_stats("cumulative").print_stats(15)
+            print(f"🔬 cProfile stats written to {out} (open with snakeviz or pstats)", file=sys.stderr)
+
+
+if METRICS_PATH:
+    atexit.register(lambda: METRICS.write(METRICS_PATH))
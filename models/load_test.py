@@ -0,0 +1,110 @@
+"""
+Load test for the /analyze endpoint: latency percentiles and successful requests/sec.
+
+    python models/api.py &
+    python models/load_test.py --requests 500 --concurrency 16
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+
+import httpx
+import pandas as pd
+
+from instrumentation import percentile
+
+DEFAULT_URL = "http://127.0.0.1:8000"
+SOURCE_CSV = "./reviews_labeled.csv"
+
+
+async def wait_until_ready(client: httpx.AsyncClient, base_url: str, timeout: float = 300):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get(f"{base_url}/readyz")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.5)
+    raise TimeoutError(f"{base_url} did not become ready within {timeout:.0f}s")
+
+
+async def run_load(base_url: str, texts, requests: int, concurrency: int, endpoint: str = "/analyze"):
+    """Sends `requests` POSTs with at most `concurrency` in flight; returns the result summary"""
+    latencies = []
+    statuses = {}
+    queue = asyncio.Queue()
+    for i in range(requests):
+        queue.put_nowait(texts[i % len(texts)])
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=60) as client:
+        await wait_until_ready(client, base_url)
+
+        async def worker():
+            while not queue.empty():
+                text = queue.get_nowait()
+                start = time.perf_counter()
+                try:
+                    response = await client.post(f"{base_url}{endpoint}", json={"text": text})
+                    status = response.status_code
+                except httpx.HTTPError as e:
+                    status = type(e).__name__
+                if status == 200:
+                    latencies.append(time.perf_counter() - start)
+                statuses[status] = statuses.get(status, 0) + 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    ms = [l * 1000 for l in latencies]
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 2),
+        "ok": len(latencies),
+        # Throughput counts only successful answers; 429s and transport errors are in `statuses`
+        "ok_per_sec": round(len(latencies) / max(elapsed, 1e-9), 1),
+        "statuses": {str(k): v for k, v in statuses.items()},
+        "p50_ms": round(percentile(ms, 50), 1),
+        "p90_ms": round(percentile(ms, 90), 1),
+        "p99_ms": round(percentile(ms, 99), 1),
+        "mean_ms": round(statistics.fmean(ms), 1) if ms else None,
+        "max_ms": round(ms[-1], 1) if ms else None,
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Load-test the sentiment API.")
+    parser.add_argument("--url", default=DEFAULT_URL)
+    parser.add_argument("--endpoint", default="/analyze")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--source", default=SOURCE_CSV, help="CSV whose `review` column supplies request bodies")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", default=None, metavar="PATH", help="also write the summary as JSON")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    texts = pd.read_csv(args.source, nrows=5000)["review"].dropna().astype(str).tolist()
+    random.Random(args.seed).shuffle(texts)
+    print(f"🚀 {args.requests} requests to {args.url}{args.endpoint} with concurrency {args.concurrency}")
+    summary = asyncio.run(run_load(args.url, texts, args.requests, args.concurrency, args.endpoint))
+
+    print("\n📊 Load test results:")
+    for key, value in summary.items():
+        print(f"{key}: {value}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+Dynamic micro-batching for online inference.
+
+Concurrent callers await `MicroBatcher.submit(item)`; a background task
+collects items for up to `max_wait_ms` (or until `max_batch` are queued),
+runs them through `process_batch` as one padded forward pass and resolves
+each caller's future with its own result.
+
+    python models/micro_batcher.py --requests 400 --concurrency 32   # batching on vs off
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+
+# Defaults for the API; max_wait trades a little latency for batch size
+MAX_BATCH = 32
+MAX_WAIT_MS = 5.0
+MAX_QUEUE = 256
+
+
+class QueueFull(Exception):
+    """Raised by submit() when max_queue requests are already waiting"""
+
+
+class MicroBatcher:
+    def __init__(self, process_batch, max_batch: int = MAX_BATCH, max_wait_ms: float = MAX_WAIT_MS,
+                 max_queue: int = MAX_QUEUE, executor=None):
+        """
+        `process_batch(items) -> results` runs on `executor` (the default loop
+        executor when None) and must return one result per item, in order.
+        """
+        self.process_batch = process_batch
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.max_queue = max_queue
+        self.executor = executor
+        self.queue = None
+        self.task = None
+        # Counters for /metrics-style reporting
+        self.batches = 0
+        self.items = 0
+        self.rejected = 0
+
+    def start(self):
+        self.queue = asyncio.Queue()
+        self.task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
+    @property
+    def depth(self) -> int:
+        return self.queue.qsize() if self.queue is not None else 0
+
+    async def submit(self, item):
+        """Queues one item and waits for its result; raises QueueFull instead of queueing unboundedly"""
+        if self.queue.qsize() >= self.max_queue:
+            self.rejected += 1
+            raise QueueFull(f"{self.max_queue} requests already queued")
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((item, future))
+        return await future
+
+    async def _collect(self):
+        """Waits for one item, then keeps taking items until the batch is full or max_wait has passed"""
+        batch = [await self.queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        # Anything that arrived while we waited joins for free
+        while len(batch) < self.max_batch and not self.queue.empty():
+            batch.append(self.queue.get_nowait())
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            # Callers that gave up (client disconnect, timeout) are dropped before the forward pass
+            batch = [(item, future) for item, future in batch if not future.done()]
+            if not batch:
+                continue
+            try:
+                results = await loop.run_in_executor(self.executor, self.process_batch, [item for item, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.batches += 1
+            self.items += len(batch)
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "queue_depth": self.depth,
+            "rejected": self.rejected,
+        }
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def benchmark(model_name: str, source: str, requests: int, concurrency: int, backend: str = "torch",
+              max_batch: int = MAX_BATCH, max_wait_ms: float = MAX_WAIT_MS, max_queue: int = MAX_QUEUE):
+    """Starts the API with and without batching and load-tests /analyze against each"""
+    import pandas as pd
+
+    from load_test import run_load
+
+    texts = pd.read_csv(source, nrows=5000)["review"].dropna().astype(str).tolist()
+    api = os.path.join(os.path.dirname(os.path.abspath(__file__)), "api.py")
+    results = []
+    for label, extra in [("unbatched", ["--max-batch", "1"]),
+                         ("batched", ["--max-batch", str(max_batch), "--max-wait-ms", str(max_wait_ms)])]:
+        port = _free_port()
+        server = subprocess.Popen(
+            [sys.executable, api, "--port", str(port), "--model", model_name, "--backend", backend,
+             "--max-queue", str(max_queue), *extra],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            summary = asyncio.run(run_load(f"http://127.0.0.1:{port}", texts, requests, concurrency))
+        finally:
+            server.terminate()
+            server.wait()
+        results.append((label, summary))
+
+    print(f"\n📊 /analyze with {requests} requests, concurrency {concurrency}")
+    print(f"{'mode':>10} {'ok/sec':>9} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'429s':>6} {'errors':>6}")
+    for label, s in results:
+        errors = s["requests"] - s["ok"] - s["statuses"].get("429", 0)
+        print(f"{label:>10} {s['ok_per_sec']:>9.1f} {s['p50_ms']:>8.1f} {s['p90_ms']:>8.1f} "
+              f"{s['p99_ms']:>8.1f} {s['statuses'].get('429', 0):>6} {errors:>6}")
+    return results
+
+
+def parse_args():
+    from sentiment_analyser import MODEL_NAME
+
+    parser = argparse.ArgumentParser(description="Benchmark /analyze with and without micro-batching.")
+    parser.add_argument("--model", default=MODEL_NAME)
+    parser.add_argument("--backend", default="torch", choices=["torch", "int8", "onnx"])
+    parser.add_argument("--source", default="./reviews_labeled.csv")
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--max-batch", type=int, default=MAX_BATCH)
+    parser.add_argument("--max-wait-ms", type=float, default=MAX_WAIT_MS)
+    parser.add_argument("--max-queue", type=int, default=MAX_QUEUE)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    benchmark(args.model, args.source, args.requests, args.concurrency, args.backend,
+              args.max_batch, args.max_wait_ms, args.max_queue)
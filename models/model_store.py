@@ -0,0 +1,291 @@
+"""
+Local, versioned snapshots of the Hugging Face models, for fast offline cold starts.
+
+`from_pretrained("cardiffnlp/...")` resolves the model on the hub on every
+run. A snapshot is written once: weights as safetensors (memory-mapped on
+load), the tokenizer, the config and a manifest recording where it came
+from. Later loads read that directory with local_files_only=True and never
+touch the network.
+
+    python models/model_store.py snapshot cardiffnlp/twitter-roberta-base-sentiment --kind classifier
+    python models/model_store.py snapshot facebook/bart-large-cnn --kind seq2seq
+    python models/model_store.py list
+    python models/model_store.py bench cardiffnlp/twitter-roberta-base-sentiment --kind classifier
+
+Layout: <root>/<model slug>/<revision>-<version>/ plus a CURRENT file naming
+the active version. transformers is only imported when a model is loaded.
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+
+SNAPSHOT_DIR = os.environ.get("MODEL_SNAPSHOT_DIR", "./models/snapshots")
+# Auto class used to load each kind of model
+KINDS = {
+    "classifier": "AutoModelForSequenceClassification",
+    "seq2seq": "AutoModelForSeq2SeqLM",
+}
+# Module whose import time is measured for each kind by the startup benchmark
+ENTRY_MODULES = {"classifier": "sentiment_analyser", "seq2seq": "summarizer"}
+MANIFEST = "manifest.json"
+
+
+def _slug(text: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", text).strip("_")
+
+
+def model_dir(model_name: str, root: str = SNAPSHOT_DIR) -> str:
+    return os.path.join(root, _slug(model_name))
+
+
+def _auto_class(kind: str):
+    import transformers
+
+    if kind not in KINDS:
+        raise ValueError(f"Unknown model kind {kind!r}; expected one of {tuple(KINDS)}")
+    return getattr(transformers, KINDS[kind])
+
+
+def _file_digest(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def list_snapshots(model_name: str = None, root: str = SNAPSHOT_DIR):
+    """Manifests of stored snapshots (all models, or one), oldest first"""
+    models = [model_dir(model_name, root)] if model_name else (
+        [os.path.join(root, d) for d in sorted(os.listdir(root))] if os.path.isdir(root) else []
+    )
+    manifests = []
+    for directory in models:
+        if not os.path.isdir(directory):
+            continue
+        for version in os.listdir(directory):
+            path = os.path.join(directory, version, MANIFEST)
+            if os.path.exists(path):
+                with open(path, "r", encoding="utf-8") as f:
+                    manifests.append({**json.load(f), "path": os.path.dirname(path)})
+    return sorted(manifests, key=lambda m: m["created_at"])
+
+
+def resolve_snapshot(model_name: str, revision: str = "main", version: str = None, root: str = SNAPSHOT_DIR):
+    """
+    Directory of the snapshot to load, or None.
+
+    An explicit version wins; otherwise the CURRENT snapshot if it was taken
+    from `revision`, else the newest snapshot of that revision.
+    """
+    directory = model_dir(model_name, root)
+    if version is not None:
+        path = os.path.join(directory, version)
+        return path if os.path.exists(os.path.join(path, MANIFEST)) else None
+    candidates = [m for m in list_snapshots(model_name, root) if m["revision"] == revision]
+    if not candidates:
+        return None
+    current_file = os.path.join(directory, "CURRENT")
+    if os.path.exists(current_file):
+        with open(current_file, "r", encoding="utf-8") as f:
+            current = f.read().strip()
+        for manifest in candidates:
+            if manifest["version"] == current:
+                return manifest["path"]
+    return candidates[-1]["path"]
+
+
+def create_snapshot(model_name: str, kind: str, revision: str = "main", root: str = SNAPSHOT_DIR) -> str:
+    """
+    Saves model + tokenizer as a new version and makes it CURRENT; returns its directory.
+
+    The version is the hub commit the weights were resolved to (or, for local
+    checkpoints, a digest of the weights), so re-snapshotting an unchanged
+    model reuses the existing directory.
+    """
+    from transformers import AutoTokenizer
+
+    start = time.perf_counter()
+    tokenizer = AutoTokenizer.from_pretrained(model_name, revision=revision)
+    model = _auto_class(kind).from_pretrained(model_name, revision=revision)
+
+    directory = model_dir(model_name, root)
+    tmp_dir = os.path.join(directory, f".tmp-{os.getpid()}")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    model.save_pretrained(tmp_dir, safe_serialization=True)
+    tokenizer.save_pretrained(tmp_dir)
+    weights = {name: _file_digest(os.path.join(tmp_dir, name))
+               for name in sorted(os.listdir(tmp_dir)) if name.endswith(".safetensors")}
+    commit = getattr(model.config, "_commit_hash", None)
+    version = f"{_slug(revision)}-{(commit or hashlib.sha256(''.join(weights.values()).encode()).hexdigest())[:12]}"
+
+    path = os.path.join(directory, version)
+    manifest = {
+        "model": model_name,
+        "kind": kind,
+        "revision": revision,
+        "commit": commit,
+        "version": version,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "dtype": str(next(model.parameters()).dtype),
+        "parameters": sum(p.numel() for p in model.parameters()),
+        "files": weights,
+    }
+    if os.path.exists(os.path.join(path, MANIFEST)):
+        shutil.rmtree(tmp_dir)
+        print(f"✅ {model_name}@{revision} is already stored as {version}")
+    else:
+        with open(os.path.join(tmp_dir, MANIFEST), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        try:
+            os.replace(tmp_dir, path)
+            print(f"✅ Snapshot of {model_name}@{revision} saved to {path} in {time.perf_counter() - start:.1f}s")
+        except OSError:
+            # Another process stored the same version first; theirs is identical
+            if not os.path.exists(os.path.join(path, MANIFEST)):
+                raise
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    current_tmp = os.path.join(directory, f"CURRENT.tmp-{os.getpid()}")
+    with open(current_tmp, "w", encoding="utf-8") as f:
+        f.write(version)
+    os.replace(current_tmp, os.path.join(directory, "CURRENT"))
+    return path
+
+
+def ensure_snapshot(model_name: str, kind: str, revision: str = "main", version: str = None,
+                    root: str = SNAPSHOT_DIR) -> str:
+    """
+    Directory load_pretrained reads model_name from: a local directory as is,
+    else its snapshot, created first if there is none. Call it once before
+    starting worker processes so they do not all build the snapshot at once.
+    """
+    if os.path.isdir(model_name):
+        return model_name
+    path = resolve_snapshot(model_name, revision, version, root)
+    if path is None:
+        if version is not None:
+            raise FileNotFoundError(f"No snapshot {version} of {model_name} under {model_dir(model_name, root)}")
+        path = create_snapshot(model_name, kind, revision, root)
+    return path
+
+
+def load_pretrained(model_name: str, kind: str, revision: str = "main", version: str = None,
+                    root: str = SNAPSHOT_DIR, use_snapshot: bool = True):
+    """
+    (tokenizer, model) for a hub name or a local checkpoint directory.
+
+    Hub models are loaded from their local snapshot, which is created on
+    first use; local directories are read in place. Either way the load is
+    local_files_only, and safetensors weights are memory-mapped rather than
+    copied through a pickle stream. use_snapshot=False is the plain hub load.
+    """
+    from transformers import AutoTokenizer
+
+    auto_class = _auto_class(kind)
+    if not use_snapshot:
+        return (AutoTokenizer.from_pretrained(model_name, revision=revision),
+                auto_class.from_pretrained(model_name, revision=revision))
+    path = ensure_snapshot(model_name, kind, revision, version, root)
+    return (AutoTokenizer.from_pretrained(path, local_files_only=True),
+            auto_class.from_pretrained(path, local_files_only=True))
+
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+imported = time.perf_counter()
+from model_store import load_pretrained
+tokenizer, model = load_pretrained({model!r}, {kind!r}, {revision!r}, use_snapshot={use_snapshot})
+model.eval()
+loaded = time.perf_counter()
+{first_call}
+done = time.perf_counter()
+print(json.dumps({{"import_s": imported - start, "load_s": loaded - imported, "first_inference_s": done - loaded}}))
+"""
+
+FIRST_CALLS = {
+    "classifier": "import torch\nwith torch.no_grad(): model(**tokenizer(['Great phone, battery lasts all day.'], return_tensors='pt'))",
+    "seq2seq": "import torch\nwith torch.no_grad(): model.generate(**tokenizer(['Great phone, battery lasts all day.'], return_tensors='pt'), max_length=20)",
+}
+
+
+def startup_benchmark(model_name: str, kind: str, revision: str = "main", repeat: int = 3, root: str = SNAPSHOT_DIR):
+    """
+    Import, load and first-inference time in fresh interpreters, hub load vs snapshot.
+
+    Each measurement is a new `python -c` process, so nothing is warm except
+    the OS page cache (the first run of each mode is discarded for that).
+    """
+    models_dir = os.path.dirname(os.path.abspath(__file__))
+    results = {}
+    modes = [("hub", False), ("snapshot", True)]
+    if os.path.isdir(model_name):
+        modes = [("local dir", True)]
+    else:
+        # Snapshot outside the timed runs
+        if resolve_snapshot(model_name, revision, root=root) is None:
+            create_snapshot(model_name, kind, revision, root)
+    for label, use_snapshot in modes:
+        code = PROBE.format(module=ENTRY_MODULES[kind], model=model_name, kind=kind, revision=revision,
+                            use_snapshot=use_snapshot, first_call=FIRST_CALLS[kind])
+        runs = []
+        for _ in range(repeat + 1):
+            output = subprocess.run([sys.executable, "-c", code], cwd=os.getcwd(), capture_output=True, text=True,
+                                    env={**os.environ, "PYTHONPATH": models_dir, "MODEL_SNAPSHOT_DIR": root})
+            if output.returncode != 0:
+                raise RuntimeError(output.stderr.strip().splitlines()[-1])
+            runs.append(json.loads(output.stdout.strip().splitlines()[-1]))
+        runs = runs[1:]
+        results[label] = {key: statistics.median(r[key] for r in runs) for key in runs[0]}
+
+    print(f"\n📊 Cold start of {model_name} ({kind}), median of {repeat} fresh processes")
+    print(f"{'mode':>10} {'import s':>9} {'load s':>8} {'first call s':>13} {'total s':>8}")
+    for label, r in results.items():
+        print(f"{label:>10} {r['import_s']:>9.2f} {r['load_s']:>8.2f} {r['first_inference_s']:>13.3f} "
+              f"{sum(r.values()):>8.2f}")
+    return results
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Manage local model snapshots.")
+    parser.add_argument("--root", default=SNAPSHOT_DIR)
+    sub = parser.add_subparsers(dest="command", required=True)
+    snap = sub.add_parser("snapshot", help="download/convert a model into a new local version")
+    snap.add_argument("model")
+    snap.add_argument("--kind", choices=list(KINDS), required=True)
+    snap.add_argument("--revision", default="main")
+    sub.add_parser("list", help="show stored snapshots")
+    bench = sub.add_parser("bench", help="cold-start timings, hub load vs snapshot")
+    bench.add_argument("model")
+    bench.add_argument("--kind", choices=list(KINDS), required=True)
+    bench.add_argument("--revision", default="main")
+    bench.add_argument("--repeat", type=int, default=3)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.command == "snapshot":
+        create_snapshot(args.model, args.kind, args.revision, args.root)
+    elif args.command == "list":
+        snapshots = list_snapshots(root=args.root)
+        if not snapshots:
+            print(f"No snapshots under {args.root}")
+        for m in snapshots:
+            print(f"{m['model']:<45} {m['version']:<24} {m['kind']:<10} {m['dtype']:<14} "
+                  f"{m['parameters'] / 1e6:>8.1f}M  {m['created_at']}  {m['path']}")
+    elif args.command == "bench":
+        startup_benchmark(args.model, args.kind, args.revision, args.repeat, args.root)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+"""
+Near-duplicate detection for review texts with MinHash signatures and LSH banding.
+
+create_review_hash only catches exact repeats; reviews that differ by
+whitespace, punctuation, emoji or a leftover reviewer name hash differently
+and get labelled and summarized twice. Here every text is normalized,
+split into overlapping character shingles, and reduced to a MinHash
+signature whose agreement with another signature estimates the Jaccard
+similarity of their shingle sets. Signatures are cut into bands; two texts
+become candidates when any band matches exactly, and a candidate counts
+as a duplicate when its estimated similarity reaches the threshold.
+
+    python models/near_dedup.py reviews_labeled.csv                     # report only
+    python models/near_dedup.py reviews_labeled.csv --output deduped.csv --threshold 0.9
+
+The index is incremental (insert/query one text at a time), so the scraper
+can use it inline; find_near_duplicates runs the same index over a whole
+column with signatures computed in vectorized batches.
+"""
+import argparse
+import re
+import time
+
+import numpy as np
+
+from review_extractor import _NON_WORD, _WHITESPACE
+
+THRESHOLD = 0.85
+NUM_PERM = 128
+SHINGLE_SIZE = 5
+# Shorter normalized texts ("nice product") are left to exact matching: two
+# buyers writing the same two words are not a re-scraped review
+MIN_CHARS = 30
+# Shingles hashed per vectorized step (num_perm x this many uint64s in memory)
+SHINGLE_BATCH = 1 << 16
+
+_MIX = np.uint64(0x9E3779B97F4A7C15)
+# Reviewer-name and age tails the scraper leaves behind, matched after punctuation and
+# emoji are gone (so "... awesome!! 👍" and "... awesome" lose the same tail). Only
+# name-shaped tails: generic lowercase words are review content.
+NAME_TAIL_PATTERNS = [re.compile(p) for p in (
+    r'\s+\d+\s*months?\s*ago$',
+    r'\s+(?:Flipkart\s+)?Customer$',
+    r'\s+[A-Z][a-z]+(?:\s+[A-Z][a-z]+){1,2}$',
+)]
+
+
+def normalize(text) -> str:
+    """Lowercase text without trailing reviewer names, punctuation, emoji or extra whitespace"""
+    text = _WHITESPACE.sub(" ", _NON_WORD.sub(" ", str(text))).strip()
+    for pattern in NAME_TAIL_PATTERNS:
+        text = pattern.sub("", text)
+    return text.lower()
+
+
+def lsh_params(threshold: float, num_perm: int):
+    """(bands, rows) with bands * rows <= num_perm whose S-curve midpoint (1/b)^(1/r) is closest to threshold"""
+    best = None
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        error = abs((1 / bands) ** (1 / rows) - threshold)
+        if best is None or error < best[0]:
+            best = (error, bands, rows)
+    return best[1], best[2]
+
+
+class NearDuplicateIndex:
+    """
+    Incremental MinHash-LSH index over review texts.
+
+    Keys are whatever the caller uses to identify a review (a row number, a
+    review hash). Texts shorter than min_chars after normalization are never
+    indexed and never reported as duplicates.
+    """
+
+    def __init__(
+        self,
+        threshold: float = THRESHOLD,
+        num_perm: int = NUM_PERM,
+        shingle_size: int = SHINGLE_SIZE,
+        min_chars: int = MIN_CHARS,
+        seed: int = 0,
+    ):
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        # A text shorter than one shingle has no shingles to hash
+        self.min_chars = max(min_chars, shingle_size)
+        self.bands, self.rows = lsh_params(threshold, num_perm)
+        rng = np.random.default_rng(seed)
+        # Multiply-shift hash family: h(x) = (a * x + b) >> 32 over uint64, a odd
+        self._a = rng.integers(1, 2**63, size=(num_perm, 1), dtype=np.uint64) | np.uint64(1)
+        self._b = rng.integers(0, 2**63, size=(num_perm, 1), dtype=np.uint64)
+        self._powers = np.uint64(257) ** np.arange(shingle_size, dtype=np.uint64)
+        self._buckets = [{} for _ in range(self.bands)]
+        self._signatures = {}
+
+    def __len__(self):
+        return len(self._signatures)
+
+    def _shingle_hashes(self, data: np.ndarray) -> np.ndarray:
+        """uint32 hash of every shingle_size-byte window of a uint8 array"""
+        windows = np.lib.stride_tricks.sliding_window_view(data, self.shingle_size)
+        hashed = windows.astype(np.uint64) @ self._powers
+        return ((hashed * _MIX) >> np.uint64(32)).astype(np.uint64)
+
+    def signatures(self, texts) -> np.ndarray:
+        """
+        MinHash signatures, one uint32 row per text (normalized here).
+
+        Texts are processed in batches of about SHINGLE_BATCH shingles: all
+        shingles of a batch go through the num_perm hash functions as one
+        matrix product, and np.minimum.reduceat takes each text's minimum.
+        Rows for texts below min_chars are zeros.
+        """
+        normalized = [normalize(t) for t in texts]
+        out = np.zeros((len(normalized), self.num_perm), dtype=np.uint32)
+        batch, batch_rows, batch_size = [], [], 0
+        for i, text in enumerate(normalized):
+            if len(text) < self.min_chars:
+                continue
+            hashes = self._shingle_hashes(np.frombuffer(text.encode("utf-8"), dtype=np.uint8))
+            batch.append(hashes)
+            batch_rows.append(i)
+            batch_size += len(hashes)
+            if batch_size >= SHINGLE_BATCH:
+                out[batch_rows] = self._min_hash(batch)
+                batch, batch_rows, batch_size = [], [], 0
+        if batch:
+            out[batch_rows] = self._min_hash(batch)
+        return out
+
+    def _min_hash(self, shingle_arrays) -> np.ndarray:
+        starts = np.cumsum([0] + [len(h) for h in shingle_arrays[:-1]])
+        permuted = (self._a * np.concatenate(shingle_arrays) + self._b) >> np.uint64(32)
+        return np.minimum.reduceat(permuted, starts, axis=1).T.astype(np.uint32)
+
+    def signature(self, text):
+        """Signature of one text, or None if it is too short to index"""
+        if len(normalize(text)) < self.min_chars:
+            return None
+        return self.signatures([text])[0]
+
+    def _band_keys(self, signature: np.ndarray):
+        return [signature[b * self.rows : (b + 1) * self.rows].tobytes() for b in range(self.bands)]
+
+    def query(self, text=None, signature=None):
+        """[(key, estimated similarity)] of indexed texts at or above the threshold, most similar first"""
+        if signature is None:
+            signature = self.signature(text)
+        if signature is None or not signature.any():
+            return []
+        candidates = set()
+        for bucket, band_key in zip(self._buckets, self._band_keys(signature)):
+            candidates.update(bucket.get(band_key, ()))
+        matches = []
+        for key in candidates:
+            similarity = float(np.mean(self._signatures[key] == signature))
+            if similarity >= self.threshold:
+                matches.append((key, similarity))
+        return sorted(matches, key=lambda m: -m[1])
+
+    def insert(self, key, text=None, signature=None):
+        """Indexes a text (or a precomputed signature) under key; too-short texts are ignored"""
+        if signature is None:
+            signature = self.signature(text)
+        if signature is None or not signature.any():
+            return
+        self._signatures[key] = signature
+        for bucket, band_key in zip(self._buckets, self._band_keys(signature)):
+            bucket.setdefault(band_key, []).append(key)
+
+    def insert_many(self, keys, texts):
+        """Indexes many texts at once (e.g. the reviews already stored for a product)"""
+        for key, signature in zip(keys, self.signatures(texts)):
+            self.insert(key, signature=signature)
+
+    def add(self, key, text=None, signature=None):
+        """
+        Inline dedup: returns (key, similarity) of the closest indexed near
+        duplicate, or None after indexing the text as new.
+        """
+        if signature is None:
+            signature = self.signature(text)
+        if signature is None:
+            return None
+        matches = self.query(signature=signature)
+        if matches:
+            return matches[0]
+        self.insert(key, signature=signature)
+        return None
+
+
+def find_near_duplicates(texts, threshold: float = THRESHOLD, batch_size: int = 5000, **index_kwargs):
+    """
+    For each text, the position of the earlier text it nearly duplicates (or -1)
+    and the estimated similarity. The first occurrence of every group is kept.
+    """
+    texts = list(texts)
+    index = NearDuplicateIndex(threshold=threshold, **index_kwargs)
+    duplicate_of = np.full(len(texts), -1, dtype=np.int64)
+    similarity = np.zeros(len(texts))
+    for start in range(0, len(texts), batch_size):
+        signatures = index.signatures(texts[start : start + batch_size])
+        for offset, signature in enumerate(signatures):
+            if not signature.any():
+                continue
+            match = index.add(start + offset, signature=signature)
+            if match is not None:
+                duplicate_of[start + offset], similarity[start + offset] = match
+    return duplicate_of, similarity
+
+
+def dedup_file(input_path: str, output_path: str = None, column: str = "review", threshold: float = THRESHOLD,
+               pairs_path: str = None, **index_kwargs) -> int:
+    """Drops near-duplicate rows from a CSV/Parquet/Arrow file; returns the number removed"""
+    from dataset_io import read_dataset, write_dataset
+
+    df = read_dataset(input_path)
+    start = time.perf_counter()
+    duplicate_of, similarity = find_near_duplicates(df[column].astype(str).tolist(), threshold, **index_kwargs)
+    elapsed = time.perf_counter() - start
+
+    removed = duplicate_of >= 0
+    exact = sum(
+        normalize(df[column].iat[i]) == normalize(df[column].iat[duplicate_of[i]]) for i in np.flatnonzero(removed)
+    )
+    print(f"🔁 {input_path}: {removed.sum()} of {len(df)} rows are near duplicates "
+          f"({removed.mean():.2%}; {exact} identical after normalization) at threshold {threshold}")
+    print(f"⏱️ {elapsed:.1f}s ({len(df) / max(elapsed, 1e-9):.0f} rows/sec)")
+    for i in np.flatnonzero(removed)[:5]:
+        print(f"   {similarity[i]:.2f}  {df[column].iat[i][:70]!r}\n         ~ {df[column].iat[duplicate_of[i]][:70]!r}")
+
+    if pairs_path:
+        rows = np.flatnonzero(removed)
+        pairs = df.iloc[rows][[column]].assign(row=rows, duplicate_of=duplicate_of[rows], similarity=similarity[rows],
+                                               original=df[column].iloc[duplicate_of[rows]].tolist())
+        pairs[["row", "duplicate_of", "similarity", column, "original"]].to_csv(pairs_path, index=False)
+        print(f"✅ Saved {len(pairs)} duplicate pairs to {pairs_path}")
+    if output_path:
+        write_dataset(df[~removed], output_path)
+        print(f"✅ Saved {int((~removed).sum())} rows to {output_path}")
+    return int(removed.sum())
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Find and drop near-duplicate reviews.")
+    parser.add_argument("input", nargs="?", default="./reviews_labeled.csv")
+    parser.add_argument("--output", default=None, help="write the rows that are kept here")
+    parser.add_argument("--pairs", default=None, metavar="CSV", help="write each dropped row with its original")
+    parser.add_argument("--column", default="review")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD, help="estimated Jaccard similarity")
+    parser.add_argument("--num-perm", type=int, default=NUM_PERM)
+    parser.add_argument("--shingle-size", type=int, default=SHINGLE_SIZE)
+    parser.add_argument("--min-chars", type=int, default=MIN_CHARS)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    dedup_file(args.input, args.output, args.column, args.threshold, args.pairs,
+               num_perm=args.num_perm, shingle_size=args.shingle_size, min_chars=args.min_chars)
+
+
+if __name__ == "__main__":
+    main()
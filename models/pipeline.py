@@ -0,0 +1,188 @@
+"""
+Incremental scrape -> label -> summarize pipeline over one review store.
+
+    python models/pipeline.py --urls products.txt             # daily refresh
+    python models/pipeline.py --skip-scrape --threshold 0.1   # relabel/resummarize only
+
+Each stage only touches the delta since the previous run: the crawl inserts
+reviews whose hash is not stored yet, labelling picks up rows without a
+sentiment, and a product is re-summarized only when its sentiment mix has
+moved by more than --threshold since its last summary.
+"""
+import argparse
+import json
+import time
+import uuid
+
+from instrumentation import maybe_profile
+from review_store import DEFAULT_STORE, ReviewStore, sentiment_mix
+from sentiment_analyser import BATCH_SIZE, CHUNK_SIZE, MAX_LENGTH, TOKEN_BUDGET
+from sentiment_analyser import MODEL_NAME as SENTIMENT_MODEL
+from summarizer import EXTRACTIVE_BUDGET, MAP_BATCH_SIZE
+from summarizer import MODEL_NAME as SUMMARY_MODEL
+
+# Largest change in any sentiment class's share that still reuses the old summary
+MIX_THRESHOLD = 0.05
+
+
+def mix_shift(old: dict, new: dict) -> float:
+    """Largest absolute change in any class's share of reviews"""
+    return max(abs(old.get(s, 0.0) - new.get(s, 0.0)) for s in (-1, 0, 1))
+
+
+class Pipeline:
+    """Runs the three stages against a ReviewStore and records per-stage timings and row counts."""
+
+    def __init__(self, store: ReviewStore, args):
+        self.store = store
+        self.args = args
+        self.run_id = time.strftime("%Y%m%dT%H%M%S-") + uuid.uuid4().hex[:6]
+        self.report = []
+
+    def _record(self, stage: str, seconds: float, rows_in: int, rows_out: int, **extra):
+        self.store.record_stage(self.run_id, stage, seconds, rows_in, rows_out)
+        self.report.append({"stage": stage, "seconds": round(seconds, 2), "rows_in": rows_in, "rows_out": rows_out, **extra})
+        print(f"⏱️ {stage}: {rows_in} in, {rows_out} out in {seconds:.1f}s")
+
+    def scrape(self, product_urls):
+        """Crawls every product; only reviews not already stored are inserted"""
+        from crawl_scheduler import CrawlScheduler
+
+        start = time.perf_counter()
+        before = self.store.conn.execute("SELECT COUNT(*) FROM reviews").fetchone()[0]
+        scheduler = CrawlScheduler(
+            concurrency=self.args.concurrency,
+            rate_per_host=self.args.rate,
+            max_pages=self.args.max_pages,
+            store=self.store,
+        )
+        scheduler.crawl(product_urls)
+        after = self.store.conn.execute("SELECT COUNT(*) FROM reviews").fetchone()[0]
+        self._record("scrape", time.perf_counter() - start, len(product_urls), after - before,
+                     pages_fetched=scheduler.metrics.pages_fetched)
+
+    def label(self):
+        """Classifies the reviews that have no sentiment yet"""
+        from sentiment_analyser import classify_batched, label_store, load_classifier
+
+        start = time.perf_counter()
+        pending = self.store.conn.execute(
+            "SELECT COUNT(*) FROM reviews WHERE sentiment IS NULL AND review_text IS NOT NULL"
+        ).fetchone()[0]
+        labelled = 0
+        if pending:
+            tokenizer, model = load_classifier(self.args.sentiment_model, backend=self.args.backend)
+
+            def classify(texts):
+                return classify_batched(
+                    texts, tokenizer, model,
+                    batch_size=self.args.batch_size,
+                    token_budget=self.args.token_budget,
+                    max_length=self.args.max_length,
+                    progress=False,
+                )
+
+            labelled = label_store(self.store, classify, self.args.chunk_size)
+        self._record("label", time.perf_counter() - start, pending, labelled)
+
+    def summarize(self):
+        """
+        Re-summarizes products with labelled reviews no summary has covered yet.
+
+        Pending products come from the store's summarized_at bookkeeping, as
+        for `summarizer.py --store`, so the two can be run interchangeably. A
+        product is skipped when its content hash is unchanged, or when its
+        sentiment mix moved by no more than the threshold; the summarizer is
+        only loaded if at least one product needs a new summary.
+        """
+        start = time.perf_counter()
+        products = self.store.products_pending_summary()
+
+        stale = []
+        unchanged = 0
+        for product_id in products:
+            content_hash = self.store.content_hash(product_id)
+            counts = self.store.sentiment_counts(product_id)
+            mix = sentiment_mix(counts)
+            previous = self.store.summary_state(product_id)
+            if previous is not None and (
+                previous[0] == content_hash or mix_shift(previous[1], mix) <= self.args.threshold
+            ):
+                unchanged += 1
+                self.store.mark_summarized(product_id)
+                continue
+            stale.append((product_id, mix))
+
+        if stale:
+            from summarizer import load_summarizer, summarize_frame
+
+            tokenizer, model, chunk_tokens = load_summarizer(self.args.summary_model)
+            for product_id, mix in stale:
+                print(f"\n📦 Summarizing {product_id} (mix {json.dumps({k: round(v, 3) for k, v in mix.items()})})")
+                summaries = summarize_frame(
+                    self.store.labelled_reviews(product_id), tokenizer, model, chunk_tokens,
+                    self.args.map_batch_size, self.args.extractive_budget,
+                )
+                self.store.save_summaries(product_id, summaries)
+
+        self._record("summarize", time.perf_counter() - start, len(products), len(stale), skipped=unchanged)
+
+    def run(self, product_urls=None):
+        start = time.perf_counter()
+        if product_urls:
+            self.scrape(product_urls)
+        self.label()
+        self.summarize()
+        total = time.perf_counter() - start
+        print(f"\n📊 Pipeline run {self.run_id} finished in {total:.1f}s")
+        print(f"{'stage':>10} {'seconds':>9} {'rows in':>8} {'rows out':>9}")
+        for stage in self.report:
+            print(f"{stage['stage']:>10} {stage['seconds']:>9.2f} {stage['rows_in']:>8} {stage['rows_out']:>9}")
+        return {"run_id": self.run_id, "seconds": round(total, 2), "stages": self.report}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Incremental scrape -> label -> summarize pipeline.")
+    parser.add_argument("--store", default=DEFAULT_STORE, help="SQLite review store")
+    parser.add_argument("--urls", default=None, help="text file with one product URL per line")
+    parser.add_argument("--skip-scrape", action="store_true", help="only label and summarize what is stored")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rate", type=float, default=1.0, help="requests per second per host")
+    parser.add_argument("--max-pages", type=int, default=5)
+    parser.add_argument("--sentiment-model", default=SENTIMENT_MODEL)
+    parser.add_argument("--backend", default="torch", choices=["torch", "int8", "onnx"])
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--token-budget", type=int, default=TOKEN_BUDGET)
+    parser.add_argument("--max-length", type=int, default=MAX_LENGTH)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--summary-model", default=SUMMARY_MODEL)
+    parser.add_argument("--map-batch-size", type=int, default=MAP_BATCH_SIZE)
+    parser.add_argument("--extractive-budget", type=int, default=EXTRACTIVE_BUDGET)
+    parser.add_argument("--threshold", type=float, default=MIX_THRESHOLD,
+                        help="re-summarize when any sentiment share moves by more than this")
+    parser.add_argument("--report", default=None, metavar="JSON", help="also write the run report here")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    product_urls = None
+    if args.urls and not args.skip_scrape:
+        from crawl_scheduler import read_product_urls
+
+        product_urls = read_product_urls(args.urls)
+
+    store = ReviewStore(args.store)
+    try:
+        report = Pipeline(store, args).run(product_urls)
+    finally:
+        store.close()
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Saved run report to {args.report}")
+
+
+if __name__ == "__main__":
+    with maybe_profile("pipeline"):
+        main()
@@ -0,0 +1,142 @@
+import sqlite3
+import time
+
+from review_hash import create_review_hash
+
+# Keep at most this many predictions on disk; least recently used go first
+MAX_ENTRIES = 1_000_000
+# SQLite caps the number of bound parameters per statement
+_QUERY_CHUNK = 900
+
+
+def model_identity(model_name: str, backend: str = "torch", max_length: int = None) -> str:
+    """Value of the `model` column: labels also depend on the inference backend and truncation length"""
+    return f"{model_name}|{backend}|max_length={max_length}"
+
+
+class PredictionCache:
+    """
+    Persistent sentiment predictions keyed by normalized review text, model and revision.
+
+    The model part of the key is model_identity(): the name plus the backend
+    and effective max_length, so int8 or shorter-truncation runs never share
+    labels with fp32 ones.
+
+    Keys use the scraper's `create_review_hash` normalization, so a review the
+    scraper treats as a duplicate is also a cache hit here. Every hit refreshes
+    the entry's `last_used` stamp, and `evict` trims the table back to
+    `max_entries` by dropping the stalest rows.
+    """
+
+    def __init__(self, path: str, model_name: str, revision: str = "main", max_entries: int = MAX_ENTRIES,
+                 backend: str = "torch", max_length: int = None):
+        self.path = path
+        self.model_name = model_identity(model_name, backend, max_length)
+        self.revision = revision
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS predictions (
+                model TEXT NOT NULL,
+                revision TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                label INTEGER NOT NULL,
+                last_used INTEGER NOT NULL,
+                PRIMARY KEY (model, revision, text_hash)
+            ) WITHOUT ROWID
+        """)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_predictions_last_used ON predictions (last_used)")
+        self.conn.commit()
+
+    @staticmethod
+    def key(text: str) -> str:
+        return create_review_hash(text)
+
+    def get_many(self, keys):
+        """Returns {key: label} for the keys that are cached, and marks them as recently used."""
+        found = {}
+        unique = list(dict.fromkeys(keys))
+        for i in range(0, len(unique), _QUERY_CHUNK):
+            part = unique[i : i + _QUERY_CHUNK]
+            placeholders = ",".join("?" * len(part))
+            rows = self.conn.execute(
+                f"SELECT text_hash, label FROM predictions "
+                f"WHERE model = ? AND revision = ? AND text_hash IN ({placeholders})",
+                (self.model_name, self.revision, *part),
+            ).fetchall()
+            found.update(rows)
+
+        if found:
+            now = time.time_ns()
+            self.conn.executemany(
+                "UPDATE predictions SET last_used = ? WHERE model = ? AND revision = ? AND text_hash = ?",
+                [(now, self.model_name, self.revision, k) for k in found],
+            )
+            self.conn.commit()
+        return found
+
+    def put_many(self, items):
+        """Stores (key, label) pairs, then evicts if the cache has grown past max_entries."""
+        now = time.time_ns()
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO predictions (model, revision, text_hash, label, last_used) "
+            "VALUES (?, ?, ?, ?, ?)",
+            [(self.model_name, self.revision, k, int(label), now) for k, label in items],
+        )
+        self.conn.commit()
+        self.evict()
+
+    def evict(self):
+        count = self.conn.execute("SELECT COUNT(*) FROM predictions").fetchone()[0]
+        excess = count - self.max_entries
+        if excess > 0:
+            self.conn.execute(
+                "DELETE FROM predictions WHERE (model, revision, text_hash) IN ("
+                "SELECT model, revision, text_hash FROM predictions ORDER BY last_used LIMIT ?)",
+                (excess,),
+            )
+            self.conn.commit()
+        return max(excess, 0)
+
+    def wrap(self, classify):
+        """
+        Wraps a `classify(texts) -> labels` callable so only cache misses reach it.
+
+        Repeated texts within one call are classified once.
+        """
+        def cached_classify(texts):
+            texts = list(texts)
+            keys = [self.key(t) for t in texts]
+            cached = self.get_many(keys)
+
+            pending = {}
+            for key, text in zip(keys, texts):
+                if key not in cached and key not in pending:
+                    pending[key] = text
+            hits = sum(1 for key in keys if key in cached)
+            self.hits += hits
+            self.misses += len(keys) - hits
+
+            if pending:
+                fresh = dict(zip(pending, classify(list(pending.values()))))
+                self.put_many(fresh.items())
+                cached.update(fresh)
+            return [cached[key] for key in keys]
+
+        return cached_classify
+
+    def report(self):
+        total = self.hits + self.misses
+        rate = self.hits / total if total else 0.0
+        size = self.conn.execute("SELECT COUNT(*) FROM predictions").fetchone()[0]
+        print(f"📦 Prediction cache: {self.hits} hits, {self.misses} misses "
+              f"({rate:.1%} hit rate), {size} entries in {self.path}")
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": rate, "entries": size}
+
+    def close(self):
+        self.conn.close()
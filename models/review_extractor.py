@@ -0,0 +1,348 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import re
+import time
+
+import numpy as np
+
+from instrumentation import timer
+
+MONTHS = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+_MONTH_ALT = "|".join(MONTHS)
+_MONTH_INDEX = {month: i for i, month in enumerate(MONTHS)}
+
+TITLE_ALT = (
+    r'Just wow!|Awesome|Excellent|Great product|Perfect product|Mind-blowing purchase|Worth every penny|'
+    r'Brilliant|Fabulous|Super|Must buy|Terrific|Wonderful|Classy product|Best in the market|Simply awesome|'
+    r'Highly recommended|Value-for-money|Good choice|Really Nice|Does the job|Terrific purchase|'
+    r'Worth the money|Nice|Mindblowing purchase|Valueformoney'
+)
+
+# Rating: tried in order, the first match of each pattern decides whether it is 1-5
+_RATING_PATTERNS = [re.compile(p, re.MULTILINE) for p in (
+    r'^(\d)\s*$',
+    r'(\d)\s*★',
+    r'(\d)\s*star',
+    r'(\d)\s*out\s*of\s*5',
+)]
+
+_CERTIFIED_BUYER = re.compile(r'Certified Buyer\s+([A-Za-z\s]+?)(?:\n|$)')
+_NON_WORD = re.compile(r'[^\w\s]')
+_WHITESPACE = re.compile(r'\s+')
+
+# Dates: every month in one alternation; the lowest month index wins, as in the per-month loops
+_DATE_MONTH_YEAR = re.compile(rf'({_MONTH_ALT})\s+(20\d{{2}})')
+_DATE_MONTH_COMMA_YEAR = re.compile(rf'({_MONTH_ALT}),\s+(20\d{{2}})')
+_YEAR = re.compile(r'20\d{2}')
+
+_TITLE = re.compile(rf'({TITLE_ALT})', re.IGNORECASE)
+
+# Lines that are rating, title, name, location or date rather than review text
+_SKIP_LINE = re.compile("|".join(f"(?:{p})" for p in (
+    r'^\d$',
+    r'Certified Buyer',
+    rf'^({_MONTH_ALT})\s+20\d{{2}}$',
+    rf'^({_MONTH_ALT})$',
+    r'^\d+\s*helpful',
+    rf'^({TITLE_ALT})$',
+    r'^\d+\s*$',
+    r'^[A-Z][a-z]+\s+[A-Z][a-z]+\s*$',
+    r'^[A-Z][A-Z]+\s+[A-Z][A-Z]+\s*$',
+    r'^[A-Z][a-z]+\s*$',
+    r'^Customer\s*$',
+    r'^Flipkart\s+Customer\s*$',
+    r'^[A-Z][a-z]+\s+[A-Z][a-z]+\s+[A-Z][a-z]+\s*$',
+    r'^[A-Z]{2,}\s+[A-Z]{2,}\s+[A-Z]{2,}\s*$',
+)), re.IGNORECASE)
+
+# Trailing reviewer names, dates and counters, applied in this order (order matters:
+# each pattern only sees what the previous ones left behind)
+TRAILING_NAME_PATTERNS = [re.compile(p) for p in (
+    r'\s+[A-Z][a-z]+\s+[A-Z]\s*$',
+    r'\s+[A-Z][a-z]+\s*\([a-z]+\)\s*$',
+    r'\s+[A-Z][a-z]+\s+[A-Z][a-z]+\s+[A-Z][a-z]+\s*$',
+    r'\s+[A-Z][a-z]+\s+[A-Z][a-z]+\s+[A-Z][a-z]+\s*$',
+    r'\s+[A-Z]{2,}\s+[A-Z]{2,}\s+[A-Z]{2,}\s*$',
+    r'\s+[A-Z][a-z]+\s+[A-Z]{2,}\s+[A-Z][a-z]+\s*$',
+    r'\s+[A-Z][a-z]+\s+[A-Z][a-z]+\s*$',
+    r'\s+[a-z]+\s+[a-z]+\s*$',
+    r'\s+[A-Z]{2,}\s+[A-Z]{2,}\s*$',
+    rf'\s+[A-Z][a-z]+\s+[A-Z][a-z]+\s+({_MONTH_ALT})\s*$',
+    rf'\s+[A-Z][a-z]+\s+[A-Z][a-z]+\s+[A-Z][a-z]+\s+({_MONTH_ALT})\s*$',
+    r'\s+[A-Z][a-z]{4,}\s*$',
+    r'\s+[A-Z]{5,}\s*$',
+    r'\s+[A-Z][a-z]+\s+Customer\s*$',
+    r'\s+Customer\s*$',
+    r'\s+Flipkart\s+Customer\s*$',
+    r'\s+\d+\s*months?\s*ago\s*$',
+    r'\s+\d+\s*days?\s*ago\s*$',
+    r'\s+\d+\s*hours?\s*ago\s*$',
+    rf'\s+({_MONTH_ALT})\s+20\d{{2}}\s*$',
+    rf'\s+({_MONTH_ALT})\s*$',
+    r'\s+\d+\s*$',
+)]
+TRAILING_PUNCTUATION = re.compile(r'[,.\s]+$')
+
+# Capitalised words that end reviews without being names
+NOT_NAMES = frozenset([
+    'Good', 'Nice', 'Great', 'Best', 'Super', 'Awesome', 'Perfect', 'Amazing', 'Excellent', 'Phone',
+    'Camera', 'Battery', 'Product', 'Quality', 'Performance', 'Display', 'Design', 'Experience',
+    'Service', 'Delivery', 'Apple', 'iPhone', 'Flipkart', 'Thanks', 'Thank', 'Love', 'Loved', 'Happy',
+])
+
+
+def clean_review_text(review_text):
+    """Strip trailing reviewer names, dates and counters (same rules as the scraper's cleaner)"""
+    if not review_text:
+        return ""
+
+    cleaned_text = review_text
+    for pattern in TRAILING_NAME_PATTERNS:
+        cleaned_text = pattern.sub('', cleaned_text)
+
+    cleaned_text = TRAILING_PUNCTUATION.sub('', cleaned_text)
+    cleaned_text = _WHITESPACE.sub(' ', cleaned_text).strip()
+
+    return strip_trailing_name(cleaned_text)
+
+
+def strip_trailing_name(cleaned_text):
+    """Final validation - drop the last 1-3 words if they look like a name"""
+    words = cleaned_text.split()
+    if len(words) > 1:
+        for i in range(min(3, len(words))):
+            last_words = words[-(i + 1):]
+            combined = ' '.join(last_words)
+            if (all(word[0].isupper() and word[1:].islower() for word in last_words if word.isalpha()) and
+                    len(combined) > 2 and
+                    combined not in NOT_NAMES):
+                cleaned_text = ' '.join(words[:-(i + 1)])
+                break
+
+    return cleaned_text
+
+
+def _month_year_in(text):
+    """First month (in calendar order) appearing anywhere in `text`, with the text's first year"""
+    year = _YEAR.search(text)
+    if year:
+        for month in MONTHS:
+            if month in text:
+                return f"{month} {year.group()}"
+    return ""
+
+
+def _earliest_month(pattern, text):
+    best = None
+    for match in pattern.finditer(text):
+        if best is None or _MONTH_INDEX[match.group(1)] < _MONTH_INDEX[best.group(1)]:
+            best = match
+    return f"{best.group(1)} {best.group(2)}" if best else ""
+
+
+def extract_rating(full_text, lines):
+    for line in lines[:3]:
+        line = line.strip()
+        if line.isdigit() and 1 <= int(line) <= 5:
+            return line
+    for pattern in _RATING_PATTERNS:
+        match = pattern.search(full_text)
+        if match:
+            rating = int(match.group(1))
+            if 1 <= rating <= 5:
+                return str(rating)
+    return ""
+
+
+def extract_location(full_text, lines):
+    match = _CERTIFIED_BUYER.search(full_text)
+    if match:
+        location = match.group(1).strip()
+        location = _NON_WORD.sub('', location)
+        return _WHITESPACE.sub(' ', location)
+    for line in lines:
+        if 'Certified Buyer' in line:
+            parts = line.split('Certified Buyer')
+            if len(parts) > 1:
+                location = parts[1].strip()
+                location = _NON_WORD.sub('', location)
+                location = _WHITESPACE.sub(' ', location)
+                if location and len(location) > 2:
+                    return location
+    return ""
+
+
+def extract_date(full_text, lines, date_element_texts=None):
+    """
+    Month + year of the review.
+
+    `date_element_texts` is an optional callable returning the texts of the
+    container's date-like elements; it is only called when the text alone has
+    no "Mon YYYY" / "Mon, YYYY" date, so live containers only pay for the
+    element lookups when they are needed.
+    """
+    date = _earliest_month(_DATE_MONTH_YEAR, full_text) or _earliest_month(_DATE_MONTH_COMMA_YEAR, full_text)
+    if date:
+        return date
+    if date_element_texts is not None:
+        for elem_text in date_element_texts():
+            if elem_text:
+                date = _month_year_in(elem_text)
+                if date:
+                    return date
+    for line in lines:
+        date = _month_year_in(line.strip())
+        if date:
+            return date
+    return ""
+
+
+def extract_title(full_text):
+    match = _TITLE.search(full_text)
+    return match.group(1) if match else ""
+
+
+def extract_review_text(lines):
+    content_lines = []
+    for line in lines:
+        line = line.strip()
+        if len(line) > 3 and not _SKIP_LINE.match(line):
+            content_lines.append(line)
+    if not content_lines:
+        return np.nan
+    cleaned_text = clean_review_text(' '.join(content_lines))
+    if len(cleaned_text) < 8:
+        return np.nan
+    return cleaned_text
+
+
+def extract_review_fields(full_text, date_element_texts=None):
+    """
+    Extracts every field of one review from its container text in a single pass.
+
+    The text is split into lines once and all patterns are precompiled at
+    import. Returns the record the scraper stores, with NaN for missing fields;
+    the values match the scraper's extract_*_properly / extract_date_enhanced /
+    extract_review_text_clean methods.
+    """
+    lines = full_text.split('\n')
+    with timer("field_extract", field="rating"):
+        rating = extract_rating(full_text, lines)
+    with timer("field_extract", field="title"):
+        title = extract_title(full_text)
+    with timer("field_extract", field="date"):
+        date = extract_date(full_text, lines, date_element_texts)
+    with timer("field_extract", field="location"):
+        location = extract_location(full_text, lines)
+    with timer("field_extract", field="review_text"):
+        review_text = extract_review_text(lines)
+    return {
+        'rating': rating if rating else np.nan,
+        'review_title': title if title else np.nan,
+        'review_text': review_text,
+        'date': date if date else np.nan,
+        'location': location if location else np.nan,
+    }
+
+
+class _TextContainer:
+    """Stand-in for a WebElement that only has text, for driving the legacy extractors"""
+
+    def __init__(self, text):
+        self.text = text
+
+    def find_elements(self, by, selector):
+        return []
+
+
+def legacy_review_fields(scraper, container):
+    rating = scraper.extract_rating_properly(container)
+    location = scraper.extract_location_properly(container)
+    date = scraper.extract_date_enhanced(container)
+    review_title = scraper.extract_review_title_properly(container)
+    review_text = scraper.extract_review_text_clean(container)
+    return {
+        'rating': rating if rating else np.nan,
+        'review_title': review_title if review_title else np.nan,
+        'review_text': review_text,
+        'date': date if date else np.nan,
+        'location': location if location else np.nan,
+    }
+
+
+def load_container_texts(fixture_dir):
+    """Container texts from saved review pages (see fixture_server.py)"""
+    from bs4 import BeautifulSoup
+    from flipkart_scraper import container_text, REVIEW_CONTAINER_SELECTORS
+
+    texts = []
+    for name in sorted(os.listdir(fixture_dir)):
+        if not name.endswith(".html"):
+            continue
+        with open(os.path.join(fixture_dir, name), "rb") as f:
+            soup = BeautifulSoup(f.read(), "lxml")
+        for selector in REVIEW_CONTAINER_SELECTORS:
+            containers = soup.select(selector)
+            if len(containers) > 1:
+                texts.extend(container_text(c) for c in containers)
+                break
+    return texts
+
+
+def benchmark(texts, repeat: int = 5):
+    """Times legacy vs single-pass extraction per review and checks the records are identical"""
+    from flipkart_scraper import FinalFlipkartScraper
+
+    # The legacy extractors never touch the driver; skip __init__ so Chrome is not started
+    scraper = FinalFlipkartScraper.__new__(FinalFlipkartScraper)
+    containers = [_TextContainer(t) for t in texts]
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            legacy = [legacy_review_fields(scraper, c) for c in containers]
+        legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fast = [extract_review_fields(t) for t in texts]
+    fast_time = time.perf_counter() - start
+
+    def same(a, b):
+        return all(a[k] == b[k] or (a[k] != a[k] and b[k] != b[k]) for k in a)
+
+    mismatches = sum(not same(a, b) for a, b in zip(legacy, fast))
+    n = max(len(texts) * repeat, 1)
+    print(f"\n📊 Field extraction over {len(texts)} containers x {repeat}")
+    print(f"legacy extractors: {legacy_time / n * 1e6:8.1f} µs/review")
+    print(f"single-pass:       {fast_time / n * 1e6:8.1f} µs/review ({legacy_time / max(fast_time, 1e-9):.1f}x faster)")
+    print(f"identical records: {len(texts) - mismatches}/{len(texts)}")
+    return mismatches
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark single-pass review field extraction.")
+    parser.add_argument("--fixtures", default="./models/fixtures/flipkart",
+                        help="directory of saved review pages")
+    parser.add_argument("--texts", default=None, help="JSON list of container texts (overrides --fixtures)")
+    parser.add_argument("--repeat", type=int, default=5)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.texts:
+        with open(args.texts, "r", encoding="utf-8") as f:
+            container_texts = json.load(f)
+    else:
+        if not os.path.exists(args.fixtures):
+            from fixture_server import generate_fixture_pages
+            generate_fixture_pages(args.fixtures)
+        container_texts = load_container_texts(args.fixtures)
+    if not container_texts:
+        print(f"❌ No review containers loaded from {args.texts or args.fixtures}")
+        raise SystemExit(1)
+    raise SystemExit(1 if benchmark(container_texts, args.repeat) else 0)
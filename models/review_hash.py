@@ -0,0 +1,12 @@
+import hashlib
+
+
+def normalize_review_content(review_text, review_title="", rating=""):
+    """Canonical text used to decide whether two reviews are the same review"""
+    return f"{review_title}{review_text}{rating}".lower().strip()
+
+
+def create_review_hash(review_text, review_title="", rating=""):
+    """Create unique hash for duplicate detection"""
+    content = normalize_review_content(review_text, review_title, rating)
+    return hashlib.md5(content.encode()).hexdigest()
@@ -0,0 +1,300 @@
+import hashlib
+import json
+import re
+import sqlite3
+import time
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+
+from review_hash import create_review_hash
+
+DEFAULT_STORE = "./models/dataset/reviews.db"
+
+MONTH_NUMBERS = {m: f"{i:02d}" for i, m in enumerate(
+    ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'], start=1)}
+_MONTH_YEAR = re.compile(r'^([A-Z][a-z]{2})\s+(\d{4})$')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reviews (
+    product_id TEXT NOT NULL,
+    review_hash TEXT NOT NULL,
+    rating INTEGER,
+    review_title TEXT,
+    review_text TEXT,
+    date TEXT,
+    review_month TEXT,
+    location TEXT,
+    helpfulness REAL,
+    sentiment INTEGER,
+    scraped_at REAL NOT NULL,
+    labelled_at REAL,
+    summarized_at REAL,
+    PRIMARY KEY (product_id, review_hash)
+);
+CREATE INDEX IF NOT EXISTS idx_reviews_product_month ON reviews (product_id, review_month);
+CREATE INDEX IF NOT EXISTS idx_reviews_month ON reviews (review_month);
+CREATE INDEX IF NOT EXISTS idx_reviews_sentiment ON reviews (sentiment, product_id);
+CREATE INDEX IF NOT EXISTS idx_reviews_unlabelled ON reviews (scraped_at) WHERE sentiment IS NULL;
+CREATE INDEX IF NOT EXISTS idx_reviews_labelled_at ON reviews (labelled_at);
+
+CREATE TABLE IF NOT EXISTS summaries (
+    product_id TEXT NOT NULL,
+    label TEXT NOT NULL,
+    summary TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (product_id, label)
+);
+
+-- Reviews analysed through the web app (/api/submit-review)
+CREATE TABLE IF NOT EXISTS submissions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    text TEXT NOT NULL,
+    sentiment TEXT NOT NULL,
+    score REAL,
+    confidence REAL,
+    created_at REAL NOT NULL
+);
+
+-- Incremental pipeline bookkeeping (see pipeline.py); which products need a
+-- summary is decided by reviews.summarized_at alone
+CREATE TABLE IF NOT EXISTS summary_state (
+    product_id TEXT PRIMARY KEY,
+    content_hash TEXT NOT NULL,
+    mix TEXT NOT NULL,
+    review_count INTEGER NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS stage_runs (
+    run_id TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    seconds REAL NOT NULL,
+    rows_in INTEGER NOT NULL,
+    rows_out INTEGER NOT NULL,
+    finished_at REAL NOT NULL,
+    PRIMARY KEY (run_id, stage)
+);
+"""
+
+
+def product_id_from_url(url: str) -> str:
+    """Stable product key for a Flipkart URL: the pid query parameter, else the itm... path id"""
+    parsed = urlparse(url)
+    pid = parse_qs(parsed.query).get("pid")
+    if pid:
+        return pid[0]
+    for marker in ("/p/", "/product-reviews/", "/dp/"):
+        if marker in parsed.path:
+            return parsed.path.split(marker)[1].split("/")[0]
+    return parsed.path.strip("/") or url
+
+
+def review_month(date) -> str:
+    """'Mar 2024' -> '2024-03' (sortable and indexable); None when the date is missing or unparsable"""
+    if not isinstance(date, str):
+        return None
+    match = _MONTH_YEAR.match(date.strip())
+    if not match or match.group(1) not in MONTH_NUMBERS:
+        return None
+    return f"{match.group(2)}-{MONTH_NUMBERS[match.group(1)]}"
+
+
+def sentiment_mix(counts: dict) -> dict:
+    """{sentiment: share of reviews} from {sentiment: count}"""
+    total = sum(counts.values())
+    return {s: counts.get(s, 0) / total for s in (-1, 0, 1)} if total else {}
+
+
+def _value(v):
+    """NaN -> NULL"""
+    return None if v is None or (isinstance(v, float) and v != v) else v
+
+
+class ReviewStore:
+    """
+    Persistent SQLite (WAL) store of scraped reviews keyed by product and review hash.
+
+    The hash is the scraper's create_review_hash over text, title and rating,
+    so re-scraping a product only ever inserts reviews that are new.
+    Labelling and summarization track their own progress in the
+    `labelled_at` / `summarized_at` columns.
+    """
+
+    def __init__(self, path: str = DEFAULT_STORE):
+        self.path = path
+        # One connection per store, used from the thread that opened it (the API keeps store calls on its event loop)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+
+    @staticmethod
+    def review_hash(review) -> str:
+        # str() of NaN is 'nan', exactly as the scraper hashes it
+        return create_review_hash(str(review.get('review_text')), str(review.get('review_title')), str(review.get('rating')))
+
+    def upsert_reviews(self, product_id: str, reviews) -> int:
+        """Bulk-inserts scraped review dicts, skipping ones already stored; returns how many were new"""
+        now = time.time()
+        rows = []
+        for review in reviews:
+            rating = _value(review.get('rating'))
+            sentiment = _value(review.get('sentiment'))
+            rows.append((
+                product_id,
+                self.review_hash(review),
+                int(rating) if rating is not None else None,
+                _value(review.get('review_title')),
+                _value(review.get('review_text')),
+                _value(review.get('date')),
+                review_month(review.get('date')),
+                _value(review.get('location')),
+                _value(review.get('helpfulness')),
+                int(sentiment) if sentiment is not None else None,
+                now,
+                # Rows that arrive already labelled (imported datasets) count as labelled now
+                now if sentiment is not None else None,
+            ))
+        # rowcount (sqlite3_changes) counts rows this statement inserted, not rows touched by triggers
+        cursor = self.conn.executemany(
+            "INSERT INTO reviews (product_id, review_hash, rating, review_title, review_text, date, "
+            "review_month, location, helpfulness, sentiment, scraped_at, labelled_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (product_id, review_hash) DO NOTHING",
+            rows,
+        )
+        self.conn.commit()
+        return max(cursor.rowcount, 0)
+
+    def known_hashes(self, product_id: str) -> set:
+        rows = self.conn.execute("SELECT review_hash FROM reviews WHERE product_id = ?", (product_id,))
+        return {h for (h,) in rows}
+
+    def review_texts(self, product_id: str):
+        """(review_hash, review_text) of the product's stored reviews that have text"""
+        return self.conn.execute(
+            "SELECT review_hash, review_text FROM reviews WHERE product_id = ? AND review_text IS NOT NULL",
+            (product_id,),
+        ).fetchall()
+
+    def unlabelled(self, limit: int = None) -> pd.DataFrame:
+        """Reviews with text that have not been through the sentiment stage yet, oldest first"""
+        query = ("SELECT product_id, review_hash, review_text AS review FROM reviews "
+                 "WHERE sentiment IS NULL AND review_text IS NOT NULL ORDER BY scraped_at")
+        if limit:
+            query += f" LIMIT {int(limit)}"
+        return pd.read_sql_query(query, self.conn)
+
+    def set_sentiments(self, rows) -> int:
+        """rows: iterable of (product_id, review_hash, sentiment)"""
+        now = time.time()
+        cursor = self.conn.executemany(
+            "UPDATE reviews SET sentiment = ?, labelled_at = ?, summarized_at = NULL "
+            "WHERE product_id = ? AND review_hash = ?",
+            [(int(s), now, p, h) for p, h, s in rows],
+        )
+        self.conn.commit()
+        return cursor.rowcount
+
+    def products_pending_summary(self):
+        """Products with labelled reviews that no summary has covered yet"""
+        rows = self.conn.execute(
+            "SELECT DISTINCT product_id FROM reviews "
+            "WHERE sentiment IS NOT NULL AND summarized_at IS NULL"
+        )
+        return [p for (p,) in rows]
+
+    def labelled_reviews(self, product_id: str) -> pd.DataFrame:
+        return pd.read_sql_query(
+            "SELECT review_text AS review, sentiment, helpfulness, rating, review_month FROM reviews "
+            "WHERE product_id = ? AND sentiment IS NOT NULL AND review_text IS NOT NULL",
+            self.conn,
+            params=(product_id,),
+        )
+
+    def save_summaries(self, product_id: str, summaries: dict):
+        """
+        Stores {label: summary} for a product, marks its labelled reviews as
+        summarized and records the content hash and sentiment mix they covered.
+        """
+        now = time.time()
+        counts = self.sentiment_counts(product_id)
+        self.conn.execute(
+            "INSERT INTO summary_state (product_id, content_hash, mix, review_count, updated_at) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (product_id) DO UPDATE SET content_hash = excluded.content_hash, mix = excluded.mix, "
+            "review_count = excluded.review_count, updated_at = excluded.updated_at",
+            (product_id, self.content_hash(product_id), json.dumps(sentiment_mix(counts)), sum(counts.values()), now),
+        )
+        self.conn.executemany(
+            "INSERT INTO summaries (product_id, label, summary, created_at) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (product_id, label) DO UPDATE SET summary = excluded.summary, created_at = excluded.created_at",
+            [(product_id, label, text, now) for label, text in summaries.items()],
+        )
+        self.conn.execute(
+            "UPDATE reviews SET summarized_at = ? WHERE product_id = ? AND sentiment IS NOT NULL",
+            (now, product_id),
+        )
+        self.conn.commit()
+
+    def sentiment_counts(self, product_id: str) -> dict:
+        rows = self.conn.execute(
+            "SELECT sentiment, COUNT(*) FROM reviews WHERE product_id = ? AND sentiment IS NOT NULL GROUP BY sentiment",
+            (product_id,),
+        )
+        return {int(s): n for s, n in rows}
+
+    def content_hash(self, product_id: str) -> str:
+        """Hash over every (review hash, sentiment) of a product; changes whenever a review or label does"""
+        digest = hashlib.md5()
+        rows = self.conn.execute(
+            "SELECT review_hash, sentiment FROM reviews WHERE product_id = ? AND sentiment IS NOT NULL ORDER BY review_hash",
+            (product_id,),
+        )
+        for review_hash, sentiment in rows:
+            digest.update(f"{review_hash}:{sentiment};".encode())
+        return digest.hexdigest()
+
+    def summary_state(self, product_id: str):
+        """(content_hash, {sentiment: share}) recorded at the product's last summary, or None"""
+        row = self.conn.execute(
+            "SELECT content_hash, mix FROM summary_state WHERE product_id = ?", (product_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        return row[0], {int(k): v for k, v in json.loads(row[1]).items()}
+
+    def mark_summarized(self, product_id: str):
+        """Marks a product's labelled reviews as covered without regenerating its summary"""
+        self.conn.execute(
+            "UPDATE reviews SET summarized_at = ? WHERE product_id = ? AND sentiment IS NOT NULL AND summarized_at IS NULL",
+            (time.time(), product_id),
+        )
+        self.conn.commit()
+
+    def record_stage(self, run_id: str, stage: str, seconds: float, rows_in: int, rows_out: int):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO stage_runs (run_id, stage, seconds, rows_in, rows_out, finished_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (run_id, stage, seconds, rows_in, rows_out, time.time()),
+        )
+        self.conn.commit()
+
+    def add_submission(self, text: str, sentiment: str, score: float = None, confidence: float = None) -> int:
+        cursor = self.conn.execute(
+            "INSERT INTO submissions (text, sentiment, score, confidence, created_at) VALUES (?, ?, ?, ?, ?)",
+            (text, sentiment, score, confidence, time.time()),
+        )
+        self.conn.commit()
+        return cursor.lastrowid
+
+    def recent_submissions(self, limit: int = 20):
+        rows = self.conn.execute(
+            "SELECT id, text, sentiment, score, confidence FROM submissions ORDER BY id DESC LIMIT ?", (limit,)
+        )
+        return [
+            {"id": str(i), "text": text, "sentiment": sentiment, "score": score, "confidence": confidence}
+            for i, text, sentiment, score, confidence in rows
+        ]
+
+    def close(self):
+        self.conn.close()
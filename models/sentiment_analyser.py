@@ -1,10 +1,34 @@
+import argparse
+import json
+import os
+import time
+
 import pandas as pd
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
 import torch
 from tqdm.auto import tqdm
 
-# Detect device
-DEVICE = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+from dataset_io import dataset_format, read_dataset, write_dataset
+from inference_backends import BACKENDS, DEVICE, load_backend
+from instrumentation import maybe_profile, timer
+from token_cache import TOKEN_CACHE_DIR
+
+MODEL_NAME = "cardiffnlp/twitter-roberta-base-sentiment"
+DEFAULT_INPUT = "./models/dataset/test2.csv"  # expects a column "review"
+DEFAULT_OUTPUT = "./models/dataset/test.csv"
+# Held-out set used by --backend-report
+TEST_SET = "./training/dataset/test.csv"
+
+# Inference parameters
+MAX_LENGTH = 256
+BATCH_SIZE = 64
+# Upper bound on padded tokens (rows x longest row) in a single forward pass
+TOKEN_BUDGET = 8192
+# Rows read, classified and appended per step in streaming mode
+CHUNK_SIZE = 5000
+# Default size bound for the --cache prediction store
+CACHE_MAX_ENTRIES = 1_000_000
+# Default --cascade-margin
+CASCADE_MARGIN = 0.5
 
 # Map cardiffnlp/twitter-roberta-base-sentiment labels to sentiment values
 # config.id2label: {0: 'LABEL_0', 1: 'LABEL_1', 2: 'LABEL_2'}
@@ -19,37 +43,476 @@ def map_label(label_str: str) -> int:
     return LABEL_MAP.get(label_str, 0)
 
 
-def main():
-    # Load scraped reviews
-    df = pd.read_csv("./models/dataset/test2.csv")  # expects a column "review"
-    
-    # Load pretrained RoBERTa classifier
-    model_name = "cardiffnlp/twitter-roberta-base-sentiment"
-    tokenizer = AutoTokenizer.from_pretrained(model_name)
-    model = AutoModelForSequenceClassification.from_pretrained(model_name)
-    model.to(DEVICE)
-    model.eval()
-    
-    # Classify each review
+def load_classifier(model_name: str = MODEL_NAME, revision: str = "main", backend: str = "torch", onnx_path: str = None):
+    """
+    Load the pretrained RoBERTa classifier and its tokenizer.
+
+    The model is returned wrapped in an inference backend (see
+    inference_backends.py): fp32 PyTorch on DEVICE, dynamic int8 or ONNX Runtime.
+    """
+    return load_backend(model_name, revision, backend, onnx_path)
+
+
+def effective_max_length(tokenizer, max_length: int) -> int:
+    """max_length, capped at what the model accepts (e.g. a distilled student trained on shorter inputs)"""
+    return min(max_length, tokenizer.model_max_length)
+
+
+def classify_per_row(texts, tokenizer, model, max_length: int = MAX_LENGTH):
+    """Classify reviews one at a time (the original loop, kept for comparison)."""
+    max_length = effective_max_length(tokenizer, max_length)
     labels = []
-    for text in tqdm(df["review"].astype(str), desc="Classifying"):
-        inputs = tokenizer(
-            text,
-            return_tensors="pt",
-            truncation=True,
-            max_length=256
-        )
-        inputs = {k: v.to(DEVICE) for k, v in inputs.items()}
-        with torch.no_grad():
-            logits = model(**inputs).logits
+    for text in tqdm(texts, desc="Classifying"):
+        with timer("tokenize", mode="per_row"):
+            inputs = tokenizer(
+                text,
+                return_tensors="pt",
+                truncation=True,
+                max_length=max_length
+            )
+        with timer("model_forward", mode="per_row"):
+            logits = model.logits(inputs)
         pred = logits.softmax(dim=-1).argmax().item()
-        label_str = model.config.id2label[pred]
+        label_str = model.id2label[pred]
         labels.append(map_label(label_str))
-    
-    # Save labeled reviews
-    df["sentiment"] = labels
-    df.to_csv("./models/dataset/test.csv", index=False)
-    print(f"Saved reviews_labeled.csv with sentiment labels on {DEVICE}.")
+    return labels
+
+
+def make_length_buckets(lengths, batch_size: int = BATCH_SIZE, token_budget: int = TOKEN_BUDGET):
+    """
+    Groups row indices into batches of similar token length.
+
+    Rows are visited longest first, so the first row of a batch sets its padded
+    width; a batch is closed once it holds `batch_size` rows or adding another
+    row would push rows x width past `token_budget`.
+    """
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i], reverse=True)
+    batches = []
+    current = []
+    for idx in order:
+        if current and (
+            len(current) >= batch_size
+            or lengths[current[0]] * (len(current) + 1) > token_budget
+        ):
+            batches.append(current)
+            current = []
+        current.append(idx)
+    if current:
+        batches.append(current)
+    return batches
+
+
+def pad_batch(sequences, pad_token_id: int):
+    """Right-pads token id lists to the longest one and builds the attention mask."""
+    width = max(len(seq) for seq in sequences)
+    input_ids = torch.full((len(sequences), width), pad_token_id, dtype=torch.long)
+    attention_mask = torch.zeros((len(sequences), width), dtype=torch.long)
+    for row, seq in enumerate(sequences):
+        input_ids[row, : len(seq)] = torch.tensor(seq, dtype=torch.long)
+        attention_mask[row, : len(seq)] = 1
+    return {"input_ids": input_ids, "attention_mask": attention_mask}
+
+
+def predict_proba_batched(
+    texts,
+    tokenizer,
+    model,
+    batch_size: int = BATCH_SIZE,
+    token_budget: int = TOKEN_BUDGET,
+    max_length: int = MAX_LENGTH,
+    progress: bool = True,
+    encodings=None,
+) -> torch.Tensor:
+    """
+    Class probabilities for reviews, computed in length-bucketed, dynamically padded batches.
+
+    All texts are tokenized in a single fast-tokenizer call, grouped by length
+    and run through the model batch by batch. Rows are written back by index,
+    so row i of the result (columns in model label order) belongs to texts[i].
+
+    encodings: pre-tokenized rows (a token_cache.TokenizedDataset) whose first
+    len(texts) rows are texts, tokenized with the same max_length; skips tokenization.
+    """
+    texts = list(texts)
+    if not texts:
+        return torch.empty((0, len(model.id2label)))
+    max_length = effective_max_length(tokenizer, max_length)
+    if encodings is not None:
+        lengths = encodings.lengths[: len(texts)].tolist()
+    else:
+        with timer("tokenize", mode="batched"):
+            encodings = tokenizer(texts, truncation=True, max_length=max_length)["input_ids"]
+        lengths = [len(ids) for ids in encodings]
+    batches = make_length_buckets(lengths, batch_size, token_budget)
+
+    probs = torch.empty((len(texts), len(model.id2label)))
+    for batch in tqdm(batches, desc="Classifying (batched)", disable=not progress):
+        inputs = pad_batch([encodings[i] for i in batch], tokenizer.pad_token_id)
+        with timer("model_forward", mode="batched"):
+            probs[batch] = model.logits(inputs).float().softmax(dim=-1).cpu()
+    return probs
+
+
+def classify_batched(
+    texts,
+    tokenizer,
+    model,
+    batch_size: int = BATCH_SIZE,
+    token_budget: int = TOKEN_BUDGET,
+    max_length: int = MAX_LENGTH,
+    progress: bool = True,
+    encodings=None,
+):
+    """Classifies reviews with predict_proba_batched; returns sentiment values in the order of `texts`."""
+    probs = predict_proba_batched(texts, tokenizer, model, batch_size, token_budget, max_length, progress, encodings)
+    return [map_label(model.id2label[pred]) for pred in probs.argmax(dim=-1).tolist()]
+
+
+def checkpoint_path(output_path: str) -> str:
+    return f"{output_path}.ckpt"
+
+
+def input_fingerprint(input_path: str) -> dict:
+    """Identifies the input file so a checkpoint is never resumed against a different one."""
+    stat = os.stat(input_path)
+    return {"path": os.path.abspath(input_path), "size": stat.st_size, "mtime": stat.st_mtime}
+
+
+def load_checkpoint(ckpt_path: str, fingerprint: dict) -> dict:
+    """Returns the saved progress, or a fresh state if there is none or it belongs to another input."""
+    fresh = {"input": fingerprint, "rows_done": 0, "output_bytes": 0}
+    if not os.path.exists(ckpt_path):
+        return fresh
+    with open(ckpt_path, "r", encoding="utf-8") as f:
+        state = json.load(f)
+    if state.get("input") != fingerprint:
+        print(f"Checkpoint {ckpt_path} belongs to a different input; starting over.")
+        return fresh
+    return state
+
+
+def save_checkpoint(ckpt_path: str, state: dict):
+    # Write-then-rename so a crash never leaves a half-written checkpoint behind
+    tmp_path = f"{ckpt_path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, ckpt_path)
+
+
+def label_csv_streaming(
+    input_path: str,
+    output_path: str,
+    classify,
+    chunk_size: int = CHUNK_SIZE,
+    restart: bool = False,
+):
+    """
+    Labels `input_path` chunk by chunk, appending each labelled chunk to `output_path`.
+
+    `classify` maps a list of review texts to a list of sentiment values. After
+    every chunk the output is fsync'ed and a checkpoint records how many input
+    rows are done and how long the output is, so an interrupted run picks up at
+    the next chunk. Only one chunk is held in memory at a time.
+    """
+    ckpt_path = checkpoint_path(output_path)
+    state = load_checkpoint(ckpt_path, input_fingerprint(input_path))
+    if restart or not os.path.exists(output_path):
+        state.update(rows_done=0, output_bytes=0)
+
+    rows_done = state["rows_done"]
+    if rows_done:
+        print(f"Resuming {input_path} after {rows_done} rows.")
+        # Drop anything appended after the last checkpoint (a partially written chunk)
+        with open(output_path, "r+b") as f:
+            f.truncate(state["output_bytes"])
+    elif os.path.exists(output_path):
+        os.remove(output_path)
+
+    seen = 0
+    labelled = 0
+    with open(output_path, "a", encoding="utf-8", newline="") as out:
+        for chunk in pd.read_csv(input_path, chunksize=chunk_size):
+            start, seen = seen, seen + len(chunk)
+            if seen <= rows_done:
+                continue
+            if start < rows_done:
+                chunk = chunk.iloc[rows_done - start:]
+
+            chunk["sentiment"] = classify(chunk["review"].astype(str).tolist())
+            chunk.to_csv(out, header=(out.tell() == 0), index=False)
+            out.flush()
+            os.fsync(out.fileno())
+
+            labelled += len(chunk)
+            state.update(rows_done=seen, output_bytes=out.tell())
+            save_checkpoint(ckpt_path, state)
+
+        if out.tell() == 0:
+            # Header-only input: no chunk wrote the header
+            columns = pd.read_csv(input_path, nrows=0).columns.tolist()
+            pd.DataFrame(columns=columns + ["sentiment"] * ("sentiment" not in columns)).to_csv(out, index=False)
+
+    if os.path.exists(ckpt_path):
+        os.remove(ckpt_path)
+    return labelled
+
+
+def label_store(store, classify, chunk_size: int = CHUNK_SIZE):
+    """
+    Labels only the reviews in a ReviewStore that have no sentiment yet.
+
+    Each chunk is written back before the next is read, so an interrupted run
+    simply continues with whatever is still unlabelled.
+    """
+    labelled = 0
+    while True:
+        chunk = store.unlabelled(limit=chunk_size)
+        if chunk.empty:
+            return labelled
+        labels = classify(chunk["review"].astype(str).tolist())
+        store.set_sentiments(zip(chunk["product_id"], chunk["review_hash"], labels))
+        labelled += len(chunk)
+
+
+def backend_report(df, model_name: str = MODEL_NAME, revision: str = "main", onnx_path: str = None, **batch_kwargs):
+    """
+    Runs every backend through classify_batched on `df["review"]` and prints a speed/accuracy table.
+
+    Agreement is measured against the fp32 PyTorch predictions and, when the
+    file has one, against its stored `sentiment` column.
+    """
+    texts = df["review"].astype(str).tolist()
+    reference = df["sentiment"].tolist() if "sentiment" in df.columns else None
+    results = []
+    baseline = None
+    for name in BACKENDS:
+        tokenizer, backend = load_classifier(model_name, revision, name, onnx_path)
+        # Warm-up pass so one-off graph optimisation is not billed to the first batch
+        classify_batched(texts[:8], tokenizer, backend, progress=False, **batch_kwargs)
+        start = time.perf_counter()
+        labels = classify_batched(texts, tokenizer, backend, progress=False, **batch_kwargs)
+        elapsed = time.perf_counter() - start
+        if baseline is None:
+            baseline = labels
+        results.append({
+            "backend": name,
+            "seconds": elapsed,
+            "rows_per_sec": len(texts) / max(elapsed, 1e-9),
+            "agreement_with_torch": sum(a == b for a, b in zip(labels, baseline)) / max(len(texts), 1),
+            "agreement_with_labels": (
+                sum(a == b for a, b in zip(labels, reference)) / max(len(texts), 1)
+                if reference is not None else None
+            ),
+        })
+
+    print(f"\n📊 Backend report on {len(texts)} reviews")
+    print(f"{'backend':>8} {'seconds':>9} {'rows/sec':>10} {'speedup':>8} {'vs torch':>9} {'vs labels':>10}")
+    for r in results:
+        vs_labels = f"{r['agreement_with_labels']:.2%}" if r["agreement_with_labels"] is not None else "n/a"
+        print(f"{r['backend']:>8} {r['seconds']:>9.2f} {r['rows_per_sec']:>10.1f} "
+              f"{r['rows_per_sec'] / results[0]['rows_per_sec']:>7.2f}x "
+              f"{r['agreement_with_torch']:>9.2%} {vs_labels:>10}")
+    return results
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Label reviews with RoBERTa sentiment.")
+    parser.add_argument("--input", default=DEFAULT_INPUT, help="CSV, Parquet or Arrow file with a 'review' column")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="labelled output; .parquet or .arrow writes columnar")
+    parser.add_argument("--model", default=MODEL_NAME, help="model name or local path")
+    parser.add_argument("--revision", default="main", help="model revision (branch, tag or commit)")
+    parser.add_argument("--backend", choices=BACKENDS, default="torch",
+                        help="fp32 PyTorch, dynamic int8 quantization or ONNX Runtime")
+    parser.add_argument("--onnx-path", default=None, help="exported ONNX graph (created if missing)")
+    parser.add_argument("--backend-report", nargs="?", const=TEST_SET, default=None, metavar="CSV",
+                        help=f"compare speed and label agreement of all backends (default: {TEST_SET}) and exit")
+    parser.add_argument("--mode", choices=["batched", "row"], default="batched",
+                        help="batched length-bucketed inference or the per-row loop")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--token-budget", type=int, default=TOKEN_BUDGET,
+                        help="max padded tokens per forward pass")
+    parser.add_argument("--max-length", type=int, default=MAX_LENGTH)
+    parser.add_argument("--stream", action="store_true",
+                        help="read, label and append the input in chunks, resuming from a checkpoint")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--restart", action="store_true",
+                        help="ignore an existing checkpoint in streaming mode")
+    parser.add_argument("--store", default=None, metavar="PATH",
+                        help="label the unlabelled reviews of a review store instead of a CSV")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="CPU worker processes, each with its own model copy")
+    parser.add_argument("--threads-per-worker", type=int, default=None,
+                        help="torch threads per process (default: cores / workers)")
+    parser.add_argument("--scaling-benchmark", type=int, default=0, metavar="N",
+                        help="time the input with 1..N workers and exit")
+    parser.add_argument("--limit", type=int, default=None, help="only read the first N rows")
+    parser.add_argument("--cache", default=None, metavar="PATH",
+                        help="SQLite prediction cache; only cache misses are classified")
+    parser.add_argument("--cache-max-entries", type=int, default=CACHE_MAX_ENTRIES)
+    parser.add_argument("--token-cache", default=TOKEN_CACHE_DIR, metavar="DIR",
+                        help="reuse the input's cached tokenization (whole-file batched runs)")
+    parser.add_argument("--no-token-cache", dest="token_cache", action="store_const", const=None)
+    parser.add_argument("--cascade", default=None, metavar="NPZ",
+                        help="hashed n-gram linear model (models/cascade.py train); only low-margin rows reach the model")
+    parser.add_argument("--cascade-margin", type=float, default=CASCADE_MARGIN,
+                        help="escalate rows whose linear top-1 minus top-2 probability is below this")
+    args = parser.parse_args()
+    if args.workers > 1 and args.mode == "row":
+        parser.error("--mode row classifies in this process; it cannot be combined with --workers > 1")
+    return args
+
+
+def build_classifier(args, pretokenized: str = None):
+    """
+    Returns a `classify(texts) -> labels` callable for the selected execution mode, a cleanup hook
+    and the effective max_length (args.max_length capped by the model) it truncates to.
+
+    pretokenized: input file whose rows `classify` will be called with, in
+    order; its token ids are then read from (or added to) the token cache.
+    """
+    if args.workers > 1:
+        from inference_pool import InferencePool
+
+        pool = InferencePool(
+            args.model,
+            revision=args.revision,
+            backend=args.backend,
+            onnx_path=args.onnx_path,
+            workers=args.workers,
+            threads_per_worker=args.threads_per_worker,
+            batch_size=args.batch_size,
+            token_budget=args.token_budget,
+            max_length=args.max_length,
+        )
+        pool.warm_up()
+        return pool.classify, pool.close, pool.effective_max_length()
+
+    if args.threads_per_worker:
+        torch.set_num_threads(args.threads_per_worker)
+
+    # Load pretrained RoBERTa classifier
+    tokenizer, model = load_classifier(args.model, args.revision, args.backend, args.onnx_path)
+    max_length = effective_max_length(tokenizer, args.max_length)
+    encodings = None
+    if pretokenized and args.mode == "batched":
+        from token_cache import tokenized
+
+        encodings = tokenized(pretokenized, tokenizer, max_length, revision=args.revision, root=args.token_cache)
+
+    def classify(texts):
+        if args.mode == "row":
+            return classify_per_row(texts, tokenizer, model, args.max_length)
+        return classify_batched(
+            texts, tokenizer, model,
+            batch_size=args.batch_size,
+            token_budget=args.token_budget,
+            max_length=args.max_length,
+            encodings=encodings,
+        )
+
+    return classify, lambda: None, max_length
+
+
+def main():
+    args = parse_args()
+
+    if args.backend_report:
+        df = read_dataset(args.backend_report, nrows=args.limit)
+        backend_report(
+            df, args.model, args.revision, args.onnx_path,
+            batch_size=args.batch_size,
+            token_budget=args.token_budget,
+            max_length=args.max_length,
+        )
+        return
+
+    if args.scaling_benchmark:
+        from inference_pool import benchmark_scaling
+
+        df = read_dataset(args.input, nrows=args.limit)
+        benchmark_scaling(
+            df["review"].astype(str).tolist(),
+            args.scaling_benchmark,
+            args.model,
+            args.threads_per_worker,
+            revision=args.revision,
+            backend=args.backend,
+            onnx_path=args.onnx_path,
+            batch_size=args.batch_size,
+            token_budget=args.token_budget,
+            max_length=args.max_length,
+        )
+        return
+
+    # The token cache lines up with the input's rows, so only whole-file runs without the
+    # prediction cache or the cascade (which pass on just the misses / escalations) can use it
+    whole_file = not (args.store or args.stream or args.cache or args.cascade)
+    classify, close, max_length = build_classifier(args, args.input if whole_file and args.token_cache else None)
+    mode = f"{args.workers} workers" if args.workers > 1 else args.mode
+    cache = None
+    if args.cache:
+        from prediction_cache import PredictionCache
+
+        cache = PredictionCache(args.cache, args.model, args.revision, args.cache_max_entries,
+                                backend=args.backend, max_length=max_length)
+        classify = cache.wrap(classify)
+    cascade = None
+    if args.cascade:
+        from cascade import Cascade, HashedLinearClassifier
+
+        # Outside the prediction cache, which then only stores the model's own labels
+        cascade = Cascade(HashedLinearClassifier.load(args.cascade), classify, args.cascade_margin)
+        classify = cascade.classify
+    try:
+        if args.store:
+            from review_store import ReviewStore
+
+            store = ReviewStore(args.store)
+            start = time.perf_counter()
+            count = label_store(store, classify, args.chunk_size)
+            elapsed = time.perf_counter() - start
+            store.close()
+            print(f"Classified {count} new reviews in {elapsed:.1f}s "
+                  f"({count / max(elapsed, 1e-9):.1f} rows/sec, mode={mode}, store={args.store})")
+            return
+
+        if args.stream:
+            if dataset_format(args.input) != "csv" or dataset_format(args.output) != "csv":
+                print("❌ --stream reads and appends CSV; drop --stream for Parquet/Arrow files")
+                return
+            start = time.perf_counter()
+            count = label_csv_streaming(args.input, args.output, classify, args.chunk_size, args.restart)
+            elapsed = time.perf_counter() - start
+            print(f"Classified {count} reviews in {elapsed:.1f}s "
+                  f"({count / max(elapsed, 1e-9):.1f} rows/sec, mode={mode}, streaming)")
+            print(f"Saved {args.output} with sentiment labels on {DEVICE}.")
+            return
+
+        # Load scraped reviews
+        df = read_dataset(args.input, nrows=args.limit)
+        texts = df["review"].astype(str).tolist()
+
+        # Classify reviews
+        start = time.perf_counter()
+        labels = classify(texts)
+        elapsed = time.perf_counter() - start
+        print(f"Classified {len(texts)} reviews in {elapsed:.1f}s "
+              f"({len(texts) / max(elapsed, 1e-9):.1f} rows/sec, mode={mode})")
+
+        # Save labeled reviews
+        df["sentiment"] = labels
+        write_dataset(df, args.output)
+        print(f"Saved {args.output} with sentiment labels on {DEVICE}.")
+    finally:
+        close()
+        if cascade is not None:
+            cascade.report()
+        if cache is not None:
+            cache.report()
+            cache.close()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    with maybe_profile("sentiment_analyser"):
+        main()
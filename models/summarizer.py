@@ -1,14 +1,32 @@
-import pandas as pd
-from transformers import AutoTokenizer, AutoModelForSeq2SeqLM, pipeline
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import torch
 
+from dataset_io import read_dataset
+from extractive import select_representative
+from instrumentation import maybe_profile, timer
+from model_store import load_pretrained
+from sentiment_analyser import pad_batch
+from token_cache import TOKEN_CACHE_DIR
+
 # Detect device
 DEVICE_ID = 0 if torch.cuda.is_available() else -1
 DEVICE_NAME = "GPU" if DEVICE_ID >= 0 else "CPU"
+DEVICE = torch.device("cuda" if DEVICE_ID >= 0 else "cpu")
+
+MODEL_NAME = "facebook/bart-large-cnn"
 
 # Summarization parameters
 MAX_OUTPUT_LENGTH = 150
 MIN_OUTPUT_LENGTH = 30
+# Chunks summarized per generate() call in the map step
+MAP_BATCH_SIZE = 4
+# Review tokens per sentiment class kept by the extractive pre-filter (0 = keep everything)
+EXTRACTIVE_BUDGET = 8192
+
+SENTIMENT_CLASSES = [(1, "Positive"), (0, "Neutral"), (-1, "Negative")]
 
 
 def chunk_text(text: str, tokenizer, max_tokens: int):
@@ -28,56 +46,247 @@ def chunk_text(text: str, tokenizer, max_tokens: int):
     return chunks
 
 
-def summarize_reviews(labeled_csv: str):
-    # Load labeled reviews
-    df = pd.read_csv(labeled_csv)
+def tokenize_reviews(reviews, tokenizer):
+    """
+    Tokenizes each review once, without special tokens.
+
+    A leading space is added so every review is encoded the same way it would
+    be in the middle of the old " ".join(reviews) string.
+    """
+    if not reviews:
+        return []
+    return tokenizer([f" {r}" for r in reviews], add_special_tokens=False)["input_ids"]
+
+
+def chunk_review_ids(review_ids, max_tokens: int):
+    """
+    Packs tokenized reviews into chunks of at most `max_tokens` ids.
+
+    Chunks only break between reviews; a single review longer than
+    `max_tokens` is the only thing ever cut, and it gets chunks of its own.
+    """
+    chunks = []
+    current = []
+    for ids in review_ids:
+        if len(ids) > max_tokens:
+            if current:
+                chunks.append(current)
+                current = []
+            chunks.extend(ids[i : i + max_tokens] for i in range(0, len(ids), max_tokens))
+            continue
+        if current and len(current) + len(ids) > max_tokens:
+            chunks.append(current)
+            current = []
+        current.extend(ids)
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def generate_summaries(chunks, tokenizer, model, batch_size: int = MAP_BATCH_SIZE):
+    """Summarizes token-id chunks in padded batches; returns the summaries as token ids."""
+    special_ids = set(tokenizer.all_special_ids)
+    summaries = []
+    for i in range(0, len(chunks), batch_size):
+        # BART inputs are <s> ... </s>
+        batch = [[tokenizer.bos_token_id, *ids, tokenizer.eos_token_id] for ids in chunks[i : i + batch_size]]
+        inputs = {k: v.to(DEVICE) for k, v in pad_batch(batch, tokenizer.pad_token_id).items()}
+        with torch.no_grad(), timer("summarize_generate"):
+            output = model.generate(
+                **inputs,
+                max_length=MAX_OUTPUT_LENGTH,
+                min_length=MIN_OUTPUT_LENGTH,
+            )
+        summaries.extend([t for t in seq if t not in special_ids] for seq in output.tolist())
+    return summaries
+
+
+def map_reduce_summarize(review_ids, tokenizer, model, max_tokens: int, batch_size: int = MAP_BATCH_SIZE):
+    """
+    Hierarchical summary of a list of tokenized reviews.
+
+    Map: pack the reviews into chunks and summarize them in batches.
+    Reduce: pack the chunk summaries the same way and summarize again, until a
+    single summary of at most MAX_OUTPUT_LENGTH tokens is left. Summaries stay
+    as token ids between rounds, so nothing is decoded and re-encoded.
+    """
+    chunks = chunk_review_ids(review_ids, max_tokens)
+    rounds = 0
+    while True:
+        summaries = generate_summaries(chunks, tokenizer, model, batch_size)
+        rounds += 1
+        if len(summaries) == 1:
+            return summaries[0], rounds
+        chunks = chunk_review_ids(summaries, max_tokens)
+        if len(chunks) >= len(summaries):
+            raise ValueError(
+                f"max_tokens={max_tokens} is too small to pack several {MAX_OUTPUT_LENGTH}-token summaries per chunk"
+            )
 
-    # Load model & tokenizer
-    model_name = "facebook/bart-large-cnn"
-    tokenizer = AutoTokenizer.from_pretrained(model_name)
-    model = AutoModelForSeq2SeqLM.from_pretrained(model_name)
+
+def prefilter_reviews(reviews, review_ids, token_budget: int):
+    """Keeps a representative subset of reviews within `token_budget` tokens; returns their token ids."""
+    keep = select_representative(reviews, [len(ids) for ids in review_ids], token_budget)
+    # A lone review longer than the whole budget is truncated to it
+    return [review_ids[i][:token_budget] for i in keep]
+
+
+def load_summarizer(model_name: str = MODEL_NAME):
+    """Returns (tokenizer, model, chunk_tokens) ready for summarize_frame"""
+    # Load model & tokenizer (from the local snapshot, created on first use)
+    tokenizer, model = load_pretrained(model_name, "seq2seq")
 
     # Ensure model and tokenizer max lengths match
     max_tokens = model.config.max_position_embeddings
     tokenizer.model_max_length = max_tokens
+    # Room for the <s> and </s> that generate_summaries adds around each chunk
+    chunk_tokens = max_tokens - 2
 
     # Move model to device
-    if DEVICE_ID >= 0:
-        model.to("cuda")
-
-    summarizer = pipeline(
-        "summarization",
-        model=model,
-        tokenizer=tokenizer,
-        device=DEVICE_ID
-    )
+    model.to(DEVICE)
+    model.eval()
 
     print(f"Using device for summarization: {DEVICE_NAME} (id={DEVICE_ID}); max_input_tokens={max_tokens}")
+    return tokenizer, model, chunk_tokens
+
+
+def summarize_frame(
+    df,
+    tokenizer,
+    model,
+    chunk_tokens: int,
+    batch_size: int = MAP_BATCH_SIZE,
+    extractive_budget: int = EXTRACTIVE_BUDGET,
+    encodings=None,
+):
+    """
+    Summarizes the `review` column of `df` per sentiment class; returns {label: summary}
+
+    encodings: tokenize_reviews output for every row of df, in order (a
+    token_cache.TokenizedDataset); skips tokenization.
+    """
+    # Tokenize on this thread: the fast tokenizer is not safe to share across threads
+    review_ids = {}
+    full_chunks = {}
+    for sent_val, label in SENTIMENT_CLASSES:
+        in_class = (df["sentiment"] == sent_val).to_numpy()
+        reviews = df["review"][in_class].astype(str).tolist()
+        if encodings is not None:
+            ids = [encodings[i].tolist() for i in in_class.nonzero()[0]]
+        else:
+            with timer("tokenize", mode="summarize"):
+                ids = tokenize_reviews(reviews, tokenizer)
+        full_chunks[label] = len(chunk_review_ids(ids, chunk_tokens))
+        if extractive_budget and ids:
+            start = time.perf_counter()
+            kept = prefilter_reviews(reviews, ids, extractive_budget)
+            total_tokens = sum(len(r) for r in ids)
+            kept_tokens = sum(len(r) for r in kept)
+            print(f"✂️ {label}: kept {len(kept)}/{len(ids)} reviews, {kept_tokens}/{total_tokens} tokens "
+                  f"(compression {total_tokens / max(kept_tokens, 1):.1f}x) in {time.perf_counter() - start:.2f}s")
+            ids = kept
+        review_ids[label] = ids
 
-    def summarize_category(sent_val: int, label: str):
-        reviews = df[df["sentiment"] == sent_val]["review"].astype(str).tolist()
-        if not reviews:
+    def summarize_category(ids):
+        start = time.perf_counter()
+        with timer("summarize_category"):
+            summary_ids, rounds = map_reduce_summarize(ids, tokenizer, model, chunk_tokens, batch_size)
+        return summary_ids, rounds, time.perf_counter() - start
+
+    # The three sentiment classes are independent; torch releases the GIL inside ops
+    with ThreadPoolExecutor(max_workers=len(SENTIMENT_CLASSES)) as executor:
+        futures = {
+            label: executor.submit(summarize_category, ids)
+            for label, ids in review_ids.items() if ids
+        }
+
+    summaries = {}
+    for _, label in SENTIMENT_CLASSES:
+        if label not in futures:
             print(f"No {label} reviews to summarize.")
-            return
-        full_text = " ".join(reviews)
-        # Split into chunks to avoid input too long
-        text_chunks = chunk_text(full_text, tokenizer, max_tokens)
-        summary_chunks = []
-        for chunk in text_chunks:
-            result = summarizer(
-                chunk,
-                max_length=MAX_OUTPUT_LENGTH,
-                min_length=MIN_OUTPUT_LENGTH,
-                truncation=True
-            )
-            summary_chunks.append(result[0]["summary_text"])
-        combined_summary = " ".join(summary_chunks)
-        print(f"\n=== {label} Reviews Summary ===\n{combined_summary}\n")
+            continue
+        summary_ids, rounds, elapsed = futures[label].result()
+        summaries[label] = tokenizer.decode(summary_ids, skip_special_tokens=True, clean_up_tokenization_spaces=True)
+        print(f"\n=== {label} Reviews Summary ({rounds} rounds, {elapsed:.1f}s) ===\n{summaries[label]}\n")
+
+        kept_chunks = len(chunk_review_ids(review_ids[label], chunk_tokens))
+        if kept_chunks < full_chunks[label]:
+            saved = (full_chunks[label] - kept_chunks) * elapsed / kept_chunks
+            print(f"⏱️ {label}: summarized {kept_chunks} of {full_chunks[label]} chunks; "
+                  f"≈{saved:.1f}s saved by the extractive pre-filter")
+    return summaries
+
+
+def summarize_reviews(
+    labeled_csv: str,
+    model_name: str = MODEL_NAME,
+    batch_size: int = MAP_BATCH_SIZE,
+    extractive_budget: int = EXTRACTIVE_BUDGET,
+    token_cache: str = TOKEN_CACHE_DIR,
+):
+    # Load labeled reviews (CSV, Parquet or Arrow; only the two columns used)
+    df = read_dataset(labeled_csv, columns=["review", "sentiment"])
+    tokenizer, model, chunk_tokens = load_summarizer(model_name)
+    encodings = None
+    if token_cache:
+        from token_cache import tokenized
+
+        # Same encoding as tokenize_reviews: leading space, no special tokens, no truncation
+        encodings = tokenized(labeled_csv, tokenizer, add_special_tokens=False, prefix=" ", root=token_cache)
+    return summarize_frame(df, tokenizer, model, chunk_tokens, batch_size, extractive_budget, encodings)
+
+
+def summarize_store(
+    store_path: str,
+    model_name: str = MODEL_NAME,
+    batch_size: int = MAP_BATCH_SIZE,
+    extractive_budget: int = EXTRACTIVE_BUDGET,
+):
+    """Re-summarizes only the products of a ReviewStore that gained labelled reviews since their last summary"""
+    from review_store import ReviewStore
+
+    store = ReviewStore(store_path)
+    try:
+        pending = store.products_pending_summary()
+        if not pending:
+            print("No products with new labelled reviews; summaries are up to date.")
+            return {}
+        tokenizer, model, chunk_tokens = load_summarizer(model_name)
+        results = {}
+        for product_id in pending:
+            print(f"\n📦 Summarizing {product_id}")
+            df = store.labelled_reviews(product_id)
+            results[product_id] = summarize_frame(df, tokenizer, model, chunk_tokens, batch_size, extractive_budget)
+            store.save_summaries(product_id, results[product_id])
+        return results
+    finally:
+        store.close()
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Summarize labelled reviews per sentiment class.")
+    parser.add_argument("labeled_csv", nargs="?", default="reviews_labeled.csv")
+    parser.add_argument("--model", default=MODEL_NAME, help="model name or local path")
+    parser.add_argument("--batch-size", type=int, default=MAP_BATCH_SIZE,
+                        help="chunks summarized per generate() call")
+    parser.add_argument("--extractive-budget", type=int, default=EXTRACTIVE_BUDGET,
+                        help="review tokens kept per sentiment class before summarizing (0 disables)")
+    parser.add_argument("--store", default=None, metavar="PATH",
+                        help="summarize products in a review store that have new labelled reviews")
+    parser.add_argument("--token-cache", default=TOKEN_CACHE_DIR, metavar="DIR",
+                        help="reuse the file's cached tokenization")
+    parser.add_argument("--no-token-cache", dest="token_cache", action="store_const", const=None)
+    return parser.parse_args()
+
 
-    summarize_category(1, "Positive")
-    summarize_category(0, "Neutral")
-    summarize_category(-1, "Negative")
+def main():
+    args = parse_args()
+    if args.store:
+        summarize_store(args.store, args.model, args.batch_size, args.extractive_budget)
+    else:
+        summarize_reviews(args.labeled_csv, args.model, args.batch_size, args.extractive_budget, args.token_cache)
 
 
 if __name__ == "__main__":
-    summarize_reviews("reviews_labeled.csv")
+    with maybe_profile("summarizer"):
+        main()
@@ -0,0 +1,71 @@
+"""
+Tiny, randomly initialised RoBERTa classifier and BART summarizer for offline runs.
+
+They share a byte-level BPE tokenizer trained on the bundled reviews, so
+tokenization costs are realistic even though the networks are a few
+thousand times smaller. Everything is seeded: the same source CSV always
+produces the same weights and vocabulary.
+
+    python models/tiny_models.py ./models/bench/tiny
+"""
+import argparse
+import os
+
+import pandas as pd
+import torch
+
+SOURCE_CSV = "./reviews_labeled.csv"
+TINY_DIR = "./models/bench/tiny"
+VOCAB_SIZE = 2000
+SPECIAL_TOKENS = ["<s>", "<pad>", "</s>", "<unk>", "<mask>"]
+
+
+def _train_tokenizer(source_csv: str):
+    from tokenizers import ByteLevelBPETokenizer, processors
+
+    texts = pd.read_csv(source_csv)["review"].astype(str).tolist()
+    bpe = ByteLevelBPETokenizer()
+    bpe.train_from_iterator(texts, vocab_size=VOCAB_SIZE, special_tokens=SPECIAL_TOKENS, show_progress=False)
+    bpe._tokenizer.post_processor = processors.RobertaProcessing(("</s>", 2), ("<s>", 0))
+    return bpe._tokenizer
+
+
+def build_tiny_models(out_dir: str = TINY_DIR, source_csv: str = SOURCE_CSV, seed: int = 0):
+    """Writes `roberta/` and `bart/` under out_dir (skipped if already there); returns both paths"""
+    from transformers import (BartConfig, BartForConditionalGeneration, BartTokenizerFast, RobertaConfig,
+                              RobertaForSequenceClassification, RobertaTokenizerFast)
+
+    roberta_dir = os.path.join(out_dir, "roberta")
+    bart_dir = os.path.join(out_dir, "bart")
+    if os.path.exists(os.path.join(roberta_dir, "config.json")) and os.path.exists(os.path.join(bart_dir, "config.json")):
+        return roberta_dir, bart_dir
+
+    torch.manual_seed(seed)
+    backend = _train_tokenizer(source_csv)
+    token_kwargs = dict(bos_token="<s>", eos_token="</s>", sep_token="</s>", cls_token="<s>",
+                        unk_token="<unk>", pad_token="<pad>", mask_token="<mask>")
+
+    roberta = RobertaForSequenceClassification(RobertaConfig(
+        vocab_size=VOCAB_SIZE, hidden_size=32, num_hidden_layers=2, num_attention_heads=2,
+        intermediate_size=64, max_position_embeddings=300, num_labels=3, pad_token_id=1,
+    ))
+    roberta.save_pretrained(roberta_dir)
+    RobertaTokenizerFast(tokenizer_object=backend, **token_kwargs).save_pretrained(roberta_dir)
+
+    bart = BartForConditionalGeneration(BartConfig(
+        vocab_size=VOCAB_SIZE, d_model=32, encoder_layers=1, decoder_layers=1,
+        encoder_attention_heads=2, decoder_attention_heads=2, encoder_ffn_dim=64, decoder_ffn_dim=64,
+        max_position_embeddings=1024, pad_token_id=1, bos_token_id=0, eos_token_id=2,
+        decoder_start_token_id=2, forced_bos_token_id=0,
+    ))
+    bart.save_pretrained(bart_dir)
+    BartTokenizerFast(tokenizer_object=backend, **token_kwargs).save_pretrained(bart_dir)
+    return roberta_dir, bart_dir
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the tiny offline models.")
+    parser.add_argument("out_dir", nargs="?", default=TINY_DIR)
+    parser.add_argument("--source", default=SOURCE_CSV)
+    args = parser.parse_args()
+    print(f"✅ Tiny models in {build_tiny_models(args.out_dir, args.source)}")
@@ -0,0 +1,220 @@
+"""
+On-disk cache of pre-tokenized datasets, shared by labelling, summarization and training.
+
+A column of a CSV/Parquet/Arrow file is batch-tokenized once with the fast
+tokenizer and stored as two .npy files: every row's input ids concatenated
+into one flat int32 array, and an int64 offsets array (row i is
+ids[offsets[i]:offsets[i + 1]]). Both are opened with mmap_mode="r", so
+loading costs nothing per row and rows are only materialized when used.
+
+    python models/token_cache.py build reviews_labeled.csv --tokenizer cardiffnlp/twitter-roberta-base-sentiment
+    python models/token_cache.py bench reviews_labeled.csv --tokenizer ./models/bench/tiny/roberta
+
+Entries are keyed by source file, column, tokenizer name, revision, max
+length and encoding options; an entry is rebuilt when the source file's
+SHA-256 no longer matches the one it was built from.
+"""
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import re
+import shutil
+import time
+
+import numpy as np
+
+TOKEN_CACHE_DIR = os.environ.get("TOKEN_CACHE_DIR", "./models/token_cache")
+# Rows per tokenizer call while building
+BUILD_CHUNK = 10_000
+META = "meta.json"
+
+
+def _slug(text: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", str(text)).strip("_")
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class TokenizedDataset:
+    """Memory-mapped token ids of one cached column; `ds[i]` is row i as an int32 array view"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, META), "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.ids = np.load(os.path.join(path, "ids.npy"), mmap_mode="r")
+        self.offsets = np.load(os.path.join(path, "offsets.npy"), mmap_mode="r")
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return self.ids[self.offsets[i] : self.offsets[i + 1]]
+
+    @property
+    def lengths(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+
+def entry_dir(source: str, tokenizer_name: str, revision: str = "main", max_length: int = None,
+              column: str = "review", add_special_tokens: bool = True, prefix: str = "",
+              root: str = TOKEN_CACHE_DIR) -> str:
+    options = json.dumps([add_special_tokens, prefix])
+    variant = hashlib.sha256(f"{os.path.abspath(source)}|{options}".encode()).hexdigest()[:10]
+    name = f"{_slug(tokenizer_name)}-{_slug(revision)}-{max_length or 'full'}-{variant}"
+    return os.path.join(root, f"{_slug(os.path.basename(source))}-{_slug(column)}", name)
+
+
+def _is_fresh(path: str, source: str) -> bool:
+    """True if the entry was built from the current contents of `source`"""
+    meta_path = os.path.join(path, META)
+    if not os.path.exists(meta_path):
+        return False
+    with open(meta_path, "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    stat = os.stat(source)
+    if meta["source_size"] == stat.st_size and meta["source_mtime"] == stat.st_mtime:
+        return True
+    # Touched or rewritten: only the content hash decides
+    if meta["source_size"] != stat.st_size or meta["source_sha256"] != file_sha256(source):
+        return False
+    meta["source_mtime"] = stat.st_mtime
+    with open(meta_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    return True
+
+
+def build(source: str, tokenizer, path: str, max_length: int = None, column: str = "review",
+          add_special_tokens: bool = True, prefix: str = "", revision: str = "main"):
+    """Tokenizes `column` of `source` chunk by chunk and writes ids/offsets/meta atomically to `path`"""
+    from dataset_io import read_dataset
+
+    start = time.perf_counter()
+    stat = os.stat(source)
+    texts = read_dataset(source, columns=[column])[column].astype(str).tolist()
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+
+    lengths = np.zeros(len(texts), dtype=np.int64)
+    pieces = []
+    for begin in range(0, len(texts), BUILD_CHUNK):
+        batch = [f"{prefix}{t}" for t in texts[begin : begin + BUILD_CHUNK]]
+        encoded = tokenizer(batch, add_special_tokens=add_special_tokens,
+                            truncation=max_length is not None, max_length=max_length)["input_ids"]
+        lengths[begin : begin + len(encoded)] = [len(ids) for ids in encoded]
+        pieces.append(np.fromiter(itertools.chain.from_iterable(encoded), dtype=np.int32,
+                                  count=int(lengths[begin : begin + len(encoded)].sum())))
+    offsets = np.zeros(len(texts) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    np.save(os.path.join(tmp_path, "ids.npy"), np.concatenate(pieces) if pieces else np.zeros(0, dtype=np.int32))
+    np.save(os.path.join(tmp_path, "offsets.npy"), offsets)
+    meta = {
+        "source": os.path.abspath(source),
+        "source_sha256": file_sha256(source),
+        "source_size": stat.st_size,
+        "source_mtime": stat.st_mtime,
+        "column": column,
+        "tokenizer": tokenizer.name_or_path,
+        "revision": revision,
+        "max_length": max_length,
+        "add_special_tokens": add_special_tokens,
+        "prefix": prefix,
+        "rows": len(texts),
+        "tokens": int(offsets[-1]),
+        "built_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "build_seconds": round(time.perf_counter() - start, 3),
+    }
+    with open(os.path.join(tmp_path, META), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    os.replace(tmp_path, path)
+    print(f"🧮 Tokenized {len(texts)} rows ({meta['tokens']} tokens) of {source} into {path} "
+          f"in {meta['build_seconds']:.1f}s")
+
+
+def tokenized(source: str, tokenizer, max_length: int = None, column: str = "review", revision: str = "main",
+              add_special_tokens: bool = True, prefix: str = "", root: str = TOKEN_CACHE_DIR) -> TokenizedDataset:
+    """
+    The cached tokenization of `column` in `source`, built first if missing or stale.
+
+    Row i of the result is tokenizer(prefix + text_i, add_special_tokens=...,
+    truncation to max_length)["input_ids"] for the i-th row of
+    read_dataset(source).
+    """
+    path = entry_dir(source, tokenizer.name_or_path, revision, max_length, column, add_special_tokens, prefix, root)
+    if not _is_fresh(path, source):
+        build(source, tokenizer, path, max_length, column, add_special_tokens, prefix, revision)
+    return TokenizedDataset(path)
+
+
+def benchmark(source: str, tokenizer_name: str, max_length: int = 256, column: str = "review",
+              root: str = TOKEN_CACHE_DIR):
+    """Tokenizing per row and in one batch vs. opening the cache"""
+    from transformers import AutoTokenizer
+
+    from dataset_io import read_dataset
+
+    tokenizer = AutoTokenizer.from_pretrained(tokenizer_name)
+    texts = read_dataset(source, columns=[column])[column].astype(str).tolist()
+
+    start = time.perf_counter()
+    for text in texts:
+        tokenizer(text, truncation=True, max_length=max_length)
+    per_row = time.perf_counter() - start
+
+    start = time.perf_counter()
+    tokenizer(texts, truncation=True, max_length=max_length)
+    batched = time.perf_counter() - start
+
+    tokenized(source, tokenizer, max_length, column, root=root)
+    start = time.perf_counter()
+    dataset = tokenized(source, tokenizer, max_length, column, root=root)
+    total = int(dataset.lengths.sum())
+    cached = time.perf_counter() - start
+
+    print(f"\n📊 {len(texts)} rows, {total} tokens")
+    print(f"{'path':>10} {'seconds':>9} {'rows/sec':>12}")
+    for name, seconds in (("per-row", per_row), ("batched", batched), ("cache", cached)):
+        print(f"{name:>10} {seconds:>9.3f} {len(texts) / max(seconds, 1e-9):>12.0f}")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Pre-tokenize datasets into memory-mapped arrays.")
+    parser.add_argument("--root", default=TOKEN_CACHE_DIR)
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name, text in (("build", "tokenize a dataset column into the cache"),
+                       ("bench", "per-row vs batched tokenization vs the cache")):
+        cmd = sub.add_parser(name, help=text)
+        cmd.add_argument("source")
+        cmd.add_argument("--tokenizer", required=True, help="tokenizer name or local path")
+        cmd.add_argument("--revision", default="main")
+        cmd.add_argument("--max-length", type=int, default=256, help="0 = no truncation")
+        cmd.add_argument("--column", default="review")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.command == "build":
+        from transformers import AutoTokenizer
+
+        tokenizer = AutoTokenizer.from_pretrained(args.tokenizer, revision=args.revision)
+        dataset = tokenized(args.source, tokenizer, args.max_length or None, args.column, args.revision,
+                            root=args.root)
+        print(f"✅ {len(dataset)} rows cached in {dataset.path}")
+    elif args.command == "bench":
+        benchmark(args.source, args.tokenizer, args.max_length or None, args.column, args.root)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "models"))
+
+from batch_cleaner import clean_review_series  # noqa: E402
+from flipkart_scraper import FinalFlipkartScraper  # noqa: E402
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+
+# Rows outside printable ASCII skip the Arrow kernels and go through Python's re
+NON_ASCII = [
+    "Camera is great 👍 Rahul Kumar",
+    "Très bon produit Flipkart Customer",
+    "Good\tphone Amit S",
+    "Value for money\nPriya Sharma",
+    "Works fine  3 months ago",
+    "डिस्प्ले अच्छा है Customer",
+    "",
+]
+
+
+def per_string(texts):
+    # The cleaner never touches the driver; skip __init__ so Chrome is not started
+    scraper = FinalFlipkartScraper.__new__(FinalFlipkartScraper)
+    return [scraper.clean_review_text_comprehensive(t) for t in texts]
+
+
+def test_matches_per_string_cleaner_on_bundled_csv():
+    texts = pd.read_csv(os.path.join(ROOT, "reviews_labeled.csv"), nrows=2000)["review"].dropna().astype(str)
+    assert clean_review_series(texts).tolist() == per_string(texts)
+
+
+def test_matches_per_string_cleaner_on_non_ascii_rows():
+    texts = pd.Series(NON_ASCII)
+    assert clean_review_series(texts).tolist() == per_string(texts)
+
+
+def test_missing_values_stay_missing():
+    cleaned = clean_review_series(pd.Series(["Nice phone Rahul Kumar", None]))
+    assert cleaned.isna().tolist() == [False, True]
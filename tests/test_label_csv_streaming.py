@@ -0,0 +1,32 @@
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "models"))
+
+from sentiment_analyser import checkpoint_path, label_csv_streaming  # noqa: E402
+
+
+def fake_classify(texts):
+    return [1 if "good" in t else -1 for t in texts]
+
+
+def test_header_only_input_writes_header_only_output(tmp_path):
+    source = tmp_path / "reviews.csv"
+    source.write_text("review,helpfulness\n", encoding="utf-8")
+    output = tmp_path / "labelled.csv"
+
+    assert label_csv_streaming(str(source), str(output), fake_classify) == 0
+    assert output.read_text(encoding="utf-8").splitlines() == ["review,helpfulness,sentiment"]
+    assert not os.path.exists(checkpoint_path(str(output)))
+
+
+def test_streaming_labels_every_row(tmp_path):
+    source = tmp_path / "reviews.csv"
+    pd.DataFrame({"review": ["good phone", "bad battery", "good screen"]}).to_csv(source, index=False)
+    output = tmp_path / "labelled.csv"
+
+    assert label_csv_streaming(str(source), str(output), fake_classify, chunk_size=2) == 3
+    assert pd.read_csv(output)["sentiment"].tolist() == [1, -1, 1]
+    assert not os.path.exists(checkpoint_path(str(output)))
@@ -0,0 +1,39 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "models"))
+
+from near_dedup import NearDuplicateIndex, normalize  # noqa: E402
+
+PAIRS = [
+    ("Battery backup is good and the display quality is awesome",
+     "Battery backup is good and the display quality is awesome!! 👍"),
+    ("Build quality feels solid and it looks really premium in hand",
+     "Build quality feels solid and it looks really premium in hand."),
+    ("Camera is decent in daylight but struggles at night",
+     "Camera is decent in daylight but struggles at night Rahul Sharma"),
+    ("Camera is decent in daylight but struggles at night",
+     "Camera is decent in daylight, but struggles at night... Flipkart Customer"),
+]
+
+
+def test_punctuation_emoji_and_name_variants_normalize_alike():
+    for plain, variant in PAIRS:
+        assert normalize(plain) == normalize(variant)
+
+
+def test_trailing_lowercase_words_are_kept():
+    assert normalize("Display quality is awesome").endswith("is awesome")
+
+
+def test_variants_are_found_at_a_strict_threshold():
+    for plain, variant in PAIRS:
+        index = NearDuplicateIndex(threshold=0.9)
+        index.insert("plain", plain)
+        assert [key for key, _ in index.query(variant)] == ["plain"]
+
+
+def test_min_chars_below_shingle_size():
+    index = NearDuplicateIndex(min_chars=2)
+    assert index.add("a", "abc") is None
+    assert len(index) == 0
@@ -0,0 +1,360 @@
+"""
+Distils the RoBERTa sentiment teacher into a small student transformer on CPU.
+
+    python training/distill.py                                  # train, evaluate, save a new version
+    python training/distill.py --layers 6 --hidden 384 --epochs 4 --accumulate 4
+    python models/sentiment_analyser.py --model training/checkpoints/student-<version>
+
+The student is a RoBERTa-architecture classifier with a few narrow layers
+that reuses the teacher's tokenizer and label names, so anything that loads
+the teacher can load the student. It learns from both the teacher's hard
+labels (the `sentiment` column of train.csv) and its soft predictions
+(computed once and cached next to the token cache):
+
+    loss = alpha * T^2 * KL(teacher / T || student / T) + (1 - alpha) * CE(label)
+
+Training reads token ids from the memory-mapped token cache. Batches are
+length-bucketed within shuffled pools and padded per batch, and gradients
+accumulate over several of them before each optimizer step.
+"""
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import time
+
+import numpy as np
+import torch
+import torch.nn.functional as F
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "models"))
+
+from dataset_io import read_dataset  # noqa: E402
+from sentiment_analyser import (  # noqa: E402
+    LABEL_MAP,
+    MODEL_NAME,
+    classify_batched,
+    load_classifier,
+    make_length_buckets,
+    pad_batch,
+    predict_proba_batched,
+)
+from token_cache import TOKEN_CACHE_DIR, file_sha256, tokenized  # noqa: E402
+
+TRAIN_SET = "./training/dataset/train.csv"
+TEST_SET = "./training/dataset/test.csv"
+CHECKPOINT_DIR = "./training/checkpoints"
+
+# Student shape (RoBERTa architecture)
+LAYERS = 4
+HIDDEN = 256
+HEADS = 4
+FFN = 1024
+MAX_LENGTH = 128
+
+# Optimisation
+EPOCHS = 3
+BATCH_SIZE = 32
+TOKEN_BUDGET = 4096
+ACCUMULATE = 2
+LEARNING_RATE = 5e-4
+WARMUP = 0.06
+TEMPERATURE = 2.0
+ALPHA = 0.5
+# Rows shuffled together before being length-bucketed into batches
+POOL_BATCHES = 50
+
+
+class BucketedStream(torch.utils.data.IterableDataset):
+    """
+    Streams padded training batches from the memory-mapped token cache.
+
+    Each epoch the rows are shuffled, cut into pools of POOL_BATCHES batches,
+    and every pool is length-bucketed with make_length_buckets; batch order
+    is shuffled again so long and short batches are interleaved. Only the
+    rows of the current batch are read from disk.
+    """
+
+    def __init__(self, encodings, labels, soft_targets, pad_token_id: int, batch_size: int, token_budget: int,
+                 seed: int = 0):
+        self.encodings = encodings
+        self.labels = labels
+        self.soft_targets = soft_targets
+        self.pad_token_id = pad_token_id
+        self.batch_size = batch_size
+        self.token_budget = token_budget
+        self.seed = seed
+        self.epoch = 0
+
+    def batches(self):
+        rng = random.Random(self.seed + self.epoch)
+        order = list(range(len(self.labels)))
+        rng.shuffle(order)
+        lengths = self.encodings.lengths
+        pool_size = self.batch_size * POOL_BATCHES
+        batches = []
+        for start in range(0, len(order), pool_size):
+            pool = order[start : start + pool_size]
+            for bucket in make_length_buckets([int(lengths[i]) for i in pool], self.batch_size, self.token_budget):
+                batches.append([pool[i] for i in bucket])
+        rng.shuffle(batches)
+        return batches
+
+    def __len__(self):
+        return len(self.batches())
+
+    def __iter__(self):
+        worker = torch.utils.data.get_worker_info()
+        batches = self.batches()
+        if worker is not None:
+            batches = batches[worker.id :: worker.num_workers]
+        for rows in batches:
+            inputs = pad_batch([self.encodings[i] for i in rows], self.pad_token_id)
+            inputs["labels"] = torch.as_tensor(self.labels[rows], dtype=torch.long)
+            inputs["soft_targets"] = torch.as_tensor(np.asarray(self.soft_targets[rows]), dtype=torch.float32)
+            yield inputs
+
+
+def build_student(teacher_config, vocab_size: int, layers: int, hidden: int, heads: int, ffn: int, max_length: int):
+    from transformers import RobertaConfig, RobertaForSequenceClassification
+
+    config = RobertaConfig(
+        vocab_size=vocab_size,
+        hidden_size=hidden,
+        num_hidden_layers=layers,
+        num_attention_heads=heads,
+        intermediate_size=ffn,
+        # RoBERTa positions start after the padding index
+        max_position_embeddings=max_length + teacher_config.pad_token_id + 1,
+        pad_token_id=teacher_config.pad_token_id,
+        bos_token_id=teacher_config.bos_token_id,
+        eos_token_id=teacher_config.eos_token_id,
+        num_labels=len(teacher_config.id2label),
+        id2label=dict(teacher_config.id2label),
+        label2id=dict(teacher_config.label2id),
+    )
+    return RobertaForSequenceClassification(config)
+
+
+def teacher_log_probs(source: str, tokenizer, teacher, max_length: int, cache_dir: str, batch_size: int,
+                      token_budget: int) -> np.ndarray:
+    """
+    The teacher's log-probabilities for every row of `source`, cached as .npy.
+
+    Log-probabilities differ from logits by a per-row constant, so they give
+    the same tempered softmax. The cache file is keyed by the teacher and the
+    source file's hash.
+    """
+    key = f"{os.path.basename(os.path.normpath(tokenizer.name_or_path))}-{max_length}-{file_sha256(source)[:16]}"
+    path = os.path.join(cache_dir, f"teacher-{key}.npy")
+    if os.path.exists(path):
+        return np.load(path, mmap_mode="r")
+    encodings = tokenized(source, tokenizer, max_length, root=cache_dir)
+    texts = read_dataset(source, columns=["review"])["review"].astype(str).tolist()
+    start = time.perf_counter()
+    probs = predict_proba_batched(texts, tokenizer, teacher, batch_size, token_budget, max_length, encodings=encodings)
+    log_probs = probs.clamp_min(1e-8).log().numpy().astype(np.float32)
+    os.makedirs(cache_dir, exist_ok=True)
+    np.save(f"{path}.tmp.npy", log_probs)
+    os.replace(f"{path}.tmp.npy", path)
+    print(f"🧑‍🏫 Teacher predictions for {len(texts)} rows in {time.perf_counter() - start:.1f}s -> {path}")
+    return log_probs
+
+
+def distillation_loss(logits, soft_targets, labels, temperature: float, alpha: float):
+    soft = F.kl_div(
+        F.log_softmax(logits / temperature, dim=-1),
+        F.log_softmax(soft_targets / temperature, dim=-1),
+        reduction="batchmean",
+        log_target=True,
+    ) * temperature**2
+    hard = F.cross_entropy(logits, labels)
+    return alpha * soft + (1 - alpha) * hard, soft.item(), hard.item()
+
+
+def evaluate(model_dir: str, test_set: str, teacher_model: str = None, batch_size: int = 64,
+             token_budget: int = 8192, max_length: int = MAX_LENGTH, teacher_max_length: int = 256,
+             limit: int = None) -> dict:
+    """
+    Agreement with the teacher's labels on test_set and rows/sec, for the student
+    (and optionally the teacher itself, timed the same way).
+    """
+    df = read_dataset(test_set, nrows=limit)
+    texts = df["review"].astype(str).tolist()
+    expected = df["sentiment"].astype(int).to_numpy()
+    report = {"test_set": test_set, "rows": len(texts)}
+    candidates = [("student", model_dir, max_length)]
+    if teacher_model:
+        candidates.append(("teacher", teacher_model, teacher_max_length))
+    for name, path, length in candidates:
+        tokenizer, model = load_classifier(path)
+        classify_batched(texts[:8], tokenizer, model, batch_size, token_budget, length, progress=False)
+        start = time.perf_counter()
+        labels = np.asarray(classify_batched(texts, tokenizer, model, batch_size, token_budget, length, progress=False))
+        elapsed = time.perf_counter() - start
+        per_class = {int(s): float((labels[expected == s] == s).mean()) for s in (-1, 0, 1) if (expected == s).any()}
+        confusion = [[int(((expected == t) & (labels == p)).sum()) for p in (-1, 0, 1)] for t in (-1, 0, 1)]
+        report[name] = {
+            "model": path,
+            "agreement": float((labels == expected).mean()),
+            "per_class_agreement": per_class,
+            # rows: label in test_set, columns: prediction (both ordered -1, 0, 1)
+            "confusion": confusion,
+            "seconds": round(elapsed, 3),
+            "rows_per_sec": round(len(texts) / max(elapsed, 1e-9), 1),
+            "parameters": sum(p.numel() for p in model.model.parameters()) if hasattr(model, "model") else None,
+        }
+    if "teacher" in report:
+        report["speedup"] = round(report["student"]["rows_per_sec"] / max(report["teacher"]["rows_per_sec"], 1e-9), 2)
+    return report
+
+
+def train(args) -> str:
+    """Runs distillation and saves a new checkpoint version; returns its directory"""
+    torch.manual_seed(args.seed)
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    teacher_tokenizer, teacher = load_classifier(args.teacher)
+    soft = teacher_log_probs(args.train, teacher_tokenizer, teacher, args.teacher_max_length, args.cache_dir,
+                             args.batch_size * 2, args.token_budget * 2)
+    del teacher
+    encodings = tokenized(args.train, teacher_tokenizer, args.max_length, root=args.cache_dir)
+    label_ids = {v: int(k.split("_")[-1]) for k, v in LABEL_MAP.items()}
+    labels = read_dataset(args.train, columns=["sentiment"])["sentiment"].map(label_ids).to_numpy()
+    if args.limit:
+        rows = np.arange(min(args.limit, len(labels)))
+        labels, soft = labels[rows], soft[rows]
+
+    from transformers import AutoConfig
+
+    student = build_student(AutoConfig.from_pretrained(args.teacher), len(teacher_tokenizer), args.layers,
+                            args.hidden, args.heads, args.ffn, args.max_length)
+    stream = BucketedStream(encodings, labels, soft, teacher_tokenizer.pad_token_id, args.batch_size,
+                            args.token_budget, args.seed)
+    loader = torch.utils.data.DataLoader(stream, batch_size=None, num_workers=args.workers)
+
+    steps_per_epoch = math.ceil(len(stream) / args.accumulate)
+    total_steps = steps_per_epoch * args.epochs
+    warmup = max(1, int(total_steps * args.warmup))
+    optimizer = torch.optim.AdamW(student.parameters(), lr=args.lr, weight_decay=0.01)
+    scheduler = torch.optim.lr_scheduler.LambdaLR(
+        optimizer, lambda step: min((step + 1) / warmup, max(0.0, (total_steps - step) / max(1, total_steps - warmup)))
+    )
+    params = sum(p.numel() for p in student.parameters())
+    print(f"🎓 Student: {args.layers} layers x {args.hidden} hidden, {params / 1e6:.1f}M parameters; "
+          f"{len(labels)} rows, {len(stream)} batches/epoch, {total_steps} optimizer steps")
+
+    version = f"student-{time.strftime('%Y%m%d-%H%M%S')}"
+    out_dir = os.path.join(args.output, version)
+    history = []
+    start = time.perf_counter()
+    for epoch in range(args.epochs):
+        stream.epoch = epoch
+        student.train()
+        totals = {"loss": 0.0, "soft": 0.0, "hard": 0.0, "batches": 0, "rows": 0}
+        epoch_start = time.perf_counter()
+        for i, batch in enumerate(loader):
+            outputs = student(input_ids=batch["input_ids"], attention_mask=batch["attention_mask"])
+            loss, soft_loss, hard_loss = distillation_loss(
+                outputs.logits, batch["soft_targets"], batch["labels"], args.temperature, args.alpha
+            )
+            (loss / args.accumulate).backward()
+            if (i + 1) % args.accumulate == 0:
+                torch.nn.utils.clip_grad_norm_(student.parameters(), 1.0)
+                optimizer.step()
+                scheduler.step()
+                optimizer.zero_grad()
+            totals["loss"] += loss.item()
+            totals["soft"] += soft_loss
+            totals["hard"] += hard_loss
+            totals["batches"] += 1
+            totals["rows"] += len(batch["labels"])
+        if totals["batches"] % args.accumulate:
+            torch.nn.utils.clip_grad_norm_(student.parameters(), 1.0)
+            optimizer.step()
+            scheduler.step()
+            optimizer.zero_grad()
+        elapsed = time.perf_counter() - epoch_start
+        n = max(totals["batches"], 1)
+        history.append({"epoch": epoch + 1, "loss": totals["loss"] / n, "kd_loss": totals["soft"] / n,
+                        "ce_loss": totals["hard"] / n, "seconds": round(elapsed, 1),
+                        "rows_per_sec": round(totals["rows"] / max(elapsed, 1e-9), 1)})
+        print(f"epoch {epoch + 1}/{args.epochs}: loss {history[-1]['loss']:.4f} (kd {history[-1]['kd_loss']:.4f}, "
+              f"ce {history[-1]['ce_loss']:.4f}) {history[-1]['rows_per_sec']:.0f} rows/s")
+
+    student.eval()
+    student.save_pretrained(out_dir, safe_serialization=True)
+    teacher_tokenizer.model_max_length = args.max_length
+    teacher_tokenizer.save_pretrained(out_dir)
+    with open(os.path.join(out_dir, "training.json"), "w", encoding="utf-8") as f:
+        json.dump({
+            "version": version,
+            "teacher": args.teacher,
+            "train_set": args.train,
+            "train_sha256": file_sha256(args.train),
+            "args": vars(args),
+            "parameters": params,
+            "train_seconds": round(time.perf_counter() - start, 1),
+            "history": history,
+        }, f, indent=2)
+    with open(os.path.join(args.output, "LATEST"), "w", encoding="utf-8") as f:
+        f.write(version)
+    print(f"✅ Saved {out_dir}")
+    return out_dir
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Distil the RoBERTa sentiment teacher into a small student.")
+    parser.add_argument("--teacher", default=MODEL_NAME, help="teacher model name or local path")
+    parser.add_argument("--train", default=TRAIN_SET)
+    parser.add_argument("--test", default=TEST_SET)
+    parser.add_argument("--output", default=CHECKPOINT_DIR, help="checkpoints are saved as <output>/student-<time>")
+    parser.add_argument("--cache-dir", default=TOKEN_CACHE_DIR, help="token cache and teacher predictions")
+    parser.add_argument("--layers", type=int, default=LAYERS)
+    parser.add_argument("--hidden", type=int, default=HIDDEN)
+    parser.add_argument("--heads", type=int, default=HEADS)
+    parser.add_argument("--ffn", type=int, default=FFN)
+    parser.add_argument("--max-length", type=int, default=MAX_LENGTH, help="student input length")
+    parser.add_argument("--teacher-max-length", type=int, default=256)
+    parser.add_argument("--epochs", type=int, default=EPOCHS)
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--token-budget", type=int, default=TOKEN_BUDGET, help="max padded tokens per batch")
+    parser.add_argument("--accumulate", type=int, default=ACCUMULATE, help="batches per optimizer step")
+    parser.add_argument("--lr", type=float, default=LEARNING_RATE)
+    parser.add_argument("--warmup", type=float, default=WARMUP, help="fraction of steps with linear warm-up")
+    parser.add_argument("--temperature", type=float, default=TEMPERATURE)
+    parser.add_argument("--alpha", type=float, default=ALPHA, help="weight of the distillation term")
+    parser.add_argument("--workers", type=int, default=0, help="DataLoader worker processes")
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--limit", type=int, default=None, help="only train on the first N rows")
+    parser.add_argument("--evaluate", default=None, metavar="CHECKPOINT", help="only evaluate this checkpoint")
+    parser.add_argument("--compare-teacher", action="store_true", help="also time the teacher on the test set")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    checkpoint = args.evaluate or train(args)
+    report = evaluate(checkpoint, args.test, args.teacher if args.compare_teacher else None,
+                      max_length=args.max_length, teacher_max_length=args.teacher_max_length)
+    with open(os.path.join(checkpoint, "eval_report.json"), "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"\n📊 {report['rows']} rows of {report['test_set']}")
+    print(f"{'model':>8} {'agreement':>10} {'rows/sec':>10} {'params':>10}")
+    for name in ("student", "teacher"):
+        if name in report:
+            r = report[name]
+            params = f"{r['parameters'] / 1e6:.1f}M" if r["parameters"] else "-"
+            print(f"{name:>8} {r['agreement']:>10.2%} {r['rows_per_sec']:>10.1f} {params:>10}")
+    if "speedup" in report:
+        print(f"Student is {report['speedup']}x faster than the teacher")
+    print(f"✅ Saved evaluation report to {os.path.join(checkpoint, 'eval_report.json')}")
+
+
+if __name__ == "__main__":
+    main()